@@ -0,0 +1,233 @@
+"""
+In-process response cache for the read-mostly catalog endpoints.
+
+Entries hold the fully serialized JSON body and its ETag, so a hit skips both
+the MongoDB round trip and validation through the Pydantic response models.
+Entries expire after a TTL and the cache is bounded with LRU eviction.
+Concurrent misses for the same key share a single load.
+
+Clients get `ETag` and `Cache-Control` headers and a `304 Not Modified` when
+their `If-None-Match` still matches.
+
+The cache lives in each worker process. To invalidate across workers, the
+catalog has a version number in MongoDB (`meta` collection, `_id: "catalog"`)
+that `POST /api/cache/invalidate` and the seed script increment. Each worker
+re-reads it at most every CATALOG_VERSION_CHECK_INTERVAL seconds and drops its
+entries when it changed.
+
+Usage:
+    from app.cache import catalog_cache, cached_json_response
+
+    @router.get("/categories")
+    async def get_categories(request: Request):
+        return await cached_json_response(request, "categories", load_categories_json)
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, Union
+
+from fastapi import Request, Response
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.database import get_meta_collection
+
+
+# A loader returns the serialized body, optionally with extra response headers
+Loaded = Union[bytes, Tuple[bytes, Dict[str, str]]]
+
+
+class CachedBody:
+    """A serialized response body, its validator and extra headers."""
+
+    __slots__ = ("body", "etag", "headers", "expires_at")
+
+    def __init__(self, loaded: Loaded, expires_at: float):
+        body, headers = loaded if isinstance(loaded, tuple) else (loaded, {})
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.headers = headers
+        self.expires_at = expires_at
+
+
+class SharedVersion:
+    """A version number in MongoDB shared by every worker, re-read at most every `interval` seconds."""
+
+    def __init__(self, document_id: str, interval: float = 1.0):
+        self.document_id = document_id
+        self.interval = interval
+        # None until read, or while MongoDB isn't connected
+        self.value: Optional[int] = None
+        self._checked_at = float("-inf")
+        self._reading: Optional[asyncio.Task] = None
+
+    async def current(self) -> Optional[int]:
+        """The shared version, as of at most `interval` seconds ago"""
+        if time.monotonic() - self._checked_at < self.interval:
+            return self.value
+        if self._reading is None:
+            # Concurrent requests share one read
+            self._reading = asyncio.create_task(self._read())
+        return await asyncio.shield(self._reading)
+
+    async def _read(self) -> Optional[int]:
+        try:
+            collection = get_meta_collection()
+            if collection is not None:
+                document = await collection.find_one({"_id": self.document_id}, {"version": 1})
+                self.value = document.get("version", 0) if document else 0
+        except Exception as e:
+            # Keep the last known version; entries still expire after their TTL
+            print(f"⚠️  Warning: Could not read the {self.document_id} version: {e}")
+        finally:
+            self._checked_at = time.monotonic()
+            self._reading = None
+        return self.value
+
+    async def bump(self) -> Optional[int]:
+        """Increment the shared version; None when MongoDB isn't connected"""
+        collection = get_meta_collection()
+        if collection is None:
+            return None
+        document = await collection.find_one_and_update(
+            {"_id": self.document_id}, {"$inc": {"version": 1}},
+            upsert=True, return_document=ReturnDocument.AFTER,
+        )
+        self.value = document["version"]
+        self._checked_at = time.monotonic()
+        return self.value
+
+
+class ResponseCache:
+    """TTL + LRU cache of serialized JSON bodies."""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 512,
+                 shared_version: Optional[SharedVersion] = None):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        # Entries are dropped whenever the shared version changes
+        self.shared_version = shared_version
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Task] = {}
+        # Bumped by clear() so loads started before an invalidation aren't stored
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, loaded: Loaded) -> CachedBody:
+        entry = CachedBody(loaded, time.monotonic() + self.ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def get_or_load(self, key: Hashable,
+                          loader: Callable[[], Awaitable[Loaded]]) -> CachedBody:
+        """Cached entry for `key`, loading it once if missing or expired"""
+        await self.sync_version()
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        task = self._loading.get(key)
+        if task is None:
+            self.misses += 1
+            # A separate task, so a client disconnecting mid-load doesn't
+            # cancel the load for everyone else waiting on it
+            task = asyncio.create_task(self._load(key, loader))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._loading[key] = task
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Loaded]]) -> CachedBody:
+        generation = self._generation
+        try:
+            loaded = await loader()
+        finally:
+            self._loading.pop(key, None)
+        if generation != self._generation:
+            # Invalidated while loading: serve this result once, don't keep it
+            return CachedBody(loaded, time.monotonic())
+        return self.put(key, loaded)
+
+    async def sync_version(self):
+        """Drop every entry if another worker (or a reseed) bumped the shared version"""
+        if self.shared_version is None:
+            return
+        version = await self.shared_version.current()
+        if version is not None and version != self.version:
+            if self.version is not None:
+                self.clear()
+            self.version = version
+
+    def clear(self) -> int:
+        """Drop every entry, e.g. after the catalog was reseeded"""
+        count = len(self._entries)
+        self._entries.clear()
+        self._generation += 1
+        return count
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / total if total else 0.0,
+            "version": self.version,
+        }
+
+
+catalog_cache = ResponseCache(
+    ttl=settings.catalog_cache_ttl,
+    max_entries=settings.catalog_cache_max_entries,
+    shared_version=SharedVersion("catalog", settings.catalog_version_check_interval),
+)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag.removeprefix("W/") for tag in candidates]
+
+
+async def cached_json_response(request: Request, key: Hashable,
+                               loader: Callable[[], Awaitable[Loaded]],
+                               cache: ResponseCache = catalog_cache) -> Response:
+    """Serve a JSON body from `cache`, honouring If-None-Match
+
+    `loader` returns the serialized body (or body and headers) on a miss and
+    may raise HTTPException; errors are never cached.
+    """
+    entry = await cache.get_or_load(key, loader)
+    headers = {
+        **entry.headers,
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={settings.catalog_cache_max_age}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,51 @@
+"""
+Application settings read from environment variables (or backend/.env).
+
+Usage:
+    from app.config import settings
+    settings.catalog_cache_ttl
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Catalog response cache (categories/exercises)
+    catalog_cache_ttl: float = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+    catalog_cache_max_entries: int = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "512"))
+    # max-age sent to browsers/proxies; they revalidate with If-None-Match afterwards
+    catalog_cache_max_age: int = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))
+    # How often each worker re-reads the shared catalog version, so an invalidation
+    # on any worker (or a reseed) reaches all of them within this many seconds
+    catalog_version_check_interval: float = float(os.getenv("CATALOG_VERSION_CHECK_INTERVAL", "1"))
+    # Required in X-Admin-Token for cache invalidation when set
+    admin_token: Optional[str] = os.getenv("ADMIN_TOKEN") or None
+    # Explain every catalog query shape at startup and warn about collection scans
+    db_explain_queries: bool = os.getenv("DB_EXPLAIN_QUERIES", "0").lower() in ("1", "true", "yes")
+
+    # MongoDB connection pool (per process: each uvicorn worker has its own)
+    mongodb_max_pool_size: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+    # Connections kept open while idle, and opened at startup to warm the pool
+    mongodb_min_pool_size: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "2"))
+    mongodb_max_idle_time_ms: int = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+    mongodb_server_selection_timeout_ms: int = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    mongodb_connect_timeout_ms: int = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+    mongodb_socket_timeout_ms: int = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "20000"))
+    # How long a request waits for a free pooled connection before failing
+    mongodb_wait_queue_timeout_ms: int = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+    # primary, primaryPreferred, secondary, secondaryPreferred or nearest; anything but
+    # primary may return stale data from a secondary
+    mongodb_read_preference: str = os.getenv("MONGODB_READ_PREFERENCE", "primary")
+    # Background reconnect after a failed startup: exponential backoff bounds in seconds
+    mongodb_reconnect_min_delay: float = float(os.getenv("MONGODB_RECONNECT_MIN_DELAY", "1"))
+    mongodb_reconnect_max_delay: float = float(os.getenv("MONGODB_RECONNECT_MAX_DELAY", "60"))
+
+
+settings = Settings()
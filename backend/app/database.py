@@ -2,14 +2,25 @@
 MongoDB database connection and configuration.
 
 This module handles the connection to MongoDB using Motor (async driver).
+Pool size, timeouts and read preference come from app.config. If MongoDB is
+unreachable at startup, `start_reconnect` keeps retrying in the background
+with exponential backoff; routes answer 503 until it succeeds.
+
 Usage:
     from app.database import db, connect_db, close_db
 """
 
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+from pymongo import ASCENDING, IndexModel, monitoring
+from pymongo.errors import ConfigurationError
+from typing import Any, Dict, Iterator, List, Optional
+import asyncio
 import os
+import random
+import threading
 from dotenv import load_dotenv
+from app.config import settings
+from app.queries import QUERY_SHAPES
 
 # Load environment variables
 load_dotenv()
@@ -20,10 +31,124 @@ client: Optional[AsyncIOMotorClient] = None
 # Database instance
 db = None
 
+# Background task retrying connect_db after a failed startup
+reconnect_task: Optional[asyncio.Task] = None
+reconnect_attempts = 0
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters fed by PyMongo's CMAP events.
+    Events arrive from driver threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checkout_failed = 0
+        self.cleared = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self.created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+            self.closed += 1
+
+    def connection_checked_out(self, event):
+        wait = getattr(event, "duration", 0.0) or 0.0
+        with self._lock:
+            self.in_use += 1
+            self.checked_out += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failed += 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.cleared += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open": self.open,
+                "inUse": self.in_use,
+                "idle": max(0, self.open - self.in_use),
+                "created": self.created,
+                "closed": self.closed,
+                "checkedOut": self.checked_out,
+                "checkoutFailed": self.checkout_failed,
+                "cleared": self.cleared,
+                "avgWaitMs": self.wait_seconds_total / self.checked_out * 1000 if self.checked_out else 0.0,
+                "maxWaitMs": self.wait_seconds_max * 1000,
+            }
+
+
+pool_stats = PoolStats()
+
+# Indexes every query in app/routers relies on, created at startup
+REQUIRED_INDEXES: Dict[str, List[IndexModel]] = {
+    "categories": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # /api/catalog?category= filters on the kind and returns id order
+        IndexModel([("category", ASCENDING), ("id", ASCENDING)], name="category_id"),
+    ],
+    "exercises": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Category listings filter on category_id and page in id order
+        IndexModel([("category_id", ASCENDING), ("id", ASCENDING)], name="category_id_id"),
+    ],
+}
+
 def get_database():
     """Get the database instance."""
     return db
 
+def client_options() -> Dict[str, Any]:
+    """Motor client keyword arguments from settings (these override URI options)"""
+    return {
+        "maxPoolSize": settings.mongodb_max_pool_size,
+        "minPoolSize": settings.mongodb_min_pool_size,
+        "maxIdleTimeMS": settings.mongodb_max_idle_time_ms,
+        "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+        "connectTimeoutMS": settings.mongodb_connect_timeout_ms,
+        "socketTimeoutMS": settings.mongodb_socket_timeout_ms,
+        "waitQueueTimeoutMS": settings.mongodb_wait_queue_timeout_ms,
+        "readPreference": settings.mongodb_read_preference,
+        "event_listeners": [pool_stats],
+    }
+
 async def connect_db():
     """
     Create database connection.
@@ -36,31 +161,149 @@ async def connect_db():
     if not mongodb_uri:
         raise ValueError("MONGODB_URI not found in environment variables. Please set it in .env file.")
     
+    new_client = None
     try:
         # Create Motor client
-        client = AsyncIOMotorClient(mongodb_uri)
+        new_client = AsyncIOMotorClient(mongodb_uri, **client_options())
         
         # Get database name from URI or use default
         db_name = mongodb_uri.split("/")[-1].split("?")[0] or "smart-coaching"
-        db = client[db_name]
         
         # Test connection
-        await client.admin.command('ping')
-        print(f"✅ Connected to MongoDB: {db_name}")
+        await new_client.admin.command('ping')
+        await warm_pool(new_client)
         
     except Exception as e:
         print(f"❌ Failed to connect to MongoDB: {e}")
+        if new_client is not None:
+            new_client.close()
         raise
+    
+    # Only publish the client once it works, so routes keep answering 503 until then
+    client = new_client
+    db = client[db_name]
+    print(f"✅ Connected to MongoDB: {db_name} (pool {settings.mongodb_min_pool_size}-{settings.mongodb_max_pool_size}, "
+          f"read preference {settings.mongodb_read_preference})")
+    
+    await ensure_indexes()
+    if settings.db_explain_queries:
+        await verify_query_plans()
+
+
+async def warm_pool(mongo_client: AsyncIOMotorClient):
+    """
+    Open minPoolSize connections now rather than on the first requests.
+    Concurrent pings each need their own connection.
+    """
+    count = settings.mongodb_min_pool_size
+    if count > 1:
+        await asyncio.gather(*(mongo_client.admin.command('ping') for _ in range(count)))
+
+
+def start_reconnect():
+    """Retry connect_db in the background until it succeeds"""
+    global reconnect_task
+    
+    if reconnect_task is None or reconnect_task.done():
+        reconnect_task = asyncio.create_task(_reconnect_loop())
+
+
+async def _reconnect_loop():
+    global reconnect_attempts
+    
+    delay = settings.mongodb_reconnect_min_delay
+    while db is None:
+        # Full jitter keeps several workers from retrying in lockstep
+        await asyncio.sleep(random.uniform(0, delay))
+        reconnect_attempts += 1
+        try:
+            await connect_db()
+        except (ValueError, ConfigurationError) as e:
+            # A missing or invalid configuration won't fix itself
+            print(f"❌ Giving up on MongoDB reconnect: {e}")
+            return
+        except Exception:
+            delay = min(delay * 2, settings.mongodb_reconnect_max_delay)
+            print(f"🔁 MongoDB reconnect attempt {reconnect_attempts} failed, retrying within {delay:.1f}s")
+
+
+def connection_stats() -> Dict[str, Any]:
+    """Connection state and pool counters of this process"""
+    return {
+        "pid": os.getpid(),
+        "connected": db is not None,
+        "reconnecting": reconnect_task is not None and not reconnect_task.done(),
+        "reconnectAttempts": reconnect_attempts,
+        "maxPoolSize": settings.mongodb_max_pool_size,
+        "minPoolSize": settings.mongodb_min_pool_size,
+        "readPreference": settings.mongodb_read_preference,
+        "pool": pool_stats.snapshot(),
+    }
+
+
+async def ensure_indexes():
+    """
+    Create the indexes in REQUIRED_INDEXES.
+    Existing indexes are left as they are, so this is cheap on every startup.
+    """
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        try:
+            names = await db[collection_name].create_indexes(indexes)
+            print(f"📇 Indexes ready on {collection_name}: {', '.join(names)}")
+        except Exception as e:
+            # E.g. duplicate ids prevent the unique index; keep serving without it
+            print(f"⚠️  Warning: Could not create indexes on {collection_name}: {e}")
+
+
+def plan_stages(plan: dict) -> Iterator[str]:
+    """Every stage name in an explain() plan tree"""
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan", "winningPlan"):
+        if isinstance(plan.get(key), dict):
+            yield from plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+
+async def verify_query_plans():
+    """
+    Explain each query in QUERY_SHAPES and warn about collection scans.
+    Debug aid enabled with DB_EXPLAIN_QUERIES=1.
+    """
+    for collection_name, query, sort in QUERY_SHAPES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort, ASCENDING)
+        try:
+            explain = await cursor.explain()
+        except Exception as e:
+            print(f"⚠️  Warning: Could not explain {collection_name}.find({query}): {e}")
+            continue
+        
+        stages = list(plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {})))
+        if "COLLSCAN" in stages:
+            print(f"⚠️  Warning: {collection_name}.find({query}) sort={sort} uses a collection scan")
+        elif "SORT" in stages:
+            print(f"⚠️  Warning: {collection_name}.find({query}) sort={sort} sorts in memory")
+        else:
+            print(f"🔍 {collection_name}.find({query}) sort={sort}: {' <- '.join(stages)}")
 
 async def close_db():
     """
     Close database connection.
     Called on application shutdown.
     """
-    global client
+    global client, db, reconnect_task
+    
+    if reconnect_task is not None:
+        reconnect_task.cancel()
+        reconnect_task = None
     
     if client:
         client.close()
+        client = None
+        db = None
         print("🔌 MongoDB connection closed")
 
 # Collections (add your collections here)
@@ -71,3 +314,7 @@ def get_categories_collection():
 def get_exercises_collection():
     """Get exercises collection."""
     return db.exercises if db is not None else None
+
+def get_meta_collection():
+    """Get the collection of shared bookkeeping documents (e.g. the catalog version)."""
+    return db.meta if db is not None else None
@@ -2,7 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.routers import categories
-from app.database import connect_db, close_db
+from app.database import connect_db, close_db, start_reconnect, connection_stats
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -12,9 +12,13 @@ async def lifespan(app: FastAPI):
     # Startup: Connect to MongoDB
     try:
         await connect_db()
-    except Exception as e:
+    except ValueError as e:
         print(f"⚠️  Warning: Could not connect to MongoDB: {e}")
         print("📝 Application will run with in-memory data only")
+    except Exception as e:
+        print(f"⚠️  Warning: Could not connect to MongoDB: {e}")
+        print("🔁 Retrying in the background")
+        start_reconnect()
     
     yield
     
@@ -40,3 +44,8 @@ app.include_router(categories.router)
 @app.get("/")
 def root():
     return {"message": "🏋️ Smart Coaching API is running!"}
+
+@app.get("/api/db/stats")
+def db_stats():
+    """MongoDB connection state and pool usage of this worker process"""
+    return connection_stats()
@@ -0,0 +1,85 @@
+"""
+MongoDB queries issued by the catalog routes.
+
+The routers build every filter and pipeline here, and `QUERY_SHAPES` (checked
+at startup with DB_EXPLAIN_QUERIES=1) is built from the same helpers, so the
+explained queries can't drift from the ones the API sends.
+
+Usage:
+    from app.queries import exercises_filter, projection
+    exercises_col.find(exercises_filter(category_id=1), projection(fields)).sort("id", 1)
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def by_id(document_id: int) -> Dict:
+    """Filter for a single category or exercise"""
+    return {"id": document_id}
+
+
+def categories_filter(category: Optional[str] = None) -> Dict:
+    """Categories, optionally of one kind (e.g. strength)"""
+    return {"category": category} if category else {}
+
+
+def exercises_filter(category_id: Optional[int] = None, after: Optional[int] = None,
+                     difficulty: Optional[str] = None) -> Dict:
+    """Exercises of a category, past an id cursor and/or of one difficulty"""
+    query: Dict = {"category_id": category_id} if category_id else {}
+    if difficulty:
+        query["difficulty"] = difficulty
+    if after is not None:
+        query["id"] = {"$gt": after}
+    return query
+
+
+def projection(fields: Optional[Sequence[str]] = None) -> Dict:
+    """Projection returning `fields` (all fields when None), never `_id`"""
+    return {"_id": 0, **{name: 1 for name in fields}} if fields else {"_id": 0}
+
+
+def catalog_pipeline(category: Optional[str], difficulty: Optional[str],
+                     exercise_fields: Optional[Sequence[str]], category_fields: Sequence[str],
+                     exercises_collection: str = "exercises") -> List[Dict]:
+    """Aggregation on categories embedding each category's exercises in id order
+
+    localField/foreignField with a pipeline (MongoDB 5.0+) runs, per category,
+    the `exercises_filter(category_id, difficulty=...)` query sorted by id,
+    served by the category_id + id index.
+    """
+    category_query = categories_filter(category)
+    pipeline: List[Dict] = [{"$match": category_query}] if category_query else []
+    exercise_query = exercises_filter(difficulty=difficulty)
+    exercise_pipeline: List[Dict] = [{"$match": exercise_query}] if exercise_query else []
+    exercise_pipeline += [{"$sort": {"id": 1}}, {"$project": projection(exercise_fields)}]
+    pipeline += [
+        {"$sort": {"id": 1}},
+        {"$project": projection(category_fields)},
+        {"$lookup": {
+            "from": exercises_collection,
+            "localField": "id",
+            "foreignField": "category_id",
+            "pipeline": exercise_pipeline,
+            "as": "exercises",
+        }},
+    ]
+    if difficulty:
+        # Categories left without exercises of that difficulty
+        pipeline.append({"$match": {"exercises.0": {"$exists": True}}})
+    return pipeline
+
+
+# Every query shape the routers send: (collection, filter, sort). The
+# /api/catalog lookup is listed as the per-category query it runs.
+QUERY_SHAPES: List[Tuple[str, Dict, Optional[str]]] = [
+    ("categories", categories_filter(), "id"),
+    ("categories", categories_filter(category="strength"), "id"),
+    ("categories", by_id(1), None),
+    ("exercises", exercises_filter(), "id"),
+    ("exercises", exercises_filter(after=1), "id"),
+    ("exercises", exercises_filter(category_id=1), "id"),
+    ("exercises", exercises_filter(category_id=1, after=1), "id"),
+    ("exercises", exercises_filter(category_id=1, difficulty="Easy"), "id"),
+    ("exercises", by_id(1), None),
+]
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.cache import cached_json_response, catalog_cache
+from app.config import settings
 from app.database import get_categories_collection, get_exercises_collection
-from typing import List, Optional
-from pydantic import BaseModel
+from app.queries import by_id, catalog_pipeline, categories_filter, exercises_filter, projection
+from app.streaming import open_json_array_stream
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
+from pydantic import BaseModel, TypeAdapter, create_model
 
 router = APIRouter(prefix="/api", tags=["Categories & Exercises"])
 
@@ -26,9 +32,72 @@ class Category(BaseModel):
     description: str
 
 
+class CategoryWithExercises(Category):
+    exercises: List[Exercise]
+
+
+# Cached endpoints validate and serialize once per cache miss
+CategoryList = TypeAdapter(List[Category])
+ExerciseList = TypeAdapter(List[Exercise])
+CategoryItem = TypeAdapter(Category)
+ExerciseItem = TypeAdapter(Exercise)
+
+# Largest page `limit` accepted by paginated endpoints
+MAX_PAGE_SIZE = 500
+
+
+def parse_exercise_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Validate a `fields=` projection; `id` is always included for cursors"""
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested - set(Exercise.model_fields))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(Exercise.model_fields)}"
+        )
+    return tuple(name for name in Exercise.model_fields if name == "id" or name in requested)
+
+
+@lru_cache(maxsize=64)
+def exercise_projection_model(fields: Optional[Tuple[str, ...]]) -> Type[BaseModel]:
+    """Exercise model restricted to the projected fields"""
+    if fields is None:
+        return Exercise
+    return create_model(
+        "ExerciseProjection",
+        **{name: (Exercise.model_fields[name].annotation, ...) for name in fields},
+    )
+
+
+@lru_cache(maxsize=64)
+def exercise_list_adapter(fields: Optional[Tuple[str, ...]]) -> TypeAdapter:
+    """List adapter for full or projected exercises"""
+    if fields is None:
+        return ExerciseList
+    return TypeAdapter(List[exercise_projection_model(fields)])
+
+
+@lru_cache(maxsize=64)
+def catalog_category_model(fields: Optional[Tuple[str, ...]]) -> Type[BaseModel]:
+    """Category model embedding full or projected exercises"""
+    if fields is None:
+        return CategoryWithExercises
+    return create_model(
+        "CategoryWithExerciseProjection",
+        __base__=Category,
+        exercises=(List[exercise_projection_model(fields)], ...),
+    )
+
+
 @router.get("/categories", response_model=List[Category])
-async def get_categories():
+async def get_categories(request: Request):
     """Get all categories with their exercises."""
+    return await cached_json_response(request, ("categories",), load_categories)
+
+
+async def load_categories() -> bytes:
     categories_col = get_categories_collection()
     
     if categories_col is None:
@@ -39,15 +108,21 @@ async def get_categories():
         )
     
     try:
-        categories = await categories_col.find({}, {"_id": 0}).to_list(length=100)
-        return categories
+        categories = await categories_col.find(categories_filter(), projection()).sort("id", 1).to_list(length=None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return CategoryList.dump_json(CategoryList.validate_python(categories))
 
 
 @router.get("/categories/{category_id}", response_model=Category)
-async def get_category(category_id: int):
+async def get_category(category_id: int, request: Request):
     """Get a specific category by ID."""
+    return await cached_json_response(
+        request, ("category", category_id), lambda: load_category(category_id)
+    )
+
+
+async def load_category(category_id: int) -> bytes:
     categories_col = get_categories_collection()
     
     if categories_col is None:
@@ -57,19 +132,57 @@ async def get_category(category_id: int):
         )
     
     try:
-        category = await categories_col.find_one({"id": category_id}, {"_id": 0})
-        if not category:
-            raise HTTPException(status_code=404, detail=f"Category {category_id} not found")
-        return category
-    except HTTPException:
-        raise
+        category = await categories_col.find_one(by_id(category_id), projection())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if not category:
+        raise HTTPException(status_code=404, detail=f"Category {category_id} not found")
+    return CategoryItem.dump_json(CategoryItem.validate_python(category))
 
 
 @router.get("/exercises", response_model=List[Exercise])
-async def get_exercises(category_id: Optional[int] = None):
-    """Get all exercises, optionally filtered by category."""
+async def get_exercises(
+    request: Request,
+    category_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; omit for every exercise"),
+    after: Optional[int] = Query(None, description="Return exercises with an id greater than this cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,thumbnail"),
+    stream: bool = Query(False, description="Stream the array as documents are read instead of buffering it"),
+):
+    """
+    Get exercises ordered by id, optionally filtered by category.
+    
+    Pages are keyset-based: pass `limit`, then follow the `Link: rel="next"`
+    header (or pass the `X-Next-Cursor` value as `after`) until it is absent.
+    `fields` projects documents down in MongoDB; `id` is always included.
+    With `stream=true` the response is written as the cursor is read and is
+    not cached; continue from the last received id.
+    """
+    projection_fields = parse_exercise_fields(fields)
+    
+    if stream:
+        cursor = exercises_cursor(category_id, after, projection_fields, limit)
+        return await stream_json_array(cursor, exercise_projection_model(projection_fields))
+    
+    return await cached_json_response(
+        request,
+        ("exercises", category_id, limit, after, projection_fields),
+        lambda: load_exercises(request, category_id, limit, after, projection_fields),
+    )
+
+
+async def stream_json_array(cursor, model: Type[BaseModel]) -> StreamingResponse:
+    """Stream a cursor as a JSON array; query errors are a 500 like non-streamed responses"""
+    try:
+        body = await open_json_array_stream(cursor, model)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return StreamingResponse(body, media_type="application/json")
+
+
+def exercises_cursor(category_id: Optional[int], after: Optional[int],
+                     fields: Optional[Tuple[str, ...]], limit: Optional[int]):
+    """Motor cursor over exercises in id order, with filter and projection pushed down"""
     exercises_col = get_exercises_collection()
     
     if exercises_col is None:
@@ -78,17 +191,40 @@ async def get_exercises(category_id: Optional[int] = None):
             detail="Database not connected. Please configure MongoDB URI in backend/.env"
         )
     
+    query = exercises_filter(category_id=category_id, after=after)
+    cursor = exercises_col.find(query, projection(fields)).sort("id", 1)
+    return cursor.limit(limit) if limit else cursor
+
+
+async def load_exercises(request: Request, category_id: Optional[int], limit: Optional[int],
+                         after: Optional[int], fields: Optional[Tuple[str, ...]]):
+    # One extra document tells whether another page exists
+    cursor = exercises_cursor(category_id, after, fields, limit + 1 if limit else None)
     try:
-        query = {"category_id": category_id} if category_id else {}
-        exercises = await exercises_col.find(query).to_list(length=1000)
-        return exercises
+        exercises = await cursor.to_list(length=None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    headers = {}
+    if limit and len(exercises) > limit:
+        exercises = exercises[:limit]
+        next_cursor = exercises[-1]["id"]
+        next_url = request.url.include_query_params(after=next_cursor)
+        headers = {"X-Next-Cursor": str(next_cursor), "Link": f'<{next_url}>; rel="next"'}
+    
+    adapter = exercise_list_adapter(fields)
+    return adapter.dump_json(adapter.validate_python(exercises)), headers
 
 
 @router.get("/exercises/{exercise_id}", response_model=Exercise)
-async def get_exercise(exercise_id: int):
+async def get_exercise(exercise_id: int, request: Request):
     """Get a specific exercise by ID."""
+    return await cached_json_response(
+        request, ("exercise", exercise_id), lambda: load_exercise(exercise_id)
+    )
+
+
+async def load_exercise(exercise_id: int) -> bytes:
     exercises_col = get_exercises_collection()
     
     if exercises_col is None:
@@ -98,11 +234,69 @@ async def get_exercise(exercise_id: int):
         )
     
     try:
-        exercise = await exercises_col.find_one({"id": exercise_id})
-        if not exercise:
-            raise HTTPException(status_code=404, detail=f"Exercise {exercise_id} not found")
-        return exercise
-    except HTTPException:
-        raise
+        exercise = await exercises_col.find_one(by_id(exercise_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if not exercise:
+        raise HTTPException(status_code=404, detail=f"Exercise {exercise_id} not found")
+    return ExerciseItem.dump_json(ExerciseItem.validate_python(exercise))
+
+
+@router.get("/catalog", response_model=List[CategoryWithExercises])
+async def get_catalog(
+    category: Optional[str] = Query(None, description="Only categories of this kind, e.g. strength"),
+    difficulty: Optional[str] = Query(None, description="Only exercises of this difficulty, e.g. Easy"),
+    fields: Optional[str] = Query(None, description="Comma-separated exercise fields to return, e.g. id,name,thumbnail"),
+):
+    """
+    Get categories in id order, each with its exercises embedded in id order.
+    
+    One aggregation replaces `/categories` followed by `/exercises?category_id=`
+    per category. With `difficulty`, categories left without exercises are
+    omitted. `fields` projects exercises down in MongoDB; `id` is always
+    included. The response is streamed category by category and not cached;
+    query errors (e.g. a server older than MongoDB 5.0) answer 500.
+    """
+    projection_fields = parse_exercise_fields(fields)
+    cursor = catalog_cursor(category, difficulty, projection_fields)
+    return await stream_json_array(cursor, catalog_category_model(projection_fields))
+
+
+def catalog_cursor(category: Optional[str], difficulty: Optional[str],
+                   fields: Optional[Tuple[str, ...]]):
+    """Motor cursor over categories with their exercises joined in by `$lookup`"""
+    categories_col = get_categories_collection()
+    exercises_col = get_exercises_collection()
+    
+    if categories_col is None or exercises_col is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Database not connected. Please configure MongoDB URI in backend/.env"
+        )
+    
+    pipeline = catalog_pipeline(category, difficulty, fields, tuple(Category.model_fields),
+                                exercises_col.name)
+    return categories_col.aggregate(pipeline)
+
+
+@router.post("/cache/invalidate")
+async def invalidate_catalog_cache(x_admin_token: Optional[str] = Header(None)):
+    """Drop cached catalog responses in every worker; call after editing categories or exercises."""
+    if settings.admin_token and x_admin_token != settings.admin_token:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    
+    stats = catalog_cache.stats()
+    cleared = catalog_cache.clear()
+    # Other workers drop their entries when they see the new version
+    try:
+        version = await catalog_cache.shared_version.bump()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    catalog_cache.version = version
+    return {"cleared": cleared, "version": version, "stats": stats}
+
+
+@router.get("/cache/stats")
+async def get_catalog_cache_stats():
+    """Catalog cache size and hit rate."""
+    return catalog_cache.stats()
@@ -0,0 +1,70 @@
+"""
+Stream MongoDB query results as a JSON array.
+
+Documents are validated and written as the Motor cursor yields them, so the
+response never holds the whole result set in memory.
+
+The first document is read before the response starts (`open_json_array_stream`),
+so a failing query still raises in the route and can become a 500 instead of
+a `200` with an empty body. A failure after that point is logged and the
+array closed, so the client always receives valid JSON.
+
+Usage:
+    cursor = collection.find(query, projection)
+    try:
+        body = await open_json_array_stream(cursor, Exercise)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return StreamingResponse(body, media_type="application/json")
+"""
+
+from typing import Any, AsyncIterator, Optional, Type
+
+from pydantic import BaseModel
+
+# Documents are sent in chunks of roughly this many bytes
+CHUNK_SIZE = 16 * 1024
+
+# Marks "no document read ahead"; None can't be used, documents are dicts
+_EMPTY: Any = object()
+
+
+async def open_json_array_stream(cursor: Any, model: Type[BaseModel]) -> AsyncIterator[bytes]:
+    """Read the first document, raising query errors, then return the array stream"""
+    iterator = cursor.__aiter__()
+    try:
+        first = await iterator.__anext__()
+    except StopAsyncIteration:
+        first = _EMPTY
+    return json_array_stream(iterator, model, first)
+
+
+async def json_array_stream(cursor: Any, model: Type[BaseModel],
+                            first: Optional[Any] = _EMPTY) -> AsyncIterator[bytes]:
+    """Yield a JSON array of `model`-validated documents from an async cursor
+
+    `first` is a document already read from `cursor`. Errors while iterating
+    are logged and end the array early rather than breaking the JSON.
+    """
+    buffer = bytearray(b"[")
+    count = 0
+
+    def append(document: Any):
+        nonlocal count
+        if count:
+            buffer.extend(b",")
+        buffer.extend(model.model_validate(document).model_dump_json().encode())
+        count += 1
+
+    try:
+        if first is not _EMPTY:
+            append(first)
+        async for document in cursor:
+            append(document)
+            if len(buffer) >= CHUNK_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+    except Exception as e:
+        print(f"⚠️  Warning: Stream ended after {count} documents: {e}")
+    buffer.extend(b"]")
+    yield bytes(buffer)
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.cache import catalog_cache  # noqa: E402
+from app.routers import categories  # noqa: E402
+
+
+class FakeCursor:
+    """Async cursor over fixed documents, raising after `fail_after` of them"""
+
+    def __init__(self, documents, fail_after=None):
+        self.documents = list(documents)
+        self.fail_after = fail_after
+        self._position = 0
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    def __aiter__(self):
+        # Like Motor, iterating again continues where the cursor is
+        return self
+
+    async def __anext__(self):
+        if self.fail_after is not None and self._position >= self.fail_after:
+            raise RuntimeError("connection reset")
+        if self._position >= len(self.documents):
+            raise StopAsyncIteration
+        self._position += 1
+        return self.documents[self._position - 1]
+
+    async def to_list(self, length=None):
+        return [document async for document in self]
+
+
+class FakeCollection:
+    """Stands in for a Motor collection; records the queries it receives"""
+
+    def __init__(self, name, documents=(), fail_after=None):
+        self.name = name
+        self.documents = list(documents)
+        self.fail_after = fail_after
+        self.pipelines = []
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(self.documents, self.fail_after)
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(self.documents, self.fail_after)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(categories.router)
+    catalog_cache.clear()
+    with TestClient(app) as test_client:
+        yield test_client
+    catalog_cache.clear()
+
+
+@pytest.fixture
+def use_collections(monkeypatch):
+    """Serve the routers from fake collections: use_collections(exercises=..., categories=...)"""
+    def install(exercises=None, categories_collection=None):
+        monkeypatch.setattr(categories, "get_exercises_collection", lambda: exercises)
+        monkeypatch.setattr(categories, "get_categories_collection", lambda: categories_collection)
+    return install
@@ -0,0 +1,160 @@
+import asyncio
+import types
+
+import pytest
+
+from app import cache
+from app.cache import ResponseCache, SharedVersion, etag_matches
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeMeta:
+    """The `meta` collection, shared by the caches of several "workers\""""
+
+    def __init__(self):
+        self.documents = {}
+        self.reads = 0
+
+    async def find_one(self, query, projection=None):
+        self.reads += 1
+        return self.documents.get(query["_id"])
+
+    async def find_one_and_update(self, query, update, upsert, return_document):
+        document = self.documents.setdefault(query["_id"], {"_id": query["_id"], "version": 0})
+        document["version"] += update["$inc"]["version"]
+        return document
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the cache's clock; asyncio keeps the real one
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.fixture
+def meta(monkeypatch):
+    meta = FakeMeta()
+    monkeypatch.setattr(cache, "get_meta_collection", lambda: meta)
+    return meta
+
+
+def loader(body, calls):
+    async def load():
+        calls.append(body)
+        return body
+    return load
+
+
+def test_hits_until_ttl_expires(clock):
+    async def run():
+        response_cache = ResponseCache(ttl=10, max_entries=4)
+        calls = []
+        first = await response_cache.get_or_load("k", loader(b"[1]", calls))
+        clock.now += 9
+        assert await response_cache.get_or_load("k", loader(b"[2]", calls)) is first
+        clock.now += 2
+        assert (await response_cache.get_or_load("k", loader(b"[3]", calls))).body == b"[3]"
+        assert calls == [b"[1]", b"[3]"]
+    asyncio.run(run())
+
+
+def test_evicts_least_recently_used(clock):
+    async def run():
+        response_cache = ResponseCache(ttl=60, max_entries=2)
+        calls = []
+        await response_cache.get_or_load("a", loader(b"a", calls))
+        await response_cache.get_or_load("b", loader(b"b", calls))
+        await response_cache.get_or_load("a", loader(b"a", calls))
+        await response_cache.get_or_load("c", loader(b"c", calls))
+        assert response_cache.get("a") is not None
+        assert response_cache.get("b") is None
+    asyncio.run(run())
+
+
+def test_concurrent_misses_share_one_load(clock):
+    async def run():
+        response_cache = ResponseCache()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b"[]"
+
+        entries = await asyncio.gather(*(response_cache.get_or_load("k", slow) for _ in range(5)))
+        assert len(calls) == 1 and all(entry is entries[0] for entry in entries)
+    asyncio.run(run())
+
+
+def test_load_invalidated_midway_is_not_stored(clock):
+    async def run():
+        response_cache = ResponseCache()
+
+        async def load():
+            response_cache.clear()
+            return b"stale"
+
+        assert (await response_cache.get_or_load("k", load)).body == b"stale"
+        assert response_cache.get("k") is None
+    asyncio.run(run())
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"def"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_conditional_request_gets_304(client, use_collections):
+    from conftest import FakeCollection
+    category = {"id": 1, "name": "Core", "category": "core", "difficulty": "Easy", "description": ""}
+    use_collections(categories_collection=FakeCollection("categories", [category]))
+    first = client.get("/api/categories")
+    assert first.status_code == 200 and first.json() == [category]
+    again = client.get("/api/categories", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_invalidation_reaches_other_workers(clock, meta):
+    async def run():
+        interval = 1.0
+        worker_a = ResponseCache(shared_version=SharedVersion("catalog", interval))
+        worker_b = ResponseCache(shared_version=SharedVersion("catalog", interval))
+        calls = []
+        await worker_a.get_or_load("k", loader(b"old", calls))
+        await worker_b.get_or_load("k", loader(b"old", calls))
+
+        # Worker A handles POST /api/cache/invalidate
+        worker_a.clear()
+        worker_a.version = await worker_a.shared_version.bump()
+
+        # Within the check interval B may still serve its entry...
+        assert (await worker_b.get_or_load("k", loader(b"new", calls))).body == b"old"
+        # ...after it, B sees the new version and reloads
+        clock.now += interval
+        assert (await worker_b.get_or_load("k", loader(b"new", calls))).body == b"new"
+        assert (await worker_a.get_or_load("k", loader(b"new", calls))).body == b"new"
+    asyncio.run(run())
+
+
+def test_version_is_read_at_most_once_per_interval(clock, meta):
+    async def run():
+        version = SharedVersion("catalog", interval=1.0)
+        await asyncio.gather(*(version.current() for _ in range(10)))
+        await version.current()
+        assert meta.reads == 1
+        clock.now += 1.0
+        await version.current()
+        assert meta.reads == 2
+    asyncio.run(run())
@@ -0,0 +1,54 @@
+import json
+
+from conftest import FakeCollection
+
+CATEGORIES = [
+    {"id": 1, "name": "Chân & Mông", "category": "strength", "difficulty": "Easy", "description": "",
+     "exercises": [
+         {"id": 1, "category_id": 1, "name": "Squat", "duration": "45s", "reps": "3 x 12",
+          "difficulty": "Easy", "thumbnail": "", "videoUrl": ""},
+     ]},
+    {"id": 2, "name": "Core", "category": "core", "difficulty": "Easy", "description": "", "exercises": []},
+]
+
+
+def test_catalog_streams_categories_with_exercises(client, use_collections):
+    categories_col = FakeCollection("categories", CATEGORIES)
+    use_collections(exercises=FakeCollection("exercises"), categories_collection=categories_col)
+    response = client.get("/api/catalog")
+    assert response.status_code == 200
+    assert response.json() == CATEGORIES
+
+
+def test_catalog_pipeline_filters_and_projects(client, use_collections):
+    categories_col = FakeCollection("categories", [])
+    use_collections(exercises=FakeCollection("exercises"), categories_collection=categories_col)
+    client.get("/api/catalog?category=strength&difficulty=Hard&fields=name")
+    pipeline = categories_col.pipelines[-1]
+    assert pipeline[0] == {"$match": {"category": "strength"}}
+    lookup = next(stage["$lookup"] for stage in pipeline if "$lookup" in stage)
+    assert lookup["from"] == "exercises"
+    assert {"$match": {"difficulty": "Hard"}} in lookup["pipeline"]
+    assert lookup["pipeline"][-1] == {"$project": {"_id": 0, "id": 1, "name": 1}}
+    assert pipeline[-1] == {"$match": {"exercises.0": {"$exists": True}}}
+
+
+def test_catalog_query_error_is_500(client, use_collections):
+    categories_col = FakeCollection("categories", CATEGORIES, fail_after=0)
+    use_collections(exercises=FakeCollection("exercises"), categories_collection=categories_col)
+    response = client.get("/api/catalog")
+    assert response.status_code == 500
+    assert response.json()["detail"].startswith("Database error")
+
+
+def test_catalog_error_mid_stream_still_closes_the_array(client, use_collections):
+    categories_col = FakeCollection("categories", CATEGORIES, fail_after=1)
+    use_collections(exercises=FakeCollection("exercises"), categories_collection=categories_col)
+    response = client.get("/api/catalog")
+    assert response.status_code == 200
+    assert json.loads(response.content) == CATEGORIES[:1]
+
+
+def test_catalog_without_database_is_503(client, use_collections):
+    use_collections()
+    assert client.get("/api/catalog").status_code == 503
@@ -0,0 +1,32 @@
+from app.database import REQUIRED_INDEXES
+from app.queries import QUERY_SHAPES, catalog_pipeline, exercises_filter
+
+
+def index_keys(collection):
+    return [[field for field, _ in index.document["key"].items()] for index in REQUIRED_INDEXES[collection]]
+
+
+def served_by_index(keys, query, sort):
+    """Whether an index on `keys` avoids both a collection scan and an in-memory sort"""
+    equality = {field for field, value in query.items() if not isinstance(value, dict)}
+    lead = 0
+    while lead < len(keys) and keys[lead] in equality:
+        lead += 1
+    following = keys[lead:lead + 1]
+    if lead:
+        return not sort or sort in equality or following == [sort]
+    return bool(sort) and keys[0] == sort
+
+
+def test_every_query_shape_has_a_supporting_index():
+    for collection, query, sort in QUERY_SHAPES:
+        assert any(served_by_index(keys, query, sort) for keys in index_keys(collection)), \
+            (collection, query, sort)
+
+
+def test_catalog_lookup_query_is_an_explained_shape():
+    pipeline = catalog_pipeline("strength", "Easy", None, ("id",))
+    lookup = next(stage["$lookup"] for stage in pipeline if "$lookup" in stage)
+    per_category = {lookup["foreignField"]: 1, **lookup["pipeline"][0]["$match"]}
+    assert ("exercises", per_category, "id") in QUERY_SHAPES
+    assert per_category == exercises_filter(category_id=1, difficulty="Easy")
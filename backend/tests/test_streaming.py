@@ -0,0 +1,44 @@
+import json
+
+from conftest import FakeCollection
+
+EXERCISES = [
+    {"id": i, "category_id": 1, "name": f"Exercise {i}", "duration": "30s", "reps": "3 x 10",
+     "difficulty": "Easy", "thumbnail": "", "videoUrl": ""}
+    for i in range(1, 6)
+]
+
+
+def test_stream_matches_buffered_response(client, use_collections):
+    use_collections(exercises=FakeCollection("exercises", EXERCISES))
+    streamed = client.get("/api/exercises?stream=true")
+    buffered = client.get("/api/exercises")
+    assert streamed.status_code == buffered.status_code == 200
+    assert streamed.json() == buffered.json() == EXERCISES
+
+
+def test_stream_of_no_documents_is_an_empty_array(client, use_collections):
+    use_collections(exercises=FakeCollection("exercises", []))
+    response = client.get("/api/exercises?stream=true")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_query_error_is_500_in_both_modes(client, use_collections):
+    use_collections(exercises=FakeCollection("exercises", EXERCISES, fail_after=0))
+    for url in ("/api/exercises?stream=true", "/api/exercises"):
+        response = client.get(url)
+        assert response.status_code == 500
+        assert response.json()["detail"].startswith("Database error")
+
+
+def test_error_mid_stream_still_closes_the_array(client, use_collections):
+    use_collections(exercises=FakeCollection("exercises", EXERCISES, fail_after=2))
+    response = client.get("/api/exercises?stream=true")
+    assert response.status_code == 200
+    assert json.loads(response.content) == EXERCISES[:2]
+
+
+def test_disconnected_database_is_503(client, use_collections):
+    use_collections(exercises=None)
+    assert client.get("/api/exercises?stream=true").status_code == 503
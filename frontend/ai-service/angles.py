@@ -0,0 +1,102 @@
+"""
+Vectorized joint-angle engine.
+
+Landmarks are converted once per frame into a (33, 4) float32 array of
+`x, y, z, visibility` rows (MediaPipe's landmark order). Every joint angle the
+service knows about is then computed in a single NumPy pass over that array,
+and the analyzers and the response share the result instead of recomputing
+individual angles.
+
+All functions accept extra leading dimensions, so an (N, 33, 4) stack of
+frames from offline processing is handled by the same call.
+
+Usage:
+    points = landmarks_to_array(results.pose_landmarks)
+    angles = compute_angles(points)        # shape (len(ANGLE_NAMES),)
+    named = angles_to_dict(angles)         # {"left_knee": 85.2, ...}
+"""
+
+from enum import IntEnum
+from typing import Dict
+
+import numpy as np
+
+NUM_LANDMARKS = 33
+
+
+class Landmark(IntEnum):
+    """MediaPipe Pose landmark indices used by the angle engine."""
+    NOSE = 0
+    LEFT_SHOULDER = 11
+    RIGHT_SHOULDER = 12
+    LEFT_ELBOW = 13
+    RIGHT_ELBOW = 14
+    LEFT_WRIST = 15
+    RIGHT_WRIST = 16
+    LEFT_HIP = 23
+    RIGHT_HIP = 24
+    LEFT_KNEE = 25
+    RIGHT_KNEE = 26
+    LEFT_ANKLE = 27
+    RIGHT_ANKLE = 28
+
+
+# Joint angle at the middle landmark of each (a, b, c) triplet
+JOINT_TRIPLETS = {
+    "left_elbow": (Landmark.LEFT_SHOULDER, Landmark.LEFT_ELBOW, Landmark.LEFT_WRIST),
+    "right_elbow": (Landmark.RIGHT_SHOULDER, Landmark.RIGHT_ELBOW, Landmark.RIGHT_WRIST),
+    "left_shoulder": (Landmark.LEFT_ELBOW, Landmark.LEFT_SHOULDER, Landmark.LEFT_HIP),
+    "right_shoulder": (Landmark.RIGHT_ELBOW, Landmark.RIGHT_SHOULDER, Landmark.RIGHT_HIP),
+    "left_hip": (Landmark.LEFT_SHOULDER, Landmark.LEFT_HIP, Landmark.LEFT_KNEE),
+    "right_hip": (Landmark.RIGHT_SHOULDER, Landmark.RIGHT_HIP, Landmark.RIGHT_KNEE),
+    "left_knee": (Landmark.LEFT_HIP, Landmark.LEFT_KNEE, Landmark.LEFT_ANKLE),
+    "right_knee": (Landmark.RIGHT_HIP, Landmark.RIGHT_KNEE, Landmark.RIGHT_ANKLE),
+    # Straightness of the shoulder-hip-ankle line, 180 when the body is straight
+    "left_body_line": (Landmark.LEFT_SHOULDER, Landmark.LEFT_HIP, Landmark.LEFT_ANKLE),
+    "right_body_line": (Landmark.RIGHT_SHOULDER, Landmark.RIGHT_HIP, Landmark.RIGHT_ANKLE),
+}
+
+# Output order: the triplet joints, then trunk lean from vertical
+ANGLE_NAMES = tuple(JOINT_TRIPLETS) + ("trunk",)
+ANGLE_INDEX = {name: index for index, name in enumerate(ANGLE_NAMES)}
+
+_A, _B, _C = (np.array(column, dtype=np.intp) for column in zip(*JOINT_TRIPLETS.values()))
+_SHOULDERS = np.array([Landmark.LEFT_SHOULDER, Landmark.RIGHT_SHOULDER], dtype=np.intp)
+_HIPS = np.array([Landmark.LEFT_HIP, Landmark.RIGHT_HIP], dtype=np.intp)
+
+
+def landmarks_to_array(pose_landmarks) -> np.ndarray:
+    """Convert MediaPipe `pose_landmarks` to a (33, 4) float32 array"""
+    return np.array(
+        [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark],
+        dtype=np.float32,
+    )
+
+
+def compute_angles(points: np.ndarray) -> np.ndarray:
+    """Compute every angle in ANGLE_NAMES, in degrees, in one vectorized pass
+
+    `points` is (..., 33, 4); the result is (..., len(ANGLE_NAMES)). Joint
+    angles are in [0, 180] in the image plane.
+    Trunk is the lean of the hip-to-shoulder midline from vertical.
+    """
+    xy = points[..., :2]
+    a, b, c = xy[..., _A, :], xy[..., _B, :], xy[..., _C, :]
+
+    ba = a - b
+    bc = c - b
+    radians = (np.arctan2(bc[..., 1], bc[..., 0])
+               - np.arctan2(ba[..., 1], ba[..., 0]))
+    joints = np.abs(np.degrees(radians))
+    joints = np.where(joints > 180.0, 360.0 - joints, joints)
+
+    spine = xy[..., _SHOULDERS, :].mean(axis=-2) - xy[..., _HIPS, :].mean(axis=-2)
+    # Image y grows downwards, so an upright trunk points to -y
+    trunk = np.degrees(np.arctan2(np.abs(spine[..., 0]), -spine[..., 1]))
+
+    return np.concatenate([joints, trunk[..., None]], axis=-1).astype(np.float32)
+
+
+def angles_to_dict(angles: np.ndarray) -> Dict[str, float]:
+    """Name a single frame's angle vector"""
+    return {name: float(value) for name, value in zip(ANGLE_NAMES, angles)}
@@ -0,0 +1,122 @@
+"""
+Micro-batching scheduler for pose inference.
+
+Under load many frames arrive within a few milliseconds of each other. Rather
+than paying one worker handoff per frame, the batcher collects them for a
+short window (or until `max_batch` frames are waiting), splits the batch into
+at most one chunk per worker and runs each chunk with a single handler call.
+Results are fanned back out to the waiting callers.
+
+The scheduler is work-conserving: while a worker is idle, frames are
+dispatched immediately, so batching only adds latency when every worker is
+busy and the frame would have queued anyway.
+
+Each chunk is admitted to the pool as `len(chunk)` frames, so the pool's
+`max_workers + max_queue` bound still counts frames. Frames of a batch that
+exceed the remaining capacity are rejected one by one, newest first, rather
+than failing a whole chunk.
+
+Usage:
+    batcher = MicroBatcher(handle_batch, pool, window_ms=5, max_batch=8,
+                           key=lambda job: job.session_id)
+    result = await batcher.submit(job)
+"""
+
+import asyncio
+import functools
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from inference import InferenceOverloaded, InferencePool
+
+
+class MicroBatcher:
+    """Collect submitted items into batches and run them on an InferencePool.
+
+    `handler(items)` runs on a worker and must return one result per item, in
+    order; an `Exception` instance in the result list is raised to that item's
+    caller only. Items sharing a `key` always land in the same chunk, in
+    submission order, so per-session tracking sees frames sequentially.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], List[Any]], pool: InferencePool,
+                 window_ms: float = 5.0, max_batch: int = 8,
+                 key: Optional[Callable[[Any], Hashable]] = None):
+        self.handler = handler
+        self.pool = pool
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.key = key
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue `item` for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        workers_idle = self.pool.jobs_in_flight < self.pool.max_workers
+        if workers_idle or self.window == 0 or len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Drop callers that already gave up before spending a worker on them
+        batch = [(item, future) for item, future in self._pending if not future.done()]
+        self._pending = []
+
+        capacity = self.pool.capacity
+        if len(batch) > capacity:
+            overload = InferenceOverloaded(f"Inference queue full ({self.pool.max_queue} waiting)")
+            for _, future in batch[capacity:]:
+                future.set_exception(overload)
+            batch = batch[:capacity]
+
+        for chunk in self._split(batch):
+            try:
+                done = self.pool.submit(self.handler, [item for item, _ in chunk], weight=len(chunk))
+            except InferenceOverloaded as e:
+                # Another pool user took the capacity meanwhile
+                for _, future in chunk:
+                    future.set_exception(e)
+                continue
+            done.add_done_callback(functools.partial(self._deliver, chunk))
+
+    def _split(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Split a batch into one chunk per worker, keeping keyed items together."""
+        groups: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        for index, entry in enumerate(batch):
+            key = self.key(entry[0]) if self.key else None
+            # Unkeyed items are independent and may go to any worker
+            groups.setdefault(index if key is None else ("key", key), []).append(entry)
+
+        chunk_count = min(len(groups), self.pool.max_workers)
+        chunks: List[List[Tuple[Any, asyncio.Future]]] = [[] for _ in range(chunk_count)]
+        # Largest groups first, each onto the currently smallest chunk
+        for group in sorted(groups.values(), key=len, reverse=True):
+            min(chunks, key=len).extend(group)
+        return chunks
+
+    @staticmethod
+    def _deliver(chunk: List[Tuple[Any, asyncio.Future]], done: asyncio.Future):
+        """Fan a chunk's results (or its failure) out to the waiting callers"""
+        if done.cancelled():
+            results: List[Any] = [asyncio.CancelledError()] * len(chunk)
+        elif done.exception() is not None:
+            results = [done.exception()] * len(chunk)
+        else:
+            results = done.result()
+
+        for (_, future), result in zip(chunk, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
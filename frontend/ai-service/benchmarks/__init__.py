@@ -0,0 +1,7 @@
+"""
+Offline CPU benchmarks for the AI service.
+
+Run from the ai-service directory so the service modules import as usual:
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.load --spawn --concurrency 1,2,4,8 --output load.json
+"""
@@ -0,0 +1,75 @@
+"""
+Benchmark inputs: JPEG frames and MediaPipe-shaped landmark results.
+
+Frames are read from a fixture directory (`*.jpg`/`*.jpeg`, sorted by name),
+e.g. frames extracted from a recorded set with
+    ffmpeg -i squat.mp4 -vf fps=10 benchmarks/fixtures/frame_%04d.jpg
+When the directory is empty, deterministic synthetic frames are generated so
+the suite still runs; they rarely contain a detectable pose, so use real
+frames for numbers you intend to compare.
+"""
+
+import glob
+import os
+from types import SimpleNamespace
+from typing import List
+
+import cv2
+import numpy as np
+
+from angles import NUM_LANDMARKS
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_frames(directory: str = FIXTURE_DIR, count: int = 16,
+                size: tuple = (1280, 720)) -> List[bytes]:
+    """Encoded JPEG frames from `directory`, or `count` synthetic ones"""
+    paths = sorted(glob.glob(os.path.join(directory, "*.jpg"))
+                   + glob.glob(os.path.join(directory, "*.jpeg")))
+    if paths:
+        frames = []
+        for path in paths:
+            with open(path, "rb") as f:
+                frames.append(f.read())
+        return frames
+    return [synthetic_frame(index, size) for index in range(count)]
+
+
+def synthetic_frame(index: int, size: tuple = (1280, 720)) -> bytes:
+    """A reproducible noisy frame with a stick figure, JPEG-encoded"""
+    width, height = size
+    rng = np.random.default_rng(index)
+    image = rng.integers(90, 140, size=(height, width, 3), dtype=np.uint8)
+
+    # A figure bending its knees a little more each frame
+    cx, top = width // 2, height // 8
+    hip = (cx, top + height // 3)
+    bend = (index % 8) * height // 80
+    knee = (cx + width // 20 + bend, hip[1] + height // 5)
+    ankle = (cx, knee[1] + height // 5)
+    color = (40, 60, 200)
+    cv2.circle(image, (cx, top), height // 14, color, -1)
+    for start, end in [((cx, top), hip), (hip, knee), (knee, ankle),
+                       ((cx, top + height // 10), (cx - width // 12, hip[1])),
+                       ((cx, top + height // 10), (cx + width // 12, hip[1]))]:
+        cv2.line(image, start, end, color, thickness=max(4, height // 40))
+
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    if not ok:
+        raise RuntimeError("Could not encode synthetic frame")
+    return encoded.tobytes()
+
+
+def fake_results(seed: int = 0) -> SimpleNamespace:
+    """An object shaped like MediaPipe Pose results with 33 visible landmarks
+
+    Lets analysis be benchmarked without running the model.
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0.2, 0.8, size=(NUM_LANDMARKS, 3))
+    landmarks = [
+        SimpleNamespace(x=float(x), y=float(y), z=float(z) - 0.5, visibility=0.99)
+        for x, y, z in points
+    ]
+    return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmarks))
@@ -0,0 +1,250 @@
+"""
+End-to-end load generator for `POST /analyze-pose`.
+
+Replays the fixture frames against a running service from a fixed number of
+closed-loop clients (each sends its next frame as soon as the previous
+response arrives) and reports latency percentiles and throughput for every
+concurrency level. The highest throughput whose p95 stays within `--slo-ms`
+with under 1% errors is reported as the maximum sustainable FPS.
+
+Only the standard library is used for HTTP, one keep-alive connection per
+client.
+
+Usage:
+    # against a service that is already running
+    python -m benchmarks.load --url http://localhost:8000 --concurrency 1,2,4,8
+
+    # start a local uvicorn with the current AI_* settings, benchmark, stop it
+    AI_MAX_FRAME_SIDE=480 python -m benchmarks.load --spawn --output load.json
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.fixtures import FIXTURE_DIR, load_frames
+from benchmarks.report import environment, find_regressions, summarize, write_report
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Errors above this share of requests make a concurrency level unsustainable
+MAX_ERROR_RATE = 0.01
+
+
+class Client(threading.Thread):
+    """One closed-loop client replaying frames over a keep-alive connection."""
+
+    def __init__(self, index: int, url: str, frames: List[bytes], args, deadline: float):
+        super().__init__(daemon=True)
+        self.frames = frames
+        self.args = args
+        self.deadline = deadline
+        self.offset = index
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        params = {"exerciseType": args.exercise}
+        if args.sessions:
+            params["sessionId"] = f"bench-{index}"
+        if args.keypoint_format:
+            params["keypointFormat"] = args.keypoint_format
+        self.path = f"{parts.path.rstrip('/')}/analyze-pose"
+        self.query = urlencode(params)
+        self.session_id = params.get("sessionId")
+        self.latencies: List[float] = []
+        self.statuses: Dict[int, int] = {}
+
+    def request_for(self, frame: bytes) -> Tuple[str, bytes, Dict[str, str]]:
+        if self.args.mode == "json":
+            body = json.dumps({
+                "imageData": "data:image/jpeg;base64," + base64.b64encode(frame).decode(),
+                "exerciseType": self.args.exercise,
+                "sessionId": self.session_id,
+            }).encode()
+            return self.path + "?" + self.query, body, {"Content-Type": "application/json"}
+        return self.path + "?" + self.query, frame, {"Content-Type": "image/jpeg"}
+
+    def run(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        # Encode up front so the client measures the service, not itself
+        requests = [self.request_for(frame) for frame in self.frames]
+        index = self.offset
+        try:
+            while time.perf_counter() < self.deadline:
+                path, body, headers = requests[index % len(requests)]
+                index += 1
+                start = time.perf_counter()
+                try:
+                    connection.request("POST", path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+                    status = 0
+                elapsed = time.perf_counter() - start
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+                if status == 200:
+                    self.latencies.append(elapsed)
+        finally:
+            connection.close()
+
+
+def run_level(url: str, frames: List[bytes], concurrency: int, args) -> Dict:
+    """Run `concurrency` clients for the configured duration"""
+    if args.warmup > 0:
+        warm = [Client(i, url, frames, args, time.perf_counter() + args.warmup)
+                for i in range(concurrency)]
+        for client in warm:
+            client.start()
+        for client in warm:
+            client.join()
+
+    started = time.perf_counter()
+    clients = [Client(i, url, frames, args, started + args.duration) for i in range(concurrency)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for client in clients for latency in client.latencies]
+    statuses: Dict[str, int] = {}
+    for client in clients:
+        for status, count in client.statuses.items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+    total = sum(statuses.values())
+    errors = total - statuses.get("200", 0)
+
+    result = summarize(latencies)
+    result.update({
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": total,
+        "fps": round(len(latencies) / elapsed, 2),
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "statuses": statuses,
+    })
+    return result
+
+
+def is_sustainable(result: Dict, slo_ms: float) -> bool:
+    return (result.get("count", 0) > 0 and result["p95_ms"] <= slo_ms
+            and result["error_rate"] < MAX_ERROR_RATE)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_service(port: int, timeout: float = 60.0) -> subprocess.Popen:
+    """Start uvicorn on `port` with the current environment and wait until it is ready"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=SERVICE_DIR,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Service exited with code {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/ready")
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Service did not start in time")
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test POST /analyze-pose")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Service base URL")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Start a local service for the run instead of using --url")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="Directory of JPEG frames")
+    parser.add_argument("--concurrency", default="1,2,4,8",
+                        help="Comma-separated client counts to run in turn")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds per level")
+    parser.add_argument("--mode", choices=("binary", "json"), default="binary",
+                        help="Send raw JPEG bodies or base64 JSON")
+    parser.add_argument("--exercise", default="squat")
+    parser.add_argument("--sessions", action="store_true",
+                        help="Give each client its own sessionId (tracking mode)")
+    parser.add_argument("--keypoint-format", help="keypointFormat query parameter")
+    parser.add_argument("--slo-ms", type=float, default=250.0,
+                        help="p95 latency a level must meet to count as sustainable")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Fail if p95 regressed against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.fixtures)
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    process = None
+    url = args.url
+    if args.spawn:
+        port = free_port()
+        process = spawn_service(port)
+        url = f"http://127.0.0.1:{port}"
+
+    results: Dict[str, Dict] = {}
+    try:
+        for concurrency in levels:
+            result = run_level(url, frames, concurrency, args)
+            results[f"concurrency_{concurrency}"] = result
+            print(f"concurrency {concurrency:3d}: {result['fps']:8.2f} fps  "
+                  f"p50 {result.get('p50_ms', 0):8.2f} ms  p95 {result.get('p95_ms', 0):8.2f} ms  "
+                  f"p99 {result.get('p99_ms', 0):8.2f} ms  errors {result['error_rate']:.2%}",
+                  file=sys.stderr)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    sustainable = [result for result in results.values() if is_sustainable(result, args.slo_ms)]
+    best = max(sustainable, key=lambda result: result["fps"], default=None)
+    write_report({
+        "suite": "load",
+        "environment": environment(),
+        "config": {
+            "url": None if args.spawn else url,
+            "mode": args.mode,
+            "exercise": args.exercise,
+            "sessions": args.sessions,
+            "keypoint_format": args.keypoint_format,
+            "duration_s": args.duration,
+            "slo_ms": args.slo_ms,
+        },
+        "fixtures": {"directory": args.fixtures, "frames": len(frames)},
+        "max_sustainable_fps": best["fps"] if best else 0.0,
+        "max_sustainable_concurrency": best["concurrency"] if best else None,
+        "results": results,
+    }, args.output)
+
+    if args.baseline:
+        regressions = find_regressions(results, args.baseline, "p95_ms", args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
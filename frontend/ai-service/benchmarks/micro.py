@@ -0,0 +1,165 @@
+"""
+Micro-benchmarks for the per-frame building blocks.
+
+Each benchmark calls its function repeatedly for at least `--min-time`
+seconds, timing every call, and reports the latency distribution.
+
+Usage:
+    python -m benchmarks.micro
+    python -m benchmarks.micro --filter decode --output micro.json
+    python -m benchmarks.micro --baseline micro.json --tolerance 0.15
+"""
+
+import argparse
+import base64
+import itertools
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+import main
+from angles import compute_angles, landmarks_to_array
+from benchmarks.fixtures import FIXTURE_DIR, fake_results, load_frames
+from benchmarks.report import environment, find_regressions, summarize, write_report
+from keypoints import KEYPOINT_FORMATS, encode_keypoints
+from sessions import PoseSession
+
+
+def measure(fn: Callable[[], object], min_time: float, min_calls: int = 20) -> List[float]:
+    """Per-call durations in seconds, after a few warm-up calls"""
+    for _ in range(3):
+        fn()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < min_calls or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# Benchmarks of code the service no longer runs, kept as a "before" baseline
+REFERENCE_BENCHMARKS = {
+    "scalar_angle": "historical reference: the removed per-joint calculate_angle; "
+                    "the service runs compute_angles",
+}
+
+
+def scalar_angle(a, b, c) -> float:
+    """One joint angle from three (x, y) points, as `main.calculate_angle` computed it
+
+    Historical baseline for `compute_angles`; nothing in the service calls it.
+    """
+    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
+    angle = abs(float(np.degrees(radians)))
+    return 360.0 - angle if angle > 180.0 else angle
+
+
+def cycle_call(fn: Callable, inputs: List) -> Callable[[], object]:
+    """Call `fn` with the next input on every invocation"""
+    source = itertools.cycle(inputs)
+    return lambda: fn(next(source))
+
+
+def filter_stream(points: np.ndarray, frames: int = 64) -> Callable[[], object]:
+    """Feed a session's LandmarkFilter one jittered (33, 4) frame per call at 30 FPS"""
+    landmark_filter = main.create_session_state()["landmark_filter"]
+    rng = np.random.default_rng(0)
+    jittered = [points + rng.normal(0.0, 0.005, points.shape).astype(np.float32) for _ in range(frames)]
+    source = itertools.cycle(jittered)
+    clock = itertools.count()
+    work = np.empty_like(points)
+
+    def update():
+        # The filter works in place, so every call starts from a fresh frame
+        np.copyto(work, next(source))
+        return landmark_filter(work, next(clock) / 30.0)
+    return update
+
+
+def build_benchmarks(frames: List[bytes], inference: bool) -> List[Tuple[str, Callable[[], object]]]:
+    data_urls = ["data:image/jpeg;base64," + base64.b64encode(frame).decode() for frame in frames]
+    results = fake_results()
+    points = landmarks_to_array(results.pose_landmarks)
+    stacked = np.repeat(points[None], 256, axis=0)
+    angle_vector = compute_angles(points)
+    lm = results.pose_landmarks.landmark
+
+    benchmarks = [
+        ("decode_image", cycle_call(main.decode_image, data_urls)),
+        ("decode_image_bytes", cycle_call(main.decode_image_bytes, frames)),
+        ("scalar_angle", lambda: scalar_angle(
+            (lm[23].x, lm[23].y), (lm[25].x, lm[25].y), (lm[27].x, lm[27].y))),
+        ("landmarks_to_array", lambda: landmarks_to_array(results.pose_landmarks)),
+        ("compute_angles", lambda: compute_angles(points)),
+        ("compute_angles_x256", lambda: compute_angles(stacked)),
+        ("landmark_filter", filter_stream(points)),
+    ]
+
+    # Exercise analyzers: band lookup alone, then the full per-frame analysis
+    for name, rule in main.EXERCISE_RULES.items():
+        benchmarks.append((f"rule_{name}", lambda rule=rule: rule.evaluate(angle_vector)))
+        benchmarks.append((f"analyze_{name}", lambda name=name: main.analyze_results(results, name)))
+        session = PoseSession(f"bench-{name}", None, **main.create_session_state())
+        benchmarks.append((
+            f"analyze_{name}_session",
+            lambda name=name, session=session: main.analyze_results(results, name, session),
+        ))
+
+    for keypoint_format in KEYPOINT_FORMATS:
+        benchmarks.append((
+            f"encode_keypoints_{keypoint_format}",
+            lambda keypoint_format=keypoint_format: encode_keypoints(points, keypoint_format),
+        ))
+
+    if inference:
+        images = [main.decode_image_bytes(frame) for frame in frames]
+        benchmarks.append(("detect_pose", cycle_call(main.detect_pose, images)))
+    return benchmarks
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the pose pipeline")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="Directory of JPEG frames")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds per benchmark")
+    parser.add_argument("--filter", default="", help="Only run benchmarks containing this text")
+    parser.add_argument("--no-inference", action="store_true", help="Skip the MediaPipe benchmark")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Fail if p50 regressed against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.fixtures)
+    results: Dict[str, Dict] = {}
+    for name, fn in build_benchmarks(frames, not args.no_inference):
+        if args.filter not in name:
+            continue
+        summary = summarize(measure(fn, args.min_time))
+        summary["ops_per_sec"] = round(1000.0 / summary["mean_ms"], 1)
+        note = REFERENCE_BENCHMARKS.get(name)
+        if note:
+            summary["note"] = note
+        results[name] = summary
+        print(f"{name:32s} p50 {summary['p50_ms']:9.4f} ms  p99 {summary['p99_ms']:9.4f} ms"
+              + (f"  ({note})" if note else ""), file=sys.stderr)
+
+    write_report({
+        "suite": "micro",
+        "environment": environment(),
+        "fixtures": {"directory": args.fixtures, "frames": len(frames)},
+        "results": results,
+    }, args.output)
+
+    if args.baseline:
+        regressions = find_regressions(results, args.baseline, "p50_ms", args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
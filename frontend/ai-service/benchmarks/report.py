@@ -0,0 +1,91 @@
+"""
+Shared result handling for the benchmarks: latency summaries, JSON reports
+and regression checks against a saved baseline.
+"""
+
+import json
+import os
+import platform
+import re
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds for samples given in seconds"""
+    if not len(samples):
+        return {"count": 0}
+    ms = np.asarray(samples, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+
+def environment() -> Dict[str, object]:
+    """Versions and settings that affect the numbers, stored with every report"""
+    info: Dict[str, object] = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "settings": service_settings(),
+    }
+    for module in ("cv2", "mediapipe"):
+        try:
+            info[module] = __import__(module).__version__
+        except Exception:
+            info[module] = None
+    return info
+
+
+def service_settings() -> Dict[str, str]:
+    """Service settings (e.g. AI_MAX_FRAME_SIDE) set in this environment"""
+    with open(MAIN_PATH, encoding="utf-8") as f:
+        names = set(re.findall(r'os\.getenv\("([A-Z0-9_]+)"', f.read()))
+    return {name: os.environ[name] for name in sorted(names) if name in os.environ}
+
+
+def write_report(report: Dict, path: Optional[str]):
+    """Print the report and save it as JSON when `path` is given"""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Saved results to {path}")
+    else:
+        print(text)
+
+
+def find_regressions(results: Dict[str, Dict], baseline_path: str,
+                     metric: str, tolerance: float) -> List[str]:
+    """Compare `metric` per result name against a baseline report
+
+    Returns one message per result that is more than `tolerance` (a fraction)
+    slower than the baseline. Results missing from either side are skipped.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name, {}).get(metric)
+        after = result.get(metric)
+        if not before or after is None:
+            continue
+        if after > before * (1.0 + tolerance):
+            regressions.append(
+                f"{name}: {metric} {after:.3f} vs baseline {before:.3f} "
+                f"(+{(after / before - 1.0) * 100:.1f}%)"
+            )
+    return regressions
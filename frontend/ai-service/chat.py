@@ -0,0 +1,215 @@
+"""
+Keyword intent matching for the chat assistant.
+
+Intents are declared in `intents.json` (or the file named by
+`AI_CHAT_INTENTS`): keyword phrases, a response and follow-up suggestions.
+At startup every keyword is folded like user messages (lowercase, no
+Vietnamese diacritics, see `recommender.fold_text`) and compiled into one
+Aho-Corasick automaton, so a message is matched against all intents in a
+single pass over its characters, however many intents and keywords exist.
+Keywords match whole words only: "hi" matches "hi, bạn" but not "hiit".
+
+Matched intents are ranked by the words their keywords cover, times the
+intent's priority; the best ones answer. Responses are cached per folded
+message with LRU eviction, so "Giảm cân?" and "giam can" share an entry.
+
+Config format:
+    {
+      "fallback": "...",                 # answer when nothing matches
+      "intents": [
+        {
+          "id": "weight_loss",
+          "keywords": ["giảm cân", "lose weight"],
+          "priority": 1.0,               # optional score multiplier
+          "response": "...",
+          "suggestions": ["..."]         # optional follow-up questions
+        }
+      ]
+    }
+"""
+
+import json
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple
+
+from recommender import fold_text
+
+# Intents whose responses are combined into one answer
+MAX_ANSWERS = 2
+# Longer messages are matched on their first characters only
+MAX_MESSAGE_CHARS = 2000
+
+
+@dataclass(frozen=True, eq=False)
+class Intent:
+    """A compiled intent definition."""
+    id: str
+    keywords: Tuple[str, ...]
+    priority: float
+    response: str
+    suggestions: Tuple[str, ...]
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting every keyword occurrence in one pass."""
+
+    def __init__(self, keywords: List[str]):
+        # Trie transitions, failure links and the keywords ending at each state
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Tuple[int, ...]] = [()]
+        for index, keyword in enumerate(keywords):
+            state = 0
+            for ch in keyword:
+                next_state = self.goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][ch] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = next_state
+            self.output[state] += (index,)
+
+        # Breadth-first, so a state's failure target is final before its children
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.output[child] += self.output[self.fail[child]]
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self.goto)
+
+    def find(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(end position, keyword index) of every keyword occurrence in `text`"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for position, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in output[state]:
+                yield position, index
+
+
+def compile_intent(spec: dict) -> Intent:
+    """Validate one intent definition and compile it; raises ValueError"""
+    intent_id = spec.get("id")
+    if not intent_id:
+        raise ValueError("Intent: 'id' is required")
+    keywords = tuple(dict.fromkeys(fold_text(keyword) for keyword in spec.get("keywords") or []))
+    if not keywords or not all(keywords):
+        raise ValueError(f"Intent '{intent_id}': keywords must be non-empty words")
+    if not spec.get("response"):
+        raise ValueError(f"Intent '{intent_id}': 'response' is required")
+    priority = float(spec.get("priority", 1.0))
+    if priority <= 0:
+        raise ValueError(f"Intent '{intent_id}': priority must be positive")
+    return Intent(
+        id=str(intent_id),
+        keywords=keywords,
+        priority=priority,
+        response=str(spec["response"]),
+        suggestions=tuple(str(s) for s in spec.get("suggestions") or ()),
+    )
+
+
+class IntentMatcher:
+    """Single-pass multi-intent matching with an LRU response cache."""
+
+    def __init__(self, intents: List[Intent], fallback: str, cache_size: int = 1024):
+        ids = [intent.id for intent in intents]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Intent ids must be unique")
+        self.intents = intents
+        self.fallback = fallback
+
+        # Keywords are padded with spaces, as messages are, so they only match
+        # whole words; one keyword may belong to several intents
+        keyword_index: Dict[str, int] = {}
+        self.keyword_intents: List[List[Tuple[int, float]]] = []
+        for position, intent in enumerate(intents):
+            for keyword in intent.keywords:
+                index = keyword_index.setdefault(f" {keyword} ", len(keyword_index))
+                if index == len(self.keyword_intents):
+                    self.keyword_intents.append([])
+                # Longer phrases are more specific, so they weigh more
+                self.keyword_intents[index].append((position, len(keyword.split()) * intent.priority))
+        self.automaton = KeywordAutomaton(list(keyword_index))
+
+        self.cache_size = max(0, cache_size)
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.intents)
+
+    def match(self, folded: str) -> List[Tuple[Intent, float]]:
+        """Intents matching a folded message with their scores, best first"""
+        scores: Dict[int, float] = {}
+        first_seen: Dict[int, int] = {}
+        seen_keywords = set()
+        for end, index in self.automaton.find(f" {folded} "):
+            # A keyword repeated in the message counts once
+            if index in seen_keywords:
+                continue
+            seen_keywords.add(index)
+            for position, weight in self.keyword_intents[index]:
+                scores[position] = scores.get(position, 0.0) + weight
+                first_seen.setdefault(position, end)
+        # Ties go to the intent mentioned first
+        ranked = sorted(scores, key=lambda position: (-scores[position], first_seen[position]))
+        return [(self.intents[position], scores[position]) for position in ranked]
+
+    def respond(self, message: str) -> dict:
+        """Chat reply for a message: the best intents' responses, or the fallback"""
+        folded = fold_text(message[:MAX_MESSAGE_CHARS])
+        with self._lock:
+            result = self._cache.get(folded)
+            if result is not None:
+                self._cache.move_to_end(folded)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        matches = self.match(folded)
+        answers = [intent for intent, _ in matches[:MAX_ANSWERS]]
+        suggestions = list(dict.fromkeys(s for intent in answers for s in intent.suggestions))
+        result = {
+            "response": "\n\n".join(intent.response for intent in answers) or self.fallback,
+            "intents": [{"id": intent.id, "score": round(score, 3)} for intent, score in matches],
+            "suggestions": suggestions,
+        }
+        if self.cache_size:
+            with self._lock:
+                self._cache[folded] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def cache_stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / total if total else 0.0,
+        }
+
+
+def load_intents(path: str, cache_size: int = 1024) -> IntentMatcher:
+    """Load and compile every intent in a JSON config file"""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    intents = [compile_intent(spec) for spec in config.get("intents", [])]
+    return IntentMatcher(intents, str(config.get("fallback", "")), cache_size)
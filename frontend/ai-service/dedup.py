@@ -0,0 +1,82 @@
+"""
+Skip inference for near-identical session frames.
+
+During holds (plank, the bottom of a squat) or while the user is idle,
+consecutive webcam frames barely change, yet each one would pay for a full
+`pose.process`. Each session remembers a 32x32 grayscale thumbnail of the last
+frame that actually went through the model, together with its results. A new
+frame whose thumbnail differs from it by at most `threshold` gray levels in
+every cell reuses those results; analysis, smoothing and rep counting still
+run on every frame.
+
+Area-averaging into 32x32 cells removes sensor noise and JPEG artifacts,
+while taking the maximum cell difference (rather than the mean) keeps a
+small moving limb from being averaged away. Reuse is bounded by `ttl` seconds
+since the last real inference and by `max_streak` consecutive reuses, so a
+slowly drifting pose can never serve stale landmarks for long.
+
+Usage:
+    cache = FrameCache(threshold=6, ttl=0.5, max_streak=5)
+    signature = frame_signature(image)
+    results = cache.lookup(signature, model_key, now)
+    if results is None:
+        results = pose.process(image)
+        cache.store(signature, model_key, results, now)
+"""
+
+from typing import Any, Hashable, Optional
+
+import numpy as np
+
+from lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+
+SIGNATURE_SIZE = 32
+
+
+def frame_signature(image: np.ndarray) -> np.ndarray:
+    """32x32 grayscale thumbnail of an RGB frame"""
+    small = cv2.resize(image, (SIGNATURE_SIZE, SIGNATURE_SIZE), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+
+
+def signature_distance(a: np.ndarray, b: np.ndarray) -> int:
+    """Largest per-cell gray-level difference between two signatures"""
+    return int(cv2.absdiff(a, b).max())
+
+
+class FrameCache:
+    """Last inferred frame of one session and the results to reuse for it."""
+
+    def __init__(self, threshold: float = 6.0, ttl: float = 0.5, max_streak: int = 5):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_streak = max_streak
+        self._signature: Optional[np.ndarray] = None
+        self._key: Optional[Hashable] = None
+        self._results: Any = None
+        self._stored_at = 0.0
+        self._streak = 0
+
+    def lookup(self, signature: np.ndarray, key: Hashable, now: float) -> Any:
+        """Cached results if `signature` matches the last inferred frame, else None
+
+        `key` identifies what produced the results (e.g. the model tier);
+        results are only reused for the same key.
+        """
+        if (self._signature is None or key != self._key
+                or now - self._stored_at > self.ttl or self._streak >= self.max_streak):
+            return None
+        if signature_distance(signature, self._signature) > self.threshold:
+            return None
+        self._streak += 1
+        return self._results
+
+    def store(self, signature: np.ndarray, key: Hashable, results: Any, now: float):
+        """Remember a freshly inferred frame"""
+        self._signature = signature
+        self._key = key
+        self._results = results
+        self._stored_at = now
+        self._streak = 0
@@ -0,0 +1,126 @@
+"""
+Data-driven exercise rules.
+
+Exercises are declared in `exercises.json` (or the file named by
+`AI_EXERCISE_CONFIG`): the joint angle that drives scoring, the score bands
+with their feedback, and optional rep thresholds. At startup each definition
+is compiled into an `ExerciseRule` holding the precomputed angle index,
+landmark IDs and a sorted threshold array, so scoring a frame is one
+`searchsorted` regardless of how many exercises exist, and adding one is a
+config change rather than another `elif` branch.
+
+Config format:
+    {
+      "squat": {
+        "angle": "left_knee",            # a name from angles.ANGLE_NAMES
+        "legacyAngleKey": "knee",        # optional alias in the response angles
+        "reps": {"down": 100, "up": 160},  # optional rep counter thresholds
+        "bands": [                       # ascending; the last band has no "below"
+          {"below": 70, "score": 10.0, "status": "correct", "feedback": "..."},
+          {"score": 3.0, "status": "error", "feedback": "..."}
+        ]
+      }
+    }
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from angles import ANGLE_INDEX, JOINT_TRIPLETS
+from reps import RepProfile
+
+STATUSES = ("correct", "warning", "error")
+
+
+@dataclass(frozen=True, eq=False)
+class ExerciseRule:
+    """A compiled exercise definition."""
+    name: str
+    angle_name: str
+    angle_index: int
+    legacy_key: Optional[str]
+    # Upper bounds (exclusive) of every band but the last, ascending
+    thresholds: np.ndarray
+    # (score, feedback, status) per band
+    results: Tuple[Tuple[float, str, str], ...]
+    rep_profile: Optional[RepProfile]
+    # Landmarks behind the driving angle on both body sides
+    joint_ids: np.ndarray
+
+    def band(self, angle: float) -> int:
+        """Index of the score band `angle` falls into"""
+        return int(np.searchsorted(self.thresholds, angle, side="right"))
+
+    def evaluate(self, angles: np.ndarray) -> Tuple[float, str, str]:
+        """(score, feedback, status) for one frame's angle vector"""
+        return self.results[self.band(float(angles[self.angle_index]))]
+
+
+def joint_ids_for_angle(angle_name: str) -> np.ndarray:
+    """Landmarks behind an angle on both body sides, e.g. hips/knees/ankles for knees"""
+    if angle_name not in JOINT_TRIPLETS:
+        # Derived angles such as trunk: every landmark the engine uses
+        return np.unique(np.array(list(JOINT_TRIPLETS.values()), dtype=np.intp))
+
+    joint = angle_name.split("_", 1)[-1]
+    ids = set()
+    for side in ("left", "right"):
+        ids.update(int(idx) for idx in JOINT_TRIPLETS.get(f"{side}_{joint}", ()))
+    return np.array(sorted(ids), dtype=np.intp)
+
+
+def compile_rule(name: str, spec: dict) -> ExerciseRule:
+    """Validate one exercise definition and compile it; raises ValueError"""
+    angle_name = spec.get("angle")
+    if angle_name not in ANGLE_INDEX:
+        raise ValueError(f"Exercise '{name}': unknown angle '{angle_name}'")
+
+    bands = spec.get("bands") or []
+    if not bands:
+        raise ValueError(f"Exercise '{name}': at least one band is required")
+
+    thresholds = []
+    results = []
+    for position, band in enumerate(bands):
+        is_last = position == len(bands) - 1
+        if is_last != ("below" not in band):
+            raise ValueError(f"Exercise '{name}': only the last band may omit 'below'")
+        if band.get("status") not in STATUSES:
+            raise ValueError(f"Exercise '{name}': status must be one of {', '.join(STATUSES)}")
+        if not 0 <= float(band["score"]) <= 10:
+            raise ValueError(f"Exercise '{name}': score must be between 0 and 10")
+        if not is_last:
+            thresholds.append(float(band["below"]))
+        results.append((float(band["score"]), str(band["feedback"]), band["status"]))
+
+    if thresholds != sorted(thresholds):
+        raise ValueError(f"Exercise '{name}': band thresholds must be ascending")
+
+    rep_profile = None
+    if spec.get("reps"):
+        reps = spec["reps"]
+        if not float(reps["down"]) < float(reps["up"]):
+            raise ValueError(f"Exercise '{name}': reps 'down' must be below 'up'")
+        rep_profile = RepProfile(angle=angle_name, down_angle=float(reps["down"]),
+                                 up_angle=float(reps["up"]))
+
+    return ExerciseRule(
+        name=name,
+        angle_name=angle_name,
+        angle_index=ANGLE_INDEX[angle_name],
+        legacy_key=spec.get("legacyAngleKey"),
+        thresholds=np.array(thresholds, dtype=np.float32),
+        results=tuple(results),
+        rep_profile=rep_profile,
+        joint_ids=joint_ids_for_angle(angle_name),
+    )
+
+
+def load_exercise_rules(path: str) -> Dict[str, ExerciseRule]:
+    """Load and compile every exercise in a JSON config file"""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return {name.lower(): compile_rule(name, spec) for name, spec in config.items()}
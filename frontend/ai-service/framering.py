@@ -0,0 +1,394 @@
+"""
+Shared-memory frame transport between request ingest and inference processes.
+
+Pickling decoded RGB frames to worker processes copies every pixel twice
+(about 6 MB per 1080p frame), which eats most of what process parallelism
+gains. `FrameRing` instead pre-allocates a fixed number of frame slots in a
+single `multiprocessing.shared_memory` block. The ingest side decodes straight
+into a free slot and sends the worker only a small `FrameRef`; the worker runs
+MediaPipe on a NumPy view of the slot in place and sends back the (33, 4)
+landmark array.
+
+Slots are owned by the ingest process. A slot is taken by `acquire` (inside
+`write`/`write_encoded`) and given back by `RingPosePool` once the worker's
+result for it has arrived, so a worker never reads a slot that is being
+overwritten. When every slot is in use the ring's `overflow` policy applies:
+`"reject"` raises `RingFull` at once, `"block"` waits up to `timeout` seconds
+for a slot and then raises. Memory use is `slots * max_side^2 * 3` bytes no
+matter how many requests arrive.
+
+Process workers only run single-image (static) pose detection: session
+trackers keep temporal state and stay on the in-process threads.
+
+Usage:
+    ring = FrameRing(slots=8, max_side=640, overflow="reject")
+    workers = RingPosePool(ring, processes=2)
+    ref = ring.write_encoded(jpeg_bytes)           # may raise RingFull
+    landmarks = workers.run(ref, model_complexity=1)  # (33, 4) float32 or None
+    ...
+    workers.close()
+    ring.close()
+"""
+
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from angles import landmarks_to_array
+from inference import InferenceOverloaded
+from lazy import lazy_import
+from preprocess import fit_to_max_side, reduced_decode_flag
+
+cv2 = lazy_import("cv2")
+
+logger = logging.getLogger(__name__)
+
+RING_OVERFLOW_POLICIES = ("reject", "block")
+CHANNELS = 3
+# One int64 generation counter per slot precedes the pixel data
+GENERATION_BYTES = 8
+# Seconds between checks for crashed worker processes
+WORKER_CHECK_INTERVAL = 0.5
+
+
+class RingFull(Exception):
+    """Raised when no frame slot is free."""
+
+
+@dataclass(frozen=True)
+class FrameRef:
+    """A frame written to a ring slot; this is all that crosses the process boundary."""
+    slot: int
+    generation: int
+    height: int
+    width: int
+
+
+def _slot_view(buffer: memoryview, slots: int, max_side: int, ref: FrameRef) -> np.ndarray:
+    """(height, width, 3) uint8 view of a slot's pixels"""
+    slot_bytes = max_side * max_side * CHANNELS
+    offset = slots * GENERATION_BYTES + ref.slot * slot_bytes
+    return np.ndarray((ref.height, ref.width, CHANNELS), dtype=np.uint8,
+                      buffer=buffer, offset=offset)
+
+
+class FrameRing:
+    """Fixed ring of shared-memory frame slots, owned by the ingest process."""
+
+    def __init__(self, slots: int = 8, max_side: int = 640,
+                 overflow: str = "reject", timeout: float = 0.1):
+        if overflow not in RING_OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow}', expected one of {', '.join(RING_OVERFLOW_POLICIES)}"
+            )
+        if max_side <= 0:
+            raise ValueError("A frame ring needs a positive max_side")
+        self.slots = max(1, slots)
+        self.max_side = max_side
+        self.overflow = overflow
+        self.timeout = timeout
+        size = self.slots * (GENERATION_BYTES + max_side * max_side * CHANNELS)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._generations = np.ndarray((self.slots,), dtype=np.int64, buffer=self._shm.buf)
+        self._generations[:] = 0
+        self._free: Deque[int] = deque(range(self.slots))
+        self._cond = threading.Condition()
+        # Frames refused because every slot was in use
+        self.overflows = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def nbytes(self) -> int:
+        return self._shm.size
+
+    @property
+    def in_use(self) -> int:
+        return self.slots - len(self._free)
+
+    def spec(self) -> Dict[str, Any]:
+        """Picklable arguments for `RingReader` in another process"""
+        return {"name": self.name, "slots": self.slots, "max_side": self.max_side}
+
+    def acquire(self) -> int:
+        """Take a free slot, applying the overflow policy. Raises RingFull"""
+        with self._cond:
+            if not self._free and self.overflow == "block":
+                self._cond.wait_for(lambda: self._free, self.timeout)
+            if not self._free:
+                self.overflows += 1
+                raise RingFull(f"All {self.slots} frame slots are in use")
+            slot = self._free.popleft()
+            self._generations[slot] += 1
+            return slot
+
+    def release(self, ref: FrameRef):
+        """Give a slot back once nobody reads it any more"""
+        with self._cond:
+            if self._generations[ref.slot] != ref.generation or ref.slot in self._free:
+                raise ValueError(f"Frame slot {ref.slot} released twice")
+            self._free.append(ref.slot)
+            self._cond.notify()
+
+    def view(self, ref: FrameRef) -> np.ndarray:
+        return _slot_view(self._shm.buf, self.slots, self.max_side, ref)
+
+    def write(self, image: np.ndarray) -> FrameRef:
+        """Copy an RGB frame into a free slot, downscaling it to fit"""
+        image = fit_to_max_side(image, self.max_side)
+        ref = self._reserve(image.shape[0], image.shape[1])
+        try:
+            np.copyto(self.view(ref), image)
+        except Exception:
+            self.release(ref)
+            raise
+        return ref
+
+    def write_encoded(self, data: bytes) -> FrameRef:
+        """Decode JPEG/PNG/WebP bytes into a free slot as RGB. Raises ValueError, RingFull
+
+        The final color conversion writes straight into shared memory, so the
+        decoded frame is never copied again.
+        """
+        nparr = np.frombuffer(data, np.uint8)
+        image = cv2.imdecode(nparr, reduced_decode_flag(nparr, self.max_side))
+        if image is None:
+            raise ValueError("Could not decode image bytes")
+        image = fit_to_max_side(image, self.max_side)
+        ref = self._reserve(image.shape[0], image.shape[1])
+        try:
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self.view(ref))
+        except Exception:
+            self.release(ref)
+            raise
+        return ref
+
+    def _reserve(self, height: int, width: int) -> FrameRef:
+        slot = self.acquire()
+        return FrameRef(slot, int(self._generations[slot]), height, width)
+
+    def close(self):
+        """Free the shared memory; workers must have detached or exited"""
+        self._generations = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+class RingReader:
+    """Worker-side, read-only access to a `FrameRing`."""
+
+    def __init__(self, name: str, slots: int, max_side: int):
+        self.slots = slots
+        self.max_side = max_side
+        self._shm = _attach(name)
+        self._generations = np.ndarray((slots,), dtype=np.int64, buffer=self._shm.buf)
+
+    def view(self, ref: FrameRef) -> np.ndarray:
+        """The frame in place. Raises ValueError if the slot was reused"""
+        if self._generations[ref.slot] != ref.generation:
+            raise ValueError(f"Frame slot {ref.slot} was reused before it was read")
+        return _slot_view(self._shm.buf, self.slots, self.max_side, ref)
+
+    def close(self):
+        self._generations = None
+        self._shm.close()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to a ring created by the parent; only the parent unlinks it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers attached blocks. Spawned workers share
+        # the parent's resource tracker, where the block is already registered
+        return shared_memory.SharedMemory(name=name)
+
+
+def _pose_worker(spec: Dict[str, Any], requests: Any, results: Any, pose_options: Dict[str, Any]):
+    """Worker process: read frames in place and answer with landmark arrays only"""
+    import mediapipe as mp
+
+    reader = RingReader(**spec)
+    poses: Dict[int, Any] = {}
+    try:
+        while True:
+            message = requests.get()
+            if message is None:
+                return
+            job_id, ref, model_complexity = message
+            try:
+                pose = poses.get(model_complexity)
+                if pose is None:
+                    pose = poses[model_complexity] = mp.solutions.pose.Pose(
+                        static_image_mode=True, model_complexity=model_complexity, **pose_options
+                    )
+                output = pose.process(reader.view(ref))
+                landmarks = (landmarks_to_array(output.pose_landmarks)
+                             if output.pose_landmarks else None)
+                results.put((job_id, landmarks, None))
+            except Exception as e:
+                results.put((job_id, None, f"{type(e).__name__}: {e}"))
+    finally:
+        for pose in poses.values():
+            pose.close()
+        reader.close()
+
+
+class RingPosePool:
+    """Pose worker processes fed from a `FrameRing`.
+
+    Each process has its own request queue, so the pool knows which frames a
+    worker holds: if it dies, their callers get an error, their slots are
+    released and the worker is restarted.
+    """
+
+    def __init__(self, ring: FrameRing, processes: int = 2,
+                 pose_options: Optional[Dict[str, Any]] = None, timeout: float = 10.0):
+        self.ring = ring
+        self.timeout = timeout
+        self.pose_options = pose_options or {}
+        # Spawned, not forked: the parent runs threads and MediaPipe graphs
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._workers: List[Tuple[Any, Any]] = []
+        # job id -> (worker index, frame, caller's future)
+        self._pending: Dict[int, Tuple[int, FrameRef, Future]] = {}
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(max(1, processes)):
+            self._workers.append(self._start_worker())
+        self._reader = threading.Thread(target=self._read_results, name="ring-results", daemon=True)
+        self._reader.start()
+
+    def _start_worker(self) -> Tuple[Any, Any]:
+        requests = self._context.Queue()
+        process = self._context.Process(
+            target=_pose_worker,
+            args=(self.ring.spec(), requests, self._results, self.pose_options),
+            daemon=True,
+        )
+        process.start()
+        return process, requests
+
+    @property
+    def processes(self) -> int:
+        return len(self._workers)
+
+    def submit(self, ref: FrameRef, model_complexity: int = 1) -> Future:
+        """Hand a written frame to the least busy worker; the pool releases its slot"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                self.ring.release(ref)
+                raise RuntimeError("Pose worker pool is closed")
+            load = [0] * len(self._workers)
+            for worker, _, _ in self._pending.values():
+                load[worker] += 1
+            worker = load.index(min(load))
+            job_id = next(self._job_ids)
+            self._pending[job_id] = (worker, ref, future)
+            self._workers[worker][1].put((job_id, ref, model_complexity))
+        return future
+
+    def run(self, ref: FrameRef, model_complexity: int = 1) -> Optional[np.ndarray]:
+        """Landmarks for a written frame, or None without a pose. Blocks
+
+        Raises InferenceOverloaded when the workers don't answer within
+        `timeout`; the slot is released once the late result arrives.
+        """
+        try:
+            return self.submit(ref, model_complexity).result(self.timeout)
+        except FutureTimeoutError:
+            raise InferenceOverloaded(f"Pose workers did not answer within {self.timeout:g}s")
+
+    def warm(self, model_complexities: List[int]):
+        """Run one blank frame through every worker at each complexity
+
+        Returns the complexities whose model failed to load.
+        """
+        failed = []
+        blank = np.zeros((256, 256, CHANNELS), dtype=np.uint8)
+        for model_complexity in model_complexities:
+            for worker in range(len(self._workers)):
+                ref = self.ring.write(blank)
+                future: Future = Future()
+                with self._lock:
+                    job_id = next(self._job_ids)
+                    self._pending[job_id] = (worker, ref, future)
+                    self._workers[worker][1].put((job_id, ref, model_complexity))
+                try:
+                    future.result(max(self.timeout, 60.0))
+                except Exception as e:
+                    logger.warning(f"Pose worker {worker} cannot load complexity {model_complexity}: {str(e)}")
+                    failed.append(model_complexity)
+                    break
+        return failed
+
+    def _read_results(self):
+        checked = time.monotonic()
+        while True:
+            if time.monotonic() - checked >= WORKER_CHECK_INTERVAL:
+                checked = time.monotonic()
+                self._restart_dead_workers()
+            try:
+                job_id, landmarks, error = self._results.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                if self._closed:
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                entry = self._pending.pop(job_id, None)
+            if entry is None:
+                continue
+            _, ref, future = entry
+            self.ring.release(ref)
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(landmarks)
+
+    def _restart_dead_workers(self):
+        with self._lock:
+            for index, (process, _) in enumerate(self._workers):
+                if process.is_alive() or self._closed:
+                    continue
+                logger.warning(f"Pose worker {index} exited with code {process.exitcode}, restarting")
+                lost = [job_id for job_id, (worker, _, _) in self._pending.items() if worker == index]
+                for job_id in lost:
+                    _, ref, future = self._pending.pop(job_id)
+                    self.ring.release(ref)
+                    future.set_exception(RuntimeError("Pose worker exited"))
+                self._workers[index] = self._start_worker()
+
+    def close(self):
+        """Stop the workers; pending frames fail and their slots are released"""
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for _, requests in workers:
+            requests.put(None)
+        for process, _ in workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._reader.join(timeout=2)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for _, ref, future in pending.values():
+            self.ring.release(ref)
+            future.set_exception(RuntimeError("Pose worker pool is closed"))
@@ -0,0 +1,111 @@
+"""
+Bounded worker pool for CPU-bound pose inference.
+
+Image decoding and MediaPipe graph execution are synchronous and would block
+the event loop if called from an `async def` endpoint. Both release the GIL
+while they run native code, so a thread pool scales with cores inside a single
+service process while session trackers stay shareable between workers.
+
+The pool admits at most `max_workers + max_queue` frames at a time. A job
+covering several frames (a micro-batch) is charged its `weight`, so batching
+can't stretch the bound. Anything beyond it is rejected immediately with
+`InferenceOverloaded` so callers can answer with a fast 503 instead of
+letting requests pile up.
+
+Usage:
+    pool = InferencePool(max_workers=4, max_queue=16)
+    result = await pool.run(process_frame, image)
+    results = await pool.run(process_frames, images, weight=len(images))
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class InferenceOverloaded(Exception):
+    """Raised when the inference queue is full."""
+
+
+class InferencePool:
+    """Thread pool with a bounded admission queue."""
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: int = 32):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="pose-worker"
+        )
+        # Frames admitted, frames whose job hasn't started, and jobs admitted
+        self._pending = 0
+        self._queued = 0
+        self._jobs = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        """Frames that can still be admitted."""
+        return max(0, self.max_workers + self.max_queue - self._pending)
+
+    @property
+    def in_flight(self) -> int:
+        """Frames admitted and not yet finished (running or queued)."""
+        return self._pending
+
+    @property
+    def jobs_in_flight(self) -> int:
+        """Jobs admitted and not yet finished; below `max_workers` a worker is idle."""
+        return self._jobs
+
+    @property
+    def queue_depth(self) -> int:
+        """Frames waiting for a free worker."""
+        return self._queued
+
+    def submit(self, fn: Callable[..., Any], *args: Any, weight: int = 1) -> "asyncio.Future":
+        """Admit `fn(*args)` as `weight` frames, or raise if they don't fit.
+
+        Admission happens before this returns, so callers on the event loop
+        can admit several jobs without another caller slipping in between.
+        """
+        weight = max(1, weight)
+        with self._lock:
+            if self._pending + weight > self.max_workers + self.max_queue:
+                raise InferenceOverloaded(
+                    f"Inference queue full ({self.max_queue} waiting)"
+                )
+            self._pending += weight
+            self._queued += weight
+            self._jobs += 1
+
+        started = False
+
+        def job():
+            nonlocal started
+            with self._lock:
+                started = True
+                self._queued -= weight
+            return fn(*args)
+
+        def release(_future):
+            # Release the frames when the job really finishes, even if the
+            # caller stops waiting (e.g. a disconnected client)
+            with self._lock:
+                self._pending -= weight
+                self._jobs -= 1
+                if not started:
+                    self._queued -= weight
+
+        future = self._executor.submit(job)
+        future.add_done_callback(release)
+        return asyncio.wrap_future(future)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, weight: int = 1) -> Any:
+        """Run `fn(*args)` on a worker thread, or raise if the queue is full."""
+        return await self.submit(fn, *args, weight=weight)
+
+    def shutdown(self):
+        """Wait for running jobs and stop the workers."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
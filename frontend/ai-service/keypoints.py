@@ -0,0 +1,75 @@
+"""
+Keypoint payload encodings for pose responses.
+
+The default response lists 33 keypoints as objects with repeated "id", "x",
+"y", "z" and "visibility" keys, which dominates payload size and
+serialization time at high frame rates. Clients can opt into a compact
+encoding of the same (N, 4) `x, y, z, visibility` rows:
+
+- `objects` (default): `[{"id": 0, "x": ..., "y": ..., "z": ..., "visibility": ...}, ...]`
+- `flat`: one flat list of floats, 4 per keypoint
+- `int16`: one flat list of ints, each value multiplied by `keypointScale`
+- `float32`: base64 of the little-endian float32 array, 4 per keypoint
+
+With `joints=exercise` only the landmarks the exercise analyzer uses are
+returned, in the order given by `keypointIds`.
+"""
+
+import base64
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+import numpy as np
+
+KEYPOINT_FORMATS = ("objects", "flat", "int16", "float32")
+KEYPOINT_JOINTS = ("all", "exercise")
+
+# int16 encoding resolution: 1e-4 of the frame, range +/-3.27
+INT16_SCALE = 10000.0
+
+
+@dataclass(frozen=True)
+class KeypointEncoding:
+    """How keypoints are laid out in the response."""
+    format: str = "objects"
+    exercise_joints: bool = False
+
+
+DEFAULT_ENCODING = KeypointEncoding()
+
+
+def parse_keypoint_encoding(format: Optional[str], joints: Optional[str]) -> KeypointEncoding:
+    """Validate negotiated format/joint options; raises ValueError if unknown"""
+    format = (format or "objects").lower()
+    joints = (joints or "all").lower()
+    if format not in KEYPOINT_FORMATS:
+        raise ValueError(f"Unknown keypoint format '{format}', expected one of {', '.join(KEYPOINT_FORMATS)}")
+    if joints not in KEYPOINT_JOINTS:
+        raise ValueError(f"Unknown keypoint joints '{joints}', expected one of {', '.join(KEYPOINT_JOINTS)}")
+    if format == "objects" and joints == "all":
+        return DEFAULT_ENCODING
+    return KeypointEncoding(format, joints == "exercise")
+
+
+def encode_keypoints(points: np.ndarray, format: str,
+                     ids: Optional[np.ndarray] = None) -> Union[List[dict], List[float], List[int], str]:
+    """Encode (33, 4) landmark rows, optionally restricted to `ids`"""
+    if ids is not None:
+        points = points[ids]
+        id_list = ids.tolist()
+    else:
+        id_list = range(len(points))
+
+    if format == "objects":
+        return [
+            {"id": idx, "x": x, "y": y, "z": z, "visibility": visibility}
+            for idx, (x, y, z, visibility) in zip(id_list, points.tolist())
+        ]
+    if format == "flat":
+        return points.ravel().tolist()
+    if format == "int16":
+        scaled = np.clip(np.rint(points * INT16_SCALE), -32768, 32767)
+        return scaled.astype(np.int16).ravel().tolist()
+    if format == "float32":
+        return base64.b64encode(points.astype("<f4").tobytes()).decode("ascii")
+    raise ValueError(f"Unknown keypoint format '{format}'")
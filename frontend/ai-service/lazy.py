@@ -0,0 +1,32 @@
+"""
+Deferred imports for heavy native modules.
+
+`cv2` and `mediapipe` take around a second to import, most of it MediaPipe.
+Endpoints that never touch vision (recommendations, plans, chat) should not
+wait for that on every worker start, so vision modules bind them through
+`lazy_import`: the name is bound immediately and the real import runs on
+first attribute access, normally inside the background model warm-up.
+
+Usage:
+    cv2 = lazy_import("cv2")
+    cv2.imdecode(buffer, flags)  # imports OpenCV on first use
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Module `name`, imported on first attribute access"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
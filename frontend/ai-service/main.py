@@ -1,17 +1,92 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+import asyncio
 import base64
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
 import numpy as np
-import cv2
-import mediapipe as mp
-from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Union
 import logging
+from angles import angles_to_dict, compute_angles, landmarks_to_array
+from batching import MicroBatcher
+from chat import load_intents
+from dedup import FrameCache, frame_signature
+from exercises import ExerciseRule, load_exercise_rules
+from framering import FrameRing, RingFull, RingPosePool
+from inference import InferenceOverloaded, InferencePool
+from metrics import RateMeter, Registry
+from lazy import lazy_import
+from keypoints import (
+    DEFAULT_ENCODING, INT16_SCALE, KeypointEncoding, encode_keypoints, parse_keypoint_encoding
+)
+from preprocess import (
+    crop_to_roi, fit_to_max_side, landmark_roi, reduced_decode_flag, remap_landmarks, roi_contains
+)
+from recommender import RecommendationEngine, fetch_catalog, load_catalog_file
+from reps import RepCounter
+from sessions import PoseSession, PoseSessionPool
+from smoothing import LandmarkFilter, ScoreHysteresis
+from starlette.background import BackgroundTask
+from tiers import MODEL_TIERS, PosePool, TieredPose, TierController, parse_model_tier
+from video import iter_video_frames, map_ordered
+
+# Imported on first use (the background warm-up) so lightweight endpoints
+# answer as soon as the worker starts
+cv2 = lazy_import("cv2")
+mp = lazy_import("mediapipe")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifespan context manager for startup and shutdown events.
+    """
+    # Startup: build and warm the Pose pools in the background; /ready
+    # reports when frames can be analyzed
+    warmup = asyncio.create_task(asyncio.to_thread(warm_pose_pools))
+    # Replace the seed exercise catalog with the backend's, if configured
+    catalog_refresh = asyncio.create_task(refresh_catalog_periodically()) if CATALOG_URL else None
+    # Free idle session trackers even when no new requests arrive
+    session_eviction = (asyncio.create_task(evict_idle_sessions_periodically())
+                        if SESSION_EVICT_INTERVAL > 0 else None)
+    
+    yield
+    
+    # Shutdown: let a running warm-up finish (its thread can't be cancelled),
+    # stop inference workers, then release pose trackers
+    await warmup
+    for task in (catalog_refresh, session_eviction):
+        if task is None:
+            continue
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    inference_pool.shutdown()
+    stop_process_inference()
+    video_executor.shutdown(wait=True, cancel_futures=True)
+    pose_sessions.close()
+    for pool in (*static_pose_pools.values(), *tracking_pose_pools.values()):
+        pool.close()
+
+
 app = FastAPI(
     title="Smart Coaching AI Service",
     description="""
@@ -40,6 +115,7 @@ app = FastAPI(
     license_info={
         "name": "MIT License",
     },
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -51,27 +127,274 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize MediaPipe
-mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
-pose = mp_pose.Pose(
-    static_image_mode=False,
-    model_complexity=1,
-    smooth_landmarks=True,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
+def create_pose(static_image_mode: bool = False, model_complexity: int = 1):
+    """Create a MediaPipe Pose graph with the service's detection settings"""
+    return mp.solutions.pose.Pose(
+        static_image_mode=static_image_mode,
+        model_complexity=model_complexity,
+        smooth_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+# Near-identical session frames reuse the last inference; threshold 0 disables
+DEDUP_THRESHOLD = float(os.getenv("AI_DEDUP_THRESHOLD", "6"))
+
+
+def create_session_state() -> dict:
+    """Per-session landmark filter, score hysteresis and frame cache"""
+    return {
+        "landmark_filter": LandmarkFilter(
+            min_cutoff=float(os.getenv("AI_SMOOTHING_MIN_CUTOFF", "1.5")),
+            beta=float(os.getenv("AI_SMOOTHING_BETA", "10")),
+            min_visibility=float(os.getenv("AI_MIN_VISIBILITY", "0.5")),
+        ),
+        "score_hysteresis": ScoreHysteresis(
+            margin=float(os.getenv("AI_SCORE_HYSTERESIS", "5")),
+        ),
+        "frame_cache": FrameCache(
+            threshold=DEDUP_THRESHOLD,
+            ttl=float(os.getenv("AI_DEDUP_TTL", "0.5")),
+            max_streak=int(os.getenv("AI_DEDUP_MAX_STREAK", "5")),
+        ) if DEDUP_THRESHOLD > 0 else None,
+    }
+
+
+# Offline video jobs get their own workers so long uploads can't starve live streams
+VIDEO_WORKERS = int(os.getenv("AI_VIDEO_WORKERS", "0")) or os.cpu_count() or 1
+video_executor = ThreadPoolExecutor(max_workers=VIDEO_WORKERS, thread_name_prefix="video-worker")
+
+# Threads running decode and inference (see `inference_pool`)
+INFERENCE_WORKERS = int(os.getenv("AI_INFERENCE_WORKERS", "0")) or os.cpu_count() or 1
+
+# Model complexity tiers (0 lite, 1 full, 2 heavy) served by this instance.
+# By default the default tier and the lighter ones load shedding steps down
+# to; heavier tiers are only downloaded and warmed when listed explicitly
+DEFAULT_MODEL_TIER = parse_model_tier(os.getenv("AI_DEFAULT_MODEL_TIER", "1"))
+ENABLED_MODEL_TIERS = [
+    parse_model_tier(tier)
+    for tier in os.getenv(
+        "AI_MODEL_TIERS", ",".join(str(tier) for tier in MODEL_TIERS if tier <= DEFAULT_MODEL_TIER)
+    ).split(",")
+    if tier.strip()
+]
+tier_controller = TierController(
+    enabled=ENABLED_MODEL_TIERS,
+    default_tier=DEFAULT_MODEL_TIER,
+    degrade_ms=float(os.getenv("AI_TIER_DEGRADE_MS", "150")),
+    recover_ms=float(os.getenv("AI_TIER_RECOVER_MS", "30")),
+    cooldown=float(os.getenv("AI_TIER_COOLDOWN", "10")),
+)
+# Instances warmed per tier at startup, one per inference worker so that
+# concurrent frames never build a graph, and idle ones kept for reuse
+POSE_POOL_WARM = int(os.getenv("AI_POSE_POOL_WARM", "0")) or INFERENCE_WORKERS
+POSE_POOL_SIZE = max(int(os.getenv("AI_POSE_POOL_SIZE", "8")), POSE_POOL_WARM)
+# Requests without a session are independent images: each frame borrows a
+# static-image Pose, so no worker ever sees another request's state
+static_pose_pools = {
+    tier: PosePool(lambda tier=tier: create_pose(True, tier), max_idle=POSE_POOL_SIZE)
+    for tier in MODEL_TIERS
+}
+# Sessions hold a tracking Pose of their current tier; reset before reuse
+tracking_pose_pools = {
+    tier: PosePool(lambda tier=tier: create_pose(False, tier), max_idle=POSE_POOL_SIZE, reset=True)
+    for tier in MODEL_TIERS
+}
+
+
+# Set once warm_pose_pools has run a frame through every enabled tier
+pose_ready = threading.Event()
+warmup_seconds: Optional[float] = None
+
+
+def warm_pose_pools():
+    """Pre-build each enabled tier's Pose instances; disable tiers that fail to load
+    
+    Runs one dummy frame through every instance, so no user frame pays for
+    importing MediaPipe or initializing a graph.
+    """
+    global warmup_seconds
+    started = time.perf_counter()
+    for tier in ENABLED_MODEL_TIERS:
+        try:
+            static_pose_pools[tier].warm(POSE_POOL_WARM)
+            tracking_pose_pools[tier].warm(POSE_POOL_WARM)
+        except Exception as e:
+            logger.warning(f"Model tier {tier} unavailable: {str(e)}")
+            tier_controller.disable(tier)
+    if INFERENCE_PROCESSES > 0:
+        start_process_inference()
+    warmup_seconds = time.perf_counter() - started
+    if tier_controller.enabled:
+        pose_ready.set()
+        logger.info(f"Pose models warm in {warmup_seconds:.1f}s (tiers {tier_controller.enabled})")
+    else:
+        logger.error("No pose model tier could be loaded; pose analysis is unavailable")
+
+
+def start_process_inference():
+    """Create the frame ring and pose worker processes, warming every enabled tier"""
+    global frame_ring, ring_pose_pool
+    if MAX_FRAME_SIDE <= 0:
+        logger.warning("AI_INFERENCE_PROCESSES needs AI_MAX_FRAME_SIDE > 0 to size the frame ring")
+        return
+    ring = FrameRing(
+        slots=FRAME_RING_SLOTS,
+        max_side=MAX_FRAME_SIDE,
+        overflow=FRAME_RING_OVERFLOW,
+        timeout=FRAME_RING_TIMEOUT_MS / 1000.0,
+    )
+    workers = RingPosePool(
+        ring,
+        processes=INFERENCE_PROCESSES,
+        pose_options={"min_detection_confidence": 0.5, "min_tracking_confidence": 0.5},
+    )
+    for tier in workers.warm(tier_controller.enabled):
+        tier_controller.disable(tier)
+    frame_ring, ring_pose_pool = ring, workers
+    logger.info(f"{INFERENCE_PROCESSES} pose worker processes, frame ring "
+                f"{ring.slots} x {MAX_FRAME_SIDE}px ({ring.nbytes / 2**20:.1f} MiB)")
+
+
+def stop_process_inference():
+    global frame_ring, ring_pose_pool
+    if ring_pose_pool is not None:
+        ring_pose_pool.close()
+        frame_ring.close()
+        frame_ring, ring_pose_pool = None, None
+
+
+def require_pose_ready():
+    """Refuse frames until the warm-up has finished. Raises HTTPException"""
+    if not pose_ready.is_set():
+        REJECTED_FRAMES_TOTAL.inc("warming_up")
+        raise HTTPException(status_code=503, detail="Pose model is warming up",
+                            headers={"Retry-After": "2"})
+
+
+# One tracking Pose per client session so streams don't share temporal state
+pose_sessions = PoseSessionPool(
+    lambda: TieredPose(tracking_pose_pools),
+    state_factory=create_session_state,
+    max_sessions=int(os.getenv("POSE_MAX_SESSIONS", "256")),
+    idle_timeout=float(os.getenv("POSE_SESSION_IDLE_TIMEOUT", "300")),
+)
+# Seconds between sweeps closing idle sessions while no new ones arrive
+SESSION_EVICT_INTERVAL = float(os.getenv("POSE_SESSION_EVICT_INTERVAL", "30"))
+
+
+async def evict_idle_sessions_periodically():
+    """Close idle session trackers every POSE_SESSION_EVICT_INTERVAL seconds
+
+    `get` only evicts when a session is looked up, so without this sweep the
+    trackers of a past burst would hold their Pose graphs until the next request.
+    """
+    while True:
+        await asyncio.sleep(SESSION_EVICT_INTERVAL)
+        evicted = await asyncio.to_thread(pose_sessions.evict_idle)
+        if evicted:
+            logger.info(f"Closed {evicted} idle pose sessions")
+
+# Frames are decoded no larger than this on their longer side (0 = full size)
+MAX_FRAME_SIDE = int(os.getenv("AI_MAX_FRAME_SIDE", "640"))
+# Crop session frames around the previous frame's landmarks before inference
+ROI_CROP_ENABLED = os.getenv("AI_ROI_CROP", "0").lower() in ("1", "true", "yes")
+
+# Decode and inference run here instead of on the event loop
+inference_pool = InferencePool(
+    max_workers=INFERENCE_WORKERS,
+    max_queue=int(os.getenv("AI_INFERENCE_QUEUE_SIZE", "32")),
+)
+
+# Sessionless frames can run in worker processes instead of threads; frames
+# reach them through a fixed shared-memory ring rather than being pickled
+INFERENCE_PROCESSES = int(os.getenv("AI_INFERENCE_PROCESSES", "0"))
+# Slots held by frames being decoded or inferred; default one per inference worker
+FRAME_RING_SLOTS = int(os.getenv("AI_FRAME_RING_SLOTS", "0")) or inference_pool.max_workers
+# reject: 503 at once when every slot is busy; block: wait AI_FRAME_RING_TIMEOUT_MS first
+FRAME_RING_OVERFLOW = os.getenv("AI_FRAME_RING_OVERFLOW", "reject")
+FRAME_RING_TIMEOUT_MS = float(os.getenv("AI_FRAME_RING_TIMEOUT_MS", "100"))
+# Created by the warm-up when AI_INFERENCE_PROCESSES > 0
+frame_ring: Optional[FrameRing] = None
+ring_pose_pool: Optional[RingPosePool] = None
+
+# Metrics served on /metrics; recording is cheap enough to run on every frame
+metrics = Registry()
+STAGE_SECONDS = metrics.histogram(
+    "ai_stage_duration_seconds",
+    "Time per pipeline stage: queue, base64, imdecode, resize, color, dedup, inference, analysis, serialize",
+    ("stage",),
+)
+FRAME_SECONDS = metrics.histogram(
+    "ai_frame_duration_seconds", "End-to-end time per analyzed frame", ("transport",)
+)
+FRAMES_TOTAL = metrics.counter(
+    "ai_frames_total", "Analyzed frames by exercise and whether a pose was found", ("exercise", "result")
+)
+REJECTED_FRAMES_TOTAL = metrics.counter(
+    "ai_rejected_frames_total", "Frames not analyzed: overloaded, warming_up, invalid_image, dropped_stale or error", ("reason",)
+)
+FRAME_CACHE_TOTAL = metrics.counter(
+    "ai_frame_cache_total", "Session frames checked against the last inferred frame", ("result",)
+)
+# FPS, no-pose and frame cache hit ratios over a recent window, for dashboards without PromQL
+METRICS_WINDOW = int(os.getenv("AI_METRICS_WINDOW", "10"))
+frame_rate = RateMeter(METRICS_WINDOW)
+no_pose_rate = RateMeter(METRICS_WINDOW)
+cache_lookup_rate = RateMeter(METRICS_WINDOW)
+cache_hit_rate = RateMeter(METRICS_WINDOW)
+metrics.gauge("ai_inference_in_flight", "Frames admitted to the inference pool", lambda: inference_pool.in_flight)
+metrics.gauge("ai_inference_queue_depth", "Frames waiting for an inference worker", lambda: inference_pool.queue_depth)
+metrics.gauge(
+    "ai_frame_ring_slots_in_use", "Shared-memory frame slots held by in-flight frames",
+    lambda: frame_ring.in_use if frame_ring is not None else 0,
+)
+metrics.gauge(
+    "ai_frame_ring_overflows", "Frames refused because every frame ring slot was busy",
+    lambda: frame_ring.overflows if frame_ring is not None else 0,
+)
+metrics.gauge(
+    "ai_catalog_exercises",
+    "Exercises in the recommendation catalog",
+    lambda: len(recommendation_engine) if recommendation_engine else 0,
+)
+metrics.gauge(
+    "ai_recommendation_cache_hit_ratio", "Share of recommendation and plan requests served from the cache",
+    lambda: recommendation_engine.cache_stats()["hitRate"] if recommendation_engine else 0.0,
+)
+metrics.gauge(
+    "ai_chat_cache_hit_ratio", "Share of chat messages answered from the response cache",
+    lambda: chat_matcher.cache_stats()["hitRate"],
+)
+metrics.gauge("ai_pose_sessions", "Session pose trackers in memory", lambda: len(pose_sessions))
+metrics.gauge("ai_pose_ready", "1 once pose models are warm", lambda: int(pose_ready.is_set()))
+metrics.gauge("ai_model_tier_ceiling", "Highest model tier currently served", lambda: tier_controller.ceiling)
+metrics.gauge("ai_frames_per_second", "Analyzed frames per second over the metrics window", frame_rate.rate)
+metrics.gauge(
+    "ai_no_pose_ratio",
+    "Share of analyzed frames without a detected pose over the metrics window",
+    lambda: no_pose_rate.total() / max(1, frame_rate.total()),
+)
+metrics.gauge(
+    "ai_frame_cache_hit_ratio",
+    "Share of session frames that reused the previous inference over the metrics window",
+    lambda: cache_hit_rate.total() / max(1, cache_lookup_rate.total()),
 )
 
 
 class PoseDetectionRequest(BaseModel):
     imageData: str = Field(..., description="Base64 encoded image data")
     exerciseType: str = Field(..., description="Type of exercise (squat, pushup, plank, etc.)", example="squat")
+    sessionId: Optional[str] = Field(None, description="Client stream ID; frames sharing it reuse pose tracking state")
+    modelTier: Optional[int] = Field(None, ge=0, le=2, description="Model complexity 0 (fast) to 2 (accurate); remembered per session")
 
     class Config:
         json_schema_extra = {
             "example": {
                 "imageData": "data:image/jpeg;base64,/9j/4AAQSkZJRg...",
-                "exerciseType": "squat"
+                "exerciseType": "squat",
+                "sessionId": "3f2b9c1e-webcam"
             }
         }
 
@@ -81,9 +404,16 @@ class PoseDetectionResponse(BaseModel):
     score: float = Field(..., description="Form score from 0-10", ge=0, le=10)
     feedback: str = Field(..., description="Feedback message in Vietnamese")
     status: str = Field(..., description="Status indicator (correct/warning/error)")
-    keypoints: List[Dict] = Field(..., description="Detected pose keypoints")
-    angles: Optional[Dict[str, float]] = Field(None, description="Joint angles in degrees")
+    keypoints: Union[List[Dict], List[int], List[float], str] = Field(..., description="Detected pose keypoints, encoded as requested by keypointFormat")
+    angles: Optional[Dict[str, float]] = Field(None, description="Joint angles in degrees (both sides, plus trunk lean from vertical)")
     repCount: Optional[int] = Field(None, description="Rep count for this session")
+    repTempo: Optional[float] = Field(None, description="Duration in seconds of the last completed rep")
+    timeUnderTension: Optional[float] = Field(None, description="Seconds spent out of the top position this session")
+    keypointFormat: Optional[str] = Field(None, description="Compact keypoint encoding (flat/int16/float32); omitted for the default objects")
+    keypointScale: Optional[float] = Field(None, description="Divide int16 keypoint values by this to get coordinates")
+    keypointIds: Optional[List[int]] = Field(None, description="Landmark IDs of the returned keypoints when only exercise joints are returned")
+    modelTier: Optional[int] = Field(None, description="Model complexity tier the frame was analyzed with, after load-based capping")
+    reusedFrame: Optional[bool] = Field(None, description="Whether landmarks were reused from the session's previous, near-identical frame")
 
     class Config:
         json_schema_extra = {
@@ -93,99 +423,498 @@ class PoseDetectionResponse(BaseModel):
                 "feedback": "Tuyệt vời! Tư thế squat chuẩn",
                 "status": "correct",
                 "keypoints": [{"id": 0, "x": 0.5, "y": 0.3, "z": 0.1, "visibility": 0.99}],
-                "angles": {"knee": 85.5, "hip": 92.3},
-                "repCount": 1
+                "angles": {"knee": 85.5, "left_knee": 85.5, "left_hip": 92.3, "trunk": 12.4},
+                "repCount": 1,
+                "repTempo": 2.4,
+                "timeUnderTension": 2.1
             }
         }
 
 
+def decode_image_bytes(image_bytes: bytes, max_side: int = MAX_FRAME_SIDE) -> np.ndarray:
+    """Decode raw encoded image bytes (JPEG/PNG/WebP) to an RGB numpy array
+    
+    Frames larger than `max_side` are downscaled; JPEGs are decoded directly
+    at 1/2, 1/4 or 1/8 size so the full image is never materialized.
+    """
+    # frombuffer wraps the request buffer without copying it
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    with STAGE_SECONDS.time("imdecode"):
+        image = cv2.imdecode(nparr, reduced_decode_flag(nparr, max_side))
+    if image is None:
+        raise ValueError("Could not decode image bytes")
+    with STAGE_SECONDS.time("resize"):
+        image = fit_to_max_side(image, max_side)
+    # Swap channels in place instead of allocating a second full frame
+    with STAGE_SECONDS.time("color"):
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+
+
 def decode_image(image_data: str) -> np.ndarray:
     """Decode base64 image to numpy array"""
     try:
-        if "," in image_data:
-            image_data = image_data.split(",")[1]
-        
-        image_bytes = base64.b64decode(image_data)
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        return decode_image_bytes(decode_base64_image(image_data))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid image data: {str(e)}")
 
 
-def calculate_angle(a, b, c):
-    """Calculate angle between three points"""
-    a = np.array(a)
-    b = np.array(b)
-    c = np.array(c)
+def decode_base64_image(image_data: str) -> bytes:
+    """Encoded image bytes from base64 or a data-URL"""
+    if "," in image_data:
+        image_data = image_data.split(",")[1]
     
-    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
+    with STAGE_SECONDS.time("base64"):
+        return base64.b64decode(image_data)
+
+
+# Exercise scoring rules, compiled once from the declarative config
+EXERCISE_CONFIG_PATH = os.getenv(
+    "AI_EXERCISE_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "exercises.json")
+)
+EXERCISE_RULES: Dict[str, ExerciseRule] = load_exercise_rules(EXERCISE_CONFIG_PATH)
+
+# Recommendation engine over the exercise catalog: the seed data at import,
+# then the backend's catalog, re-fetched periodically (see `refresh_catalog`)
+CATALOG_PATH = os.getenv(
+    "AI_CATALOG_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "data", "exercises.json"),
+)
+CATALOG_URL = os.getenv("AI_CATALOG_URL", "")
+CATALOG_REFRESH_INTERVAL = float(os.getenv("AI_CATALOG_REFRESH_INTERVAL", "300"))
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("AI_RECOMMENDATION_CACHE_SIZE", "1024"))
+
+
+def load_recommendation_engine(path: str) -> Optional[RecommendationEngine]:
+    """Engine over a catalog file, or None (recommendations answer 503) if it can't be read"""
+    try:
+        return RecommendationEngine(load_catalog_file(path), RECOMMENDATION_CACHE_SIZE)
+    except Exception as e:
+        logger.warning(f"Exercise catalog not loaded from {path}: {str(e)}")
+        return None
+
+
+recommendation_engine = load_recommendation_engine(CATALOG_PATH)
+# Digest of the last catalog fetched from the backend; unchanged ones keep the engine and its cache
+catalog_digest: Optional[str] = None
+
+
+# Chat intents, compiled into one keyword automaton
+CHAT_INTENTS_PATH = os.getenv(
+    "AI_CHAT_INTENTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "intents.json")
+)
+chat_matcher = load_intents(CHAT_INTENTS_PATH, int(os.getenv("AI_CHAT_CACHE_SIZE", "1024")))
+
+
+def refresh_catalog():
+    """Rebuild the recommendation engine from the backend's catalog if it changed;
+    keeps the current one on failure"""
+    global recommendation_engine, catalog_digest
+    try:
+        catalog = fetch_catalog(CATALOG_URL)
+        digest = hashlib.sha1(json.dumps(catalog, sort_keys=True).encode()).hexdigest()
+        if digest == catalog_digest:
+            return
+        engine = RecommendationEngine(catalog, RECOMMENDATION_CACHE_SIZE)
+    except Exception as e:
+        logger.warning(f"Exercise catalog not loaded from {CATALOG_URL}: {str(e)}")
+        return
+    # A single assignment, so requests see either the old engine or the new one
+    recommendation_engine = engine
+    catalog_digest = digest
+    logger.info(f"Exercise catalog loaded from {CATALOG_URL}: {len(engine)} exercises")
+
+
+def require_recommendation_engine() -> RecommendationEngine:
+    """The current engine; 503 while no catalog has been loaded"""
+    engine = recommendation_engine
+    if engine is None:
+        raise HTTPException(status_code=503, detail="Exercise catalog is not loaded",
+                            headers={"Retry-After": "30"})
+    return engine
+
+
+async def refresh_catalog_periodically():
+    """Fetch the backend's catalog at startup, then every AI_CATALOG_REFRESH_INTERVAL seconds"""
+    while True:
+        await asyncio.to_thread(refresh_catalog)
+        if CATALOG_REFRESH_INTERVAL <= 0:
+            return
+        await asyncio.sleep(CATALOG_REFRESH_INTERVAL)
+
+
+def detect_pose(image: np.ndarray, session: Optional[PoseSession] = None, tier: int = 1):
+    """Run MediaPipe at `tier` on an RGB image using the session's tracker, if any"""
+    with STAGE_SECONDS.time("inference"):
+        return run_pose(image, session, tier)
+
+
+def run_pose(image: np.ndarray, session: Optional[PoseSession] = None, tier: int = 1):
+    """Untimed body of `detect_pose`"""
+    if session is None:
+        pool = static_pose_pools[tier]
+        pose = pool.acquire()
+        try:
+            return pose.process(image)
+        finally:
+            pool.release(pose)
     
-    if angle > 180.0:
-        angle = 360 - angle
+    if session.pose.use(tier):
+        # A different model: tracking and the crop start over
+        session.roi = None
+    if not ROI_CROP_ENABLED:
+        return session.pose.process(image)
+    return detect_pose_in_roi(session, image)
+
+
+def detect_pose_in_roi(session: PoseSession, image: np.ndarray):
+    """Run the session tracker on a crop around the previous frame's pose
+    
+    Falls back to the full frame when the frame size changed or nobody is
+    found inside the crop. The crop only moves once the body leaves it, so
+    MediaPipe's own tracking sees a stable frame most of the time.
+    """
+    height, width = image.shape[:2]
+    roi = session.roi if session.roi_frame_size == (width, height) else None
+    if roi == (0, 0, width, height):
+        roi = None
     
-    return angle
+    results = None
+    if roi is not None:
+        results = session.pose.process(crop_to_roi(image, roi))
+        if results.pose_landmarks:
+            remap_landmarks(results.pose_landmarks.landmark, roi, width, height)
+        else:
+            results = None
+    if results is None:
+        roi = None
+        results = session.pose.process(image)
+    
+    if not results.pose_landmarks:
+        session.roi = None
+        return results
+    
+    needed = landmark_roi(results.pose_landmarks.landmark, width, height, margin=0.1)
+    if needed is None:
+        session.roi = None
+    elif roi is None or not roi_contains(roi, needed):
+        session.roi = landmark_roi(results.pose_landmarks.landmark, width, height, margin=0.35)
+        session.roi_frame_size = (width, height)
+    return results
 
 
-def analyze_squat(landmarks) -> tuple[float, str, str]:
-    """Analyze squat pose"""
-    # Get key points
-    hip = [landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x,
-           landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y]
-    knee = [landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].x,
-            landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y]
-    ankle = [landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].x,
-             landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].y]
+def update_reps(session: PoseSession, rule: Optional[ExerciseRule],
+                angles: Optional[np.ndarray], timestamp: float) -> Optional[RepCounter]:
+    """Advance the session's rep counter; None for exercises without reps"""
+    profile = rule.rep_profile if rule is not None else None
+    if profile is None:
+        return None
     
-    knee_angle = calculate_angle(hip, knee, ankle)
+    if session.reps is None or session.reps.profile is not profile:
+        # New exercise: start counting from zero
+        session.reps = RepCounter(profile)
+    if angles is not None:
+        session.reps.update(float(angles[rule.angle_index]), timestamp)
+    return session.reps
+
+
+def process_pose(image: np.ndarray, exercise_type: str,
+                 session_id: Optional[str] = None,
+                 encoding: KeypointEncoding = DEFAULT_ENCODING,
+                 model_tier: Optional[int] = None) -> PoseDetectionResponse:
+    """Run pose detection and exercise analysis on a decoded RGB image
     
-    # Scoring logic
-    if knee_angle < 70:
-        score = 10.0
-        feedback = "Tuyệt vời! Tư thế squat chuẩn"
-        status = "correct"
-    elif knee_angle < 90:
-        score = 8.0
-        feedback = "Tốt! Hãy cố gắng squat sâu hơn một chút"
-        status = "warning"
-    elif knee_angle < 120:
-        score = 5.0
-        feedback = "Squat sâu hơn để đạt hiệu quả tốt hơn"
-        status = "warning"
-    else:
-        score = 3.0
-        feedback = "Tư thế chưa đúng. Hãy squat thấp hơn"
-        status = "error"
+    `model_tier` is the requested tier; sessions remember it for later frames.
+    """
+    if session_id is None:
+        tier = tier_controller.resolve(model_tier)
+        response = analyze_results(detect_pose(image, None, tier), exercise_type, encoding=encoding)
+        response.modelTier = tier
+        return response
     
-    return score, feedback, status
+    # Hold the session across detection and analysis so its state sees frames in order
+    with pose_sessions.acquire(session_id) as session:
+        if model_tier is not None:
+            session.pose.requested = model_tier
+        tier = tier_controller.resolve(session.pose.requested)
+        results, reused = detect_pose_cached(image, session, tier)
+        response = analyze_results(results, exercise_type, session, encoding)
+        response.modelTier = tier
+        response.reusedFrame = reused
+        return response
 
 
-def analyze_pushup(landmarks) -> tuple[float, str, str]:
-    """Analyze push-up pose"""
-    shoulder = [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-    elbow = [landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].x,
-             landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].y]
-    wrist = [landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].x,
-             landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].y]
+def detect_pose_cached(image: np.ndarray, session: PoseSession, tier: int):
+    """`detect_pose` for a session, reusing its last results for a near-identical frame
     
-    elbow_angle = calculate_angle(shoulder, elbow, wrist)
+    Returns (results, reused).
+    """
+    cache = session.frame_cache
+    if cache is None:
+        return detect_pose(image, session, tier), False
     
-    if elbow_angle < 90:
-        score = 10.0
-        feedback = "Push-up chuẩn! Tuyệt vời"
-        status = "correct"
-    elif elbow_angle < 120:
+    now = time.monotonic()
+    with STAGE_SECONDS.time("dedup"):
+        signature = frame_signature(image)
+        results = cache.lookup(signature, tier, now)
+    cache_lookup_rate.mark()
+    if results is not None:
+        FRAME_CACHE_TOTAL.inc("hit")
+        cache_hit_rate.mark()
+        return results, True
+    
+    FRAME_CACHE_TOTAL.inc("miss")
+    results = detect_pose(image, session, tier)
+    cache.store(signature, tier, results, now)
+    return results, False
+
+
+def analyze_results(results, exercise_type: str,
+                    session: Optional[PoseSession] = None,
+                    encoding: KeypointEncoding = DEFAULT_ENCODING,
+                    timestamp: Optional[float] = None) -> PoseDetectionResponse:
+    """Score MediaPipe results for an exercise and build the response
+    
+    `timestamp` (seconds) drives smoothing and rep timing; defaults to now.
+    """
+    points = landmarks_to_array(results.pose_landmarks) if results.pose_landmarks else None
+    return analyze_points(points, exercise_type, session, encoding, timestamp)
+
+
+def analyze_points(points: Optional[np.ndarray], exercise_type: str,
+                   session: Optional[PoseSession] = None,
+                   encoding: KeypointEncoding = DEFAULT_ENCODING,
+                   timestamp: Optional[float] = None) -> PoseDetectionResponse:
+    """`analyze_results` for a (33, 4) landmark array, or None without a pose"""
+    started = time.perf_counter()
+    exercise_type = exercise_type.lower()
+    rule = EXERCISE_RULES.get(exercise_type)
+    now = time.monotonic() if timestamp is None else timestamp
+    frame_rate.mark()
+    
+    if points is None:
+        no_pose_rate.mark()
+        FRAMES_TOTAL.inc(rule.name if rule else "general", "no_pose")
+        reps = None
+        if session is not None:
+            session.landmark_filter.reset()
+            reps = update_reps(session, rule, None, now)
+        response = PoseDetectionResponse(
+            success=False,
+            score=0.0,
+            feedback="Không phát hiện được tư thế. Hãy đảm bảo toàn thân trong khung hình",
+            status="error",
+            keypoints=[],
+            angles=None,
+            repCount=reps.count if reps else None
+        )
+        STAGE_SECONDS.observe(time.perf_counter() - started, "analysis")
+        return response
+    
+    if session is not None:
+        # Smooth jitter before anything downstream sees the landmarks
+        session.landmark_filter(points, now)
+    
+    # Extract keypoints
+    joint_ids = rule.joint_ids if rule is not None and encoding.exercise_joints else None
+    keypoints = encode_keypoints(points, encoding.format, joint_ids)
+    
+    # Every joint angle in one vectorized pass, shared by scoring, reps and response
+    angle_vector = compute_angles(points)
+    angles = angles_to_dict(angle_vector)
+    
+    # Score against the exercise's bands
+    if rule is not None:
+        angle = float(angle_vector[rule.angle_index])
+        if session is not None:
+            band = session.score_hysteresis.apply(exercise_type, rule.band, angle)
+        else:
+            band = rule.band(angle)
+        score, feedback, status = rule.results[band]
+        if rule.legacy_key:
+            angles[rule.legacy_key] = angle
+    else:
         score = 7.0
-        feedback = "Tốt! Hãy hạ thấp hơn một chút"
-        status = "warning"
+        feedback = "Phát hiện tư thế thành công"
+        status = "correct"
+    
+    reps = update_reps(session, rule, angle_vector, now) if session else None
+    
+    response = PoseDetectionResponse(
+        success=True,
+        score=score,
+        feedback=feedback,
+        status=status,
+        keypoints=keypoints,
+        angles=angles,
+        repCount=reps.count if reps else None,
+        repTempo=reps.last_rep_duration if reps else None,
+        timeUnderTension=reps.time_under_tension if reps else None,
+        keypointFormat=encoding.format if encoding is not DEFAULT_ENCODING else None,
+        keypointScale=INT16_SCALE if encoding.format == "int16" else None,
+        keypointIds=joint_ids.tolist() if joint_ids is not None else None
+    )
+    FRAMES_TOTAL.inc(rule.name if rule else "general", "pose")
+    STAGE_SECONDS.observe(time.perf_counter() - started, "analysis")
+    return response
+
+
+@dataclass
+class FrameJob:
+    """One frame waiting for inference: raw encoded bytes or a base64 data-URL"""
+    frame: Union[bytes, str]
+    exercise_type: str
+    session_id: Optional[str] = None
+    encoding: KeypointEncoding = DEFAULT_ENCODING
+    model_tier: Optional[int] = None
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+def analyze_frame(job: FrameJob) -> PoseDetectionResponse:
+    """Decode and analyze one frame; runs on an inference worker"""
+    if job.session_id is None and ring_pose_pool is not None:
+        return analyze_frame_in_process(job)
+    if isinstance(job.frame, str):
+        image = decode_image(job.frame)
     else:
-        score = 4.0
-        feedback = "Hạ thấp hơn để đạt hiệu quả"
-        status = "warning"
+        image = decode_image_bytes(job.frame)
+    return process_pose(image, job.exercise_type, job.session_id, job.encoding, job.model_tier)
+
+
+def analyze_frame_in_process(job: FrameJob) -> PoseDetectionResponse:
+    """Sessionless frame: decode into the frame ring, infer in a worker process
     
-    return score, feedback, status
+    Raises InferenceOverloaded when every ring slot is in use.
+    """
+    if isinstance(job.frame, str):
+        try:
+            frame = decode_base64_image(job.frame)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid image data: {str(e)}")
+    else:
+        frame = job.frame
+    
+    tier = tier_controller.resolve(job.model_tier)
+    try:
+        with STAGE_SECONDS.time("imdecode"):
+            ref = frame_ring.write_encoded(frame)
+    except RingFull as e:
+        raise InferenceOverloaded(str(e))
+    with STAGE_SECONDS.time("inference"):
+        points = ring_pose_pool.run(ref, tier)
+    response = analyze_points(points, job.exercise_type, encoding=job.encoding)
+    response.modelTier = tier
+    return response
+
+
+def analyze_queued_frame(job: FrameJob) -> PoseDetectionResponse:
+    """Analyze a frame on a worker, recording how long it waited for one"""
+    # Batching window plus time spent waiting for a free worker
+    queue_wait = time.perf_counter() - job.queued_at
+    STAGE_SECONDS.observe(queue_wait, "queue")
+    tier_controller.observe(queue_wait)
+    return analyze_frame(job)
+
+
+def analyze_frame_batch(jobs: List[FrameJob]) -> List[Union[PoseDetectionResponse, Exception]]:
+    """Analyze a micro-batch of frames on one worker, one result per job"""
+    results = []
+    for job in jobs:
+        try:
+            results.append(analyze_queued_frame(job))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+# Frames arriving together can be dispatched to workers in bulk. Batched
+# frames are still decoded and inferred one by one, so this only saves worker
+# handoffs and is off unless AI_BATCH_WINDOW_MS is set
+BATCH_WINDOW_MS = float(os.getenv("AI_BATCH_WINDOW_MS", "0"))
+pose_batcher = MicroBatcher(
+    analyze_frame_batch,
+    inference_pool,
+    window_ms=BATCH_WINDOW_MS,
+    max_batch=int(os.getenv("AI_BATCH_MAX_SIZE", "8")),
+    key=lambda job: job.session_id,
+) if BATCH_WINDOW_MS > 0 else None
+
+
+async def run_frame_job(job: FrameJob) -> PoseDetectionResponse:
+    """Analyze a frame on the inference pool, through the batcher when enabled"""
+    if pose_batcher is None:
+        return await inference_pool.run(analyze_queued_frame, job)
+    return await pose_batcher.submit(job)
+
+
+def stream_error_response(feedback: str) -> PoseDetectionResponse:
+    """In-band reply for stream frames that could not be analyzed"""
+    return PoseDetectionResponse(
+        success=False,
+        score=0.0,
+        feedback=feedback,
+        status="error",
+        keypoints=[],
+        angles=None,
+        repCount=None
+    )
+
+
+# /analyze-pose reads its body by content type, so document each accepted form
+ANALYZE_POSE_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {"schema": PoseDetectionRequest.model_json_schema()},
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "image": {"type": "string", "format": "binary"},
+                    "exerciseType": {"type": "string"},
+                    "sessionId": {"type": "string"},
+                },
+                "required": ["image"],
+            }
+        },
+        "application/octet-stream": {"schema": {"type": "string", "format": "binary"}},
+        "image/jpeg": {"schema": {"type": "string", "format": "binary"}},
+        "image/webp": {"schema": {"type": "string", "format": "binary"}},
+    },
+}
+
+
+async def read_frame_job(request: Request, exercise_type: Optional[str],
+                         session_id: Optional[str],
+                         encoding: KeypointEncoding = DEFAULT_ENCODING,
+                         model_tier: Optional[int] = None) -> FrameJob:
+    """Build a FrameJob from a JSON, multipart or raw binary request body"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    
+    if content_type == "multipart/form-data":
+        async with request.form() as form:
+            upload = form.get("image") or form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(status_code=400, detail="Missing 'image' file field")
+            frame = await upload.read()
+            exercise_type = form.get("exerciseType") or exercise_type
+            session_id = form.get("sessionId") or session_id
+            try:
+                model_tier = parse_model_tier(form.get("modelTier")) if form.get("modelTier") else model_tier
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        return FrameJob(frame, exercise_type or "general", session_id, encoding, model_tier)
+    
+    if content_type == "application/octet-stream" or content_type.startswith("image/"):
+        # Raw encoded frame, no base64 or data-URL wrapping
+        return FrameJob(await request.body(), exercise_type or "general", session_id, encoding, model_tier)
+    
+    try:
+        body = PoseDetectionRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+        )
+    model_tier = body.modelTier if body.modelTier is not None else model_tier
+    return FrameJob(body.imageData, body.exerciseType, body.sessionId, encoding, model_tier)
 
 
 @app.get("/", tags=["Health Check"])
@@ -203,109 +932,427 @@ async def root():
     }
 
 
+@app.get("/ready", tags=["Health Check"])
+async def ready():
+    """
+    Readiness probe for load balancers
+    
+    Returns 200 once every enabled model tier has analyzed a warm-up frame,
+    and 503 while the service is still starting. `/` answers as soon as the
+    process is up.
+    """
+    body = {
+        "ready": pose_ready.is_set(),
+        "modelTiers": tier_controller.enabled if pose_ready.is_set() else [],
+        "warmupSeconds": round(warmup_seconds, 3) if warmup_seconds is not None else None,
+    }
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+@app.get("/metrics", tags=["Health Check"], response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus metrics in the text exposition format
+    
+    Per-stage latency histograms (`ai_stage_duration_seconds`), end-to-end
+    frame latency, frame counts per exercise and outcome, rejected frames,
+    inference in-flight and queue depth, session count, and frames/sec and
+    no-pose ratio over the last `AI_METRICS_WINDOW` seconds.
+    """
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.post("/analyze-pose",
     tags=["Pose Analysis"],
     summary="Analyze exercise pose from image",
     description="""
     Upload an image to detect body pose and analyze exercise form.
     
+    The image can be sent as:
+    - **application/json**: base64 data-URL in `imageData` (PoseDetectionRequest)
+    - **multipart/form-data**: JPEG/WebP file in the `image` field
+    - **application/octet-stream** or **image/\***: the raw encoded frame as the body,
+      with `exerciseType` and `sessionId` as query parameters
+    
+    Binary uploads skip base64 entirely and are about 25% smaller on the wire.
+    
     Supported exercise types:
-    - **squat**: Analyzes knee angle, hip angle, and back position
-    - **pushup**: Analyzes elbow angle, body alignment
-    - **plank**: Analyzes body straightness and hip position
-    - **general**: General pose detection without specific analysis
+    - **squat**: Knee depth, with rep counting
+    - **pushup**: Elbow depth, with rep counting
+    - **plank**: Shoulder-hip-ankle line straightness
+    - **lunge**: Front knee depth, with rep counting
+    - **bicepcurl**: Elbow flexion, with rep counting
+    - **general** (or any unknown type): Pose detection without specific analysis
+    
+    Exercises are defined in `exercises.json` (`AI_EXERCISE_CONFIG`); adding one
+    needs no code change.
+    
+    Keypoints default to a list of objects. Pass `keypointFormat` (or the
+    `X-Keypoint-Format` header) as `flat`, `int16` or `float32` for a compact
+    encoding, and `keypointJoints=exercise` to return only the joints the
+    exercise uses.
+    
+    `modelTier` selects the MediaPipe model: 0 (fastest), 1 (default) or
+    2 (most accurate). With a `sessionId` the tier is remembered for the
+    session. Under load the service caps the tier; the tier actually used is
+    returned as `modelTier`.
     """,
     response_description="Pose landmarks and exercise analysis with scoring",
-    response_model=PoseDetectionResponse
+    response_model=PoseDetectionResponse,
+    openapi_extra={"requestBody": ANALYZE_POSE_REQUEST_BODY}
 )
-async def analyze_pose(request: PoseDetectionRequest):
+async def analyze_pose(
+    request: Request,
+    exerciseType: Optional[str] = Query(None, description="Exercise type for binary/multipart uploads"),
+    sessionId: Optional[str] = Query(None, description="Client stream ID for binary/multipart uploads"),
+    keypointFormat: Optional[str] = Query(None, description="Keypoint encoding: objects (default), flat, int16 or float32"),
+    keypointJoints: Optional[str] = Query(None, description="'all' (default) or 'exercise' for only the joints the exercise uses"),
+    modelTier: Optional[str] = Query(None, description="Model complexity 0, 1 or 2 for binary/multipart uploads"),
+):
     """
     Analyze pose from uploaded image and provide exercise-specific feedback.
     
     Args:
-        request: PoseDetectionRequest containing base64 image and exercise type
+        request: JSON PoseDetectionRequest, multipart form or raw image body
+        exerciseType: Exercise type when the body is not JSON
+        sessionId: Session ID when the body is not JSON
+        keypointFormat: Compact keypoint encoding; also read from the
+            `X-Keypoint-Format` header
+        keypointJoints: Restrict keypoints to the exercise's joints
+        modelTier: Requested model complexity when the body is not JSON
         
     Returns:
         PoseDetectionResponse: Pose landmarks, analysis scores, and feedback
         
     Raises:
-        HTTPException: If no pose detected or invalid file format
+        HTTPException: If no pose detected or invalid file format, or 503 when
+            the inference queue is full or the models are still warming up
     """
+    started = time.perf_counter()
+    require_pose_ready()
     try:
-        # Decode image
-        image = decode_image(request.imageData)
-        
-        # Process with MediaPipe
-        results = pose.process(image)
-        
-        if not results.pose_landmarks:
-            return PoseDetectionResponse(
-                success=False,
-                score=0.0,
-                feedback="Không phát hiện được tư thế. Hãy đảm bảo toàn thân trong khung hình",
-                status="error",
-                keypoints=[],
-                angles=None,
-                repCount=None
-            )
-        
-        # Extract keypoints
-        keypoints = []
-        landmarks = results.pose_landmarks.landmark
-        for idx, landmark in enumerate(landmarks):
-            keypoints.append({
-                "id": idx,
-                "x": landmark.x,
-                "y": landmark.y,
-                "z": landmark.z,
-                "visibility": landmark.visibility
-            })
-        
-        # Analyze based on exercise type
-        exercise_type = request.exerciseType.lower()
-        if exercise_type == "squat":
-            score, feedback, status = analyze_squat(landmarks)
-            angles = {
-                "knee": calculate_angle(
-                    [landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x,
-                     landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y],
-                    [landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].x,
-                     landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y],
-                    [landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].x,
-                     landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].y]
-                )
-            }
-        elif exercise_type == "pushup":
-            score, feedback, status = analyze_pushup(landmarks)
-            angles = {
-                "elbow": calculate_angle(
-                    [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                     landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y],
-                    [landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].x,
-                     landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].y],
-                    [landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].x,
-                     landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].y]
-                )
-            }
-        else:
-            score = 7.0
-            feedback = "Phát hiện tư thế thành công"
-            status = "correct"
-            angles = None
-        
-        return PoseDetectionResponse(
-            success=True,
-            score=score,
-            feedback=feedback,
-            status=status,
-            keypoints=keypoints,
-            angles=angles,
-            repCount=None
+        encoding = parse_keypoint_encoding(
+            keypointFormat or request.headers.get("x-keypoint-format"), keypointJoints
         )
+        model_tier = parse_model_tier(modelTier)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job = await read_frame_job(request, exerciseType, sessionId, encoding, model_tier)
     
+    try:
+        response = await run_frame_job(job)
+    
+    except InferenceOverloaded as e:
+        REJECTED_FRAMES_TOTAL.inc("overloaded")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ValueError as e:
+        REJECTED_FRAMES_TOTAL.inc("invalid_image")
+        raise HTTPException(status_code=400, detail=f"Invalid image data: {str(e)}")
+    except HTTPException:
+        REJECTED_FRAMES_TOTAL.inc("invalid_image")
+        raise
     except Exception as e:
         logger.error(f"Error analyzing pose: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    # Serialize here rather than in FastAPI so the stage can be measured
+    with STAGE_SECONDS.time("serialize"):
+        body = response.model_dump_json()
+    FRAME_SECONDS.observe(time.perf_counter() - started, "http")
+    return Response(body, media_type="application/json")
+
+
+@app.websocket("/ws/analyze-pose")
+async def analyze_pose_stream(websocket: WebSocket, exerciseType: str = "general",
+                              sessionId: Optional[str] = None,
+                              keypointFormat: Optional[str] = None,
+                              keypointJoints: Optional[str] = None,
+                              modelTier: Optional[str] = None):
+    """
+    Stream pose analysis over a persistent WebSocket.
+    
+    The client sends encoded frames (JPEG/PNG/WebP) as binary messages and
+    receives one PoseDetectionResponse-shaped JSON message per analyzed frame.
+    Text messages are treated as control messages, e.g.
+    `{"exerciseType": "pushup"}` to switch exercise mid-stream.
+    
+    Each connection tracks the pose with its own MediaPipe instance. Pass
+    `sessionId` to resume tracking state across reconnects.
+    
+    `keypointFormat` and `keypointJoints` select a compact keypoint encoding,
+    and `modelTier` the model complexity, as on `POST /analyze-pose`;
+    `{"modelTier": 2}` changes the tier mid-stream.
+    
+    Only the most recent frame is kept while inference is busy: older pending
+    frames are dropped so that latency stays bounded instead of queueing up.
+    """
+    await websocket.accept()
+    
+    try:
+        encoding = parse_keypoint_encoding(keypointFormat, keypointJoints)
+        model_tier = parse_model_tier(modelTier)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    
+    pending_frames: asyncio.Queue = asyncio.Queue(maxsize=1)
+    session_id = sessionId or f"ws-{uuid.uuid4().hex}"
+    state = {"exercise_type": exerciseType, "model_tier": model_tier, "dropped": 0}
+    
+    async def receive_frames():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            
+            if message.get("bytes") is not None:
+                if pending_frames.full():
+                    # Inference is behind: replace the stale frame with the newest one
+                    pending_frames.get_nowait()
+                    state["dropped"] += 1
+                    REJECTED_FRAMES_TOTAL.inc("dropped_stale")
+                pending_frames.put_nowait(message["bytes"])
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    continue
+                if not isinstance(control, dict):
+                    continue
+                if control.get("exerciseType"):
+                    state["exercise_type"] = str(control["exerciseType"])
+                if "modelTier" in control:
+                    try:
+                        state["model_tier"] = parse_model_tier(control["modelTier"])
+                    except ValueError:
+                        pass
+    
+    async def analyze_frames():
+        while True:
+            frame = await pending_frames.get()
+            started = time.perf_counter()
+            if not pose_ready.is_set():
+                REJECTED_FRAMES_TOTAL.inc("warming_up")
+                await websocket.send_text(
+                    stream_error_response("Mô hình đang khởi động, vui lòng đợi").model_dump_json()
+                )
+                continue
+            try:
+                response = await run_frame_job(
+                    FrameJob(frame, state["exercise_type"], session_id, encoding, state["model_tier"])
+                )
+            except InferenceOverloaded:
+                REJECTED_FRAMES_TOTAL.inc("overloaded")
+                response = stream_error_response("Máy chủ đang quá tải, vui lòng thử lại")
+            except ValueError as e:
+                REJECTED_FRAMES_TOTAL.inc("invalid_image")
+                response = stream_error_response(f"Ảnh không hợp lệ: {str(e)}")
+            except Exception as e:
+                # One failed frame (no model tier, a worker timeout...) must
+                # not end the stream: report it and wait for the next frame
+                logger.error(f"Error analyzing stream frame: {str(e)}")
+                REJECTED_FRAMES_TOTAL.inc("error")
+                response = stream_error_response("Không thể phân tích khung hình, vui lòng thử lại")
+            with STAGE_SECONDS.time("serialize"):
+                message = response.model_dump_json()
+            await websocket.send_text(message)
+            FRAME_SECONDS.observe(time.perf_counter() - started, "ws")
+    
+    receiver = asyncio.create_task(receive_frames())
+    analyzer = asyncio.create_task(analyze_frames())
+    try:
+        done, _ = await asyncio.wait(
+            {receiver, analyzer}, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Error in pose stream: {str(e)}")
+    finally:
+        receiver.cancel()
+        analyzer.cancel()
+        if sessionId is None:
+            # Nobody can resume an anonymous stream, free its tracker now.
+            # Not awaited: closing waits for any in-flight frame to finish.
+            asyncio.get_running_loop().run_in_executor(
+                None, pose_sessions.remove, session_id
+            )
+        if state["dropped"]:
+            logger.info(f"Pose stream closed, dropped {state['dropped']} stale frames")
+
+
+async def save_video_upload(request: Request) -> str:
+    """Spool an uploaded video (multipart `video` field or raw body) to a temp file"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    handle, path = tempfile.mkstemp(suffix=".video")
+    try:
+        with os.fdopen(handle, "wb") as out:
+            if content_type == "multipart/form-data":
+                async with request.form() as form:
+                    upload = form.get("video") or form.get("file")
+                    if upload is None or isinstance(upload, str):
+                        raise HTTPException(status_code=400, detail="Missing 'video' file field")
+                    while chunk := await upload.read(1 << 20):
+                        out.write(chunk)
+            else:
+                async for chunk in request.stream():
+                    out.write(chunk)
+    except BaseException:
+        remove_file(path)
+        raise
+    return path
+
+
+def detect_video_frame(item, tier: int) -> object:
+    """Detect the pose in one sampled video frame; runs on a video worker"""
+    _, _, image = item
+    return detect_pose(image, None, tier)
+
+
+def video_analysis_lines(path: str, exercise_type: str, sample_every: int,
+                         encoding: KeypointEncoding, model_tier: Optional[int] = None):
+    """Yield NDJSON lines: one per analyzed frame, then a session summary"""
+    # Frames are detected independently in parallel, then smoothed, scored and
+    # rep-counted in order, exactly like a live session
+    session = PoseSession(f"video-{uuid.uuid4().hex}", None, **create_session_state())
+    frames = iter_video_frames(path, sample_every, MAX_FRAME_SIDE)
+    # Enough frames in flight to keep every worker busy, and no more
+    window = 2 * VIDEO_WORKERS
+    # One tier for the whole video so frames stay comparable
+    tier = tier_controller.resolve(model_tier)
+    detect = functools.partial(detect_video_frame, tier=tier)
+    
+    analyzed = detected = 0
+    score_total = 0.0
+    score_min = score_max = None
+    last_timestamp = 0.0
+    try:
+        for (index, timestamp, _), results in map_ordered(video_executor, detect, frames, window):
+            response = analyze_results(results, exercise_type, session, encoding, timestamp)
+            response.modelTier = tier
+            analyzed += 1
+            last_timestamp = timestamp
+            if response.success:
+                detected += 1
+                score_total += response.score
+                score_min = response.score if score_min is None else min(score_min, response.score)
+                score_max = response.score if score_max is None else max(score_max, response.score)
+            line = {"type": "frame", "frame": index, "timestamp": round(timestamp, 3)}
+            line.update(response.model_dump())
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+        
+        yield json.dumps({
+            "type": "summary",
+            "exerciseType": exercise_type,
+            "analyzedFrames": analyzed,
+            "detectedFrames": detected,
+            "durationSeconds": round(last_timestamp, 3),
+            "repCount": session.reps.count if session.reps else None,
+            "averageScore": score_total / detected if detected else None,
+            "minScore": score_min,
+            "maxScore": score_max,
+        }, ensure_ascii=False) + "\n"
+    except Exception as e:
+        logger.error(f"Error analyzing video: {str(e)}")
+        yield json.dumps({"type": "error", "detail": str(e)}, ensure_ascii=False) + "\n"
+    finally:
+        remove_file(path)
+
+
+def remove_file(path: str):
+    """Delete a temp file if it still exists"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def video_is_readable(path: str) -> bool:
+    """Whether OpenCV can open the uploaded file as a video"""
+    capture = cv2.VideoCapture(path)
+    try:
+        return capture.isOpened()
+    finally:
+        capture.release()
+
+
+@app.post("/analyze-video",
+    tags=["Pose Analysis"],
+    summary="Analyze a recorded workout video",
+    description="""
+    Upload a recorded set (multipart `video` field, or the raw file as the
+    request body) and receive the analysis as it is computed, as
+    newline-delimited JSON (`application/x-ndjson`).
+    
+    Each line is either:
+    - `{"type": "frame", "frame": 12, "timestamp": 0.4, ...}` with the same
+      fields as the `/analyze-pose` response, for every analyzed frame
+    - `{"type": "summary", ...}` as the last line, with rep count and
+      average/min/max score over frames where a pose was detected
+    - `{"type": "error", "detail": ...}` if decoding failed mid-stream
+    
+    Use `sampleEvery=N` to analyze only every Nth frame, and `modelTier` to
+    pick the model complexity (capped under load, fixed for the whole video).
+    Memory use does not grow with video length.
+    """,
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"video": {"type": "string", "format": "binary"}},
+                        "required": ["video"],
+                    }
+                },
+                "application/octet-stream": {"schema": {"type": "string", "format": "binary"}},
+                "video/mp4": {"schema": {"type": "string", "format": "binary"}},
+                "video/webm": {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    }
+)
+async def analyze_video(
+    request: Request,
+    exerciseType: str = Query("general", description="Type of exercise performed in the video"),
+    sampleEvery: int = Query(1, ge=1, description="Analyze every Nth frame"),
+    keypointFormat: Optional[str] = Query(None, description="Keypoint encoding: objects (default), flat, int16 or float32"),
+    keypointJoints: Optional[str] = Query(None, description="'all' (default) or 'exercise' for only the joints the exercise uses"),
+    modelTier: Optional[str] = Query(None, description="Model complexity 0, 1 or 2"),
+):
+    """
+    Analyze every (or every Nth) frame of an uploaded video.
+    
+    Returns:
+        StreamingResponse: NDJSON lines per frame followed by a session summary
+        
+    Raises:
+        HTTPException: If the upload is missing or is not a readable video
+    """
+    try:
+        encoding = parse_keypoint_encoding(keypointFormat, keypointJoints)
+        model_tier = parse_model_tier(modelTier)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    require_pose_ready()
+    
+    path = await save_video_upload(request)
+    if not await asyncio.to_thread(video_is_readable, path):
+        remove_file(path)
+        raise HTTPException(status_code=400, detail="Invalid video data")
+    
+    return StreamingResponse(
+        video_analysis_lines(path, exerciseType, sampleEvery, encoding, model_tier),
+        media_type="application/x-ndjson",
+        # Covers clients that disconnect before the stream starts
+        background=BackgroundTask(remove_file, path),
+    )
 
 
 @app.post("/get-recommendations",
@@ -332,41 +1379,10 @@ async def get_recommendations(user_data: dict):
     Returns:
         dict: Recommended exercises, workout plan, and fitness tips
     """
-    # Simple recommendation logic (would use ML model in production)
-    fitness_level = user_data.get("fitness_level", "beginner")
-    goals = user_data.get("goals", [])
-    
-    recommendations = {
-        "beginner": [
-            {"exercise": "Squat", "sets": 3, "reps": 10, "reason": "Xây dựng cơ chân cơ bản"},
-            {"exercise": "Push-up", "sets": 3, "reps": 8, "reason": "Phát triển cơ ngực và vai"},
-            {"exercise": "Plank", "sets": 3, "reps": 30, "reason": "Tăng cường core"}
-        ],
-        "intermediate": [
-            {"exercise": "Squat", "sets": 4, "reps": 15, "reason": "Tăng sức mạnh chân"},
-            {"exercise": "Push-up", "sets": 4, "reps": 15, "reason": "Phát triển cơ thượng"},
-            {"exercise": "Burpee", "sets": 3, "reps": 10, "reason": "Cardio và sức bền"}
-        ],
-        "advanced": [
-            {"exercise": "Jump Squat", "sets": 4, "reps": 20, "reason": "Bùng nổ sức mạnh"},
-            {"exercise": "One-arm Push-up", "sets": 3, "reps": 10, "reason": "Sức mạnh nâng cao"},
-            {"exercise": "Pistol Squat", "sets": 3, "reps": 8, "reason": "Cân bằng và sức mạnh"}
-        ]
-    }
-    
-    return {
-        "recommended_exercises": recommendations.get(fitness_level, recommendations["beginner"]),
-        "workout_plan": {
-            "duration": 45,
-            "difficulty": fitness_level,
-            "focus_areas": ["Full body", "Cardio"]
-        },
-        "tips": [
-            "Khởi động kỹ trước khi tập",
-            "Uống đủ nước trong và sau khi tập",
-            "Nghỉ ngơi đầy đủ giữa các hiệp"
-        ]
-    }
+    try:
+        return require_recommendation_engine().recommend(user_data)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid user profile: {str(e)}")
 
 
 @app.post("/api/plan/generate", tags=["Workout Plans"])
@@ -374,32 +1390,24 @@ async def generate_plan(user_profile: dict):
     """
     Generate a personalized workout plan
     
-    Creates a customized training schedule based on user profile,
-    including fitness level, goals, available time, and equipment.
+    Creates a customized training schedule from the exercise catalog,
+    scored against the user's fitness level, goals and available time.
     
     **Request Body:**
     - fitnessLevel: beginner/intermediate/advanced
     - goals: Array of fitness goals
     - daysPerWeek: Number of training days
-    - equipment: Available equipment list
+    - minutesPerDay: Time available per training day
+    - workout_history: Recently done exercises (ids or names), ranked lower
     
     **Returns:**
-    - 7-day workout plan
-    - Exercise details (sets, reps, duration)
-    - Progressive overload schedule
+    - 7-day workout plan with a focus per training day and rest days
+    - Exercise details (sets, reps, duration, rest time)
     """
-    # This would use ML model to generate plan
-    return {
-        "plan": {
-            "name": "Kế hoạch tập 7 ngày",
-            "duration": 7,
-            "exercises": [
-                {"day": 1, "exercise": "Squat", "sets": 3, "reps": 15},
-                {"day": 1, "exercise": "Push-up", "sets": 3, "reps": 10},
-                {"day": 2, "exercise": "Plank", "sets": 3, "reps": 30},
-            ]
-        }
-    }
+    try:
+        return require_recommendation_engine().weekly_plan(user_profile)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid user profile: {str(e)}")
 
 
 @app.post("/api/chat", tags=["AI Chat"])
@@ -415,25 +1423,14 @@ async def chat(data: dict):
     - context: Optional conversation context
     
     **Returns:**
-    - AI-generated response in Vietnamese
-    - Suggested follow-up questions
+    - response: Answer in Vietnamese from the best matching intents
+    - intents: Every matched intent id with its score, best first
+    - suggestions: Suggested follow-up questions
     """
     message = data.get("message", "")
-    
-    # Simple rule-based response (would use LLM in production)
-    responses = {
-        "giảm cân": "Để giảm cân hiệu quả, bạn nên kết hợp cardio với strength training. Tôi đề xuất bắt đầu với 3 buổi mỗi tuần.",
-        "tăng cơ": "Để tăng cơ, hãy tập trung vào các bài tập compound như squat, deadlift, bench press với tần suất 4-5 buổi/tuần.",
-        "lưng": "Để cải thiện lưng, các bài tập như plank, bird dog, và superman rất hiệu quả."
-    }
-    
-    response = "Tôi sẽ giúp bạn tìm bài tập phù hợp. Hãy cho tôi biết thêm về mục tiêu của bạn."
-    for key, value in responses.items():
-        if key in message.lower():
-            response = value
-            break
-    
-    return {"response": response}
+    if not isinstance(message, str):
+        raise HTTPException(status_code=400, detail="'message' must be a string")
+    return chat_matcher.respond(message)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+"""
+Frame preprocessing ahead of pose inference.
+
+MediaPipe resizes every input to a small tensor internally, so decoding and
+converting full-resolution webcam frames mostly pays for pixels that are
+thrown away. Helpers here decode JPEGs straight at a reduced size using
+libjpeg's DCT scaling (`cv2.IMREAD_REDUCED_COLOR_*`), downscale anything that
+is still too large, and crop frames to a region of interest around the
+previous frame's landmarks.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# (x0, y0, x1, y1) in pixels
+Roi = Tuple[int, int, int, int]
+
+# Reduced decoding factors supported by OpenCV, largest first
+REDUCED_DECODE_FACTORS = (8, 4, 2)
+
+# Align ROI edges so the crop stays put while the body moves a little
+ROI_GRID = 32
+
+
+def jpeg_dimensions(buffer: np.ndarray) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a JPEG header without decoding, or None"""
+    data = buffer.data
+    size = len(data)
+    if size < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    offset = 2
+    while offset + 9 < size:
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # Fill byte
+            offset += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        length = (data[offset + 2] << 8) | data[offset + 3]
+        # SOF0-SOF15 carry the frame size, except DHT (C4), JPG (C8), DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = (data[offset + 5] << 8) | data[offset + 6]
+            width = (data[offset + 7] << 8) | data[offset + 8]
+            return width, height
+        offset += 2 + length
+    return None
+
+
+def reduced_decode_flag(buffer: np.ndarray, max_side: int) -> int:
+    """Pick the cheapest imdecode flag that still yields at least `max_side` pixels"""
+    if max_side <= 0:
+        return cv2.IMREAD_COLOR
+
+    dimensions = jpeg_dimensions(buffer)
+    if dimensions is None:
+        return cv2.IMREAD_COLOR
+
+    long_side = max(dimensions)
+    for factor in REDUCED_DECODE_FACTORS:
+        if long_side // factor >= max_side:
+            # Looked up here so importing this module doesn't load OpenCV
+            return getattr(cv2, f"IMREAD_REDUCED_COLOR_{factor}")
+    return cv2.IMREAD_COLOR
+
+
+def fit_to_max_side(image: np.ndarray, max_side: int) -> np.ndarray:
+    """Downscale so the longer side is at most `max_side`; no-op otherwise"""
+    height, width = image.shape[:2]
+    long_side = max(height, width)
+    if max_side <= 0 or long_side <= max_side:
+        return image
+
+    scale = max_side / long_side
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    # Bilinear is several times faster and alias-free above half size, which
+    # is the common case after reduced JPEG decoding
+    interpolation = cv2.INTER_LINEAR if scale >= 0.5 else cv2.INTER_AREA
+    return cv2.resize(image, size, interpolation=interpolation)
+
+
+def landmark_roi(landmarks: Sequence, width: int, height: int,
+                 margin: float = 0.25, min_visibility: float = 0.3) -> Optional[Roi]:
+    """Bounding box around visible landmarks, padded by `margin` of its size"""
+    xs = [lm.x for lm in landmarks if lm.visibility >= min_visibility]
+    ys = [lm.y for lm in landmarks if lm.visibility >= min_visibility]
+    if not xs:
+        return None
+
+    x0, x1 = min(xs) * width, max(xs) * width
+    y0, y1 = min(ys) * height, max(ys) * height
+    pad_x = (x1 - x0) * margin
+    pad_y = (y1 - y0) * margin
+
+    x0 = max(0, int(x0 - pad_x) // ROI_GRID * ROI_GRID)
+    y0 = max(0, int(y0 - pad_y) // ROI_GRID * ROI_GRID)
+    x1 = min(width, -(-int(x1 + pad_x) // ROI_GRID) * ROI_GRID)
+    y1 = min(height, -(-int(y1 + pad_y) // ROI_GRID) * ROI_GRID)
+    if x1 - x0 < ROI_GRID or y1 - y0 < ROI_GRID:
+        return None
+    return x0, y0, x1, y1
+
+
+def roi_contains(outer: Roi, inner: Roi) -> bool:
+    """Whether `inner` lies entirely within `outer`"""
+    return (outer[0] <= inner[0] and outer[1] <= inner[1]
+            and outer[2] >= inner[2] and outer[3] >= inner[3])
+
+
+def crop_to_roi(image: np.ndarray, roi: Roi) -> np.ndarray:
+    """Contiguous copy of the ROI; MediaPipe needs C-contiguous input"""
+    x0, y0, x1, y1 = roi
+    return np.ascontiguousarray(image[y0:y1, x0:x1])
+
+
+def remap_landmarks(landmarks: Sequence, roi: Roi, width: int, height: int):
+    """Convert landmarks detected in a ROI crop back to full-frame coordinates"""
+    x0, y0, x1, y1 = roi
+    scale_x = (x1 - x0) / width
+    scale_y = (y1 - y0) / height
+    for lm in landmarks:
+        lm.x = lm.x * scale_x + x0 / width
+        lm.y = lm.y * scale_y + y0 / height
+        # z uses roughly the same scale as x
+        lm.z = lm.z * scale_x
@@ -0,0 +1,500 @@
+"""
+Catalog-driven exercise recommendations and weekly plans.
+
+The exercise catalog (the backend's `categories` and `exercises` collections,
+or the seed data in `frontend/scripts/data/exercises.json`) is compiled once into a float32 feature matrix
+with a one-hot difficulty level and tag weights (strength, cardio, core,
+flexibility, lower, upper) derived from the exercise and category text. The
+matrix is stored feature-major, one contiguous row of N exercises per
+feature. A user profile becomes a weight vector over the same features, so
+scoring the whole catalog is a single vector-matrix product and picking the
+best exercises an `argpartition`, well under a millisecond for tens of
+thousands of exercises.
+
+Results are cached per normalized profile (level, goals, history, days,
+minutes) with LRU eviction; loading a new catalog starts a fresh cache.
+
+Usage:
+    engine = RecommendationEngine(load_catalog_file("../scripts/data/exercises.json"))
+    engine.recommend({"fitness_level": "beginner", "goals": ["giảm cân"]})
+    engine.weekly_plan({"fitnessLevel": "advanced", "daysPerWeek": 5})
+"""
+
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+import urllib.request
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+LEVELS = ("beginner", "intermediate", "advanced")
+TAGS = ("strength", "cardio", "core", "flexibility", "lower", "upper")
+TAG_INDEX = {tag: len(LEVELS) + i for i, tag in enumerate(TAGS)}
+
+# Catalog difficulty labels per level (folded, see `fold_text`)
+DIFFICULTY_LEVELS = {
+    "easy": 0, "beginner": 0, "de": 0, "co ban": 0,
+    "medium": 1, "intermediate": 1, "trung binh": 1,
+    "hard": 2, "advanced": 2, "kho": 2, "nang cao": 2,
+}
+
+# Words in an exercise's name, category or target muscles that give it a tag
+TAG_KEYWORDS = {
+    "strength": ("strength", "suc manh", "squat", "lunge", "push", "pushup", "dip", "curl",
+                 "press", "row", "pull", "deadlift", "bridge", "raise", "pistol", "tang co"),
+    "cardio": ("cardio", "burpee", "jumping", "jump", "high knees", "mountain climber",
+               "mountain climbers", "skater", "hiit", "run", "chay", "nhay", "dot mo", "suc ben"),
+    "core": ("core", "plank", "crunch", "bung", "abs", "twist", "hollow", "bird dog",
+             "superman", "sit up", "mountain climber", "mountain climbers", "lung duoi"),
+    "flexibility": ("flexibility", "stretch", "stretching", "yoga", "gian co", "linh hoat",
+                    "cat cow", "child s pose", "downward dog", "cobra", "mobility"),
+    "lower": ("chan", "mong", "dui", "leg", "legs", "glute", "glutes", "calf", "squat", "lunge",
+              "hamstring", "hamstrings", "quadriceps", "bridge", "skater"),
+    "upper": ("nguc", "tay", "vai", "chest", "arm", "arms", "shoulder", "shoulders", "push",
+              "pushup", "dip", "curl", "tricep", "triceps", "bicep", "biceps", "pike"),
+}
+
+# Goal phrases and the tag weights they ask for
+GOAL_WEIGHTS = (
+    (("giam can", "lose", "weight loss", "fat", "burn", "dot mo"),
+     {"cardio": 1.0, "strength": 0.4, "core": 0.3}),
+    (("tang co", "muscle", "build", "strength", "suc manh"),
+     {"strength": 1.0, "upper": 0.4, "lower": 0.4}),
+    (("suc ben", "endurance", "stamina", "cardio"),
+     {"cardio": 1.0, "core": 0.3}),
+    (("linh hoat", "flexib", "gian co", "yoga", "mobility", "deo dai"),
+     {"flexibility": 1.0}),
+    (("core", "bung", "abs", "lung", "back", "posture", "tu the"),
+     {"core": 1.0, "flexibility": 0.3}),
+    (("chan", "leg", "mong", "glute", "lower"),
+     {"lower": 1.0}),
+    (("tay", "vai", "nguc", "arm", "chest", "upper"),
+     {"upper": 1.0}),
+)
+DEFAULT_GOAL_WEIGHTS = {"strength": 0.5, "cardio": 0.3, "core": 0.3, "flexibility": 0.2}
+
+# How much each catalog difficulty suits a level: rows are levels, columns difficulties
+LEVEL_WEIGHTS = np.array([
+    [1.0, 0.4, -1.0],
+    [0.3, 1.0, 0.3],
+    [-0.6, 0.5, 1.0],
+], dtype=np.float32)
+
+# Subtracted from exercises in the user's recent history, to vary workouts
+HISTORY_PENALTY = 0.6
+# Added to the day's focus tag when building a plan
+FOCUS_BOOST = 1.5
+# Candidates kept per focus; a week never needs more
+FOCUS_CANDIDATES = 64
+MAX_EXERCISES_PER_DAY = 6
+
+SETS_BY_LEVEL = (3, 3, 4)
+REST_SECONDS_BY_LEVEL = (60, 45, 30)
+DAYS_BY_LEVEL = (3, 4, 5)
+MINUTES_BY_LEVEL = (30, 40, 50)
+# Training days of the week for each days-per-week count
+TRAINING_DAYS = {
+    1: (1,), 2: (1, 4), 3: (1, 3, 5), 4: (1, 2, 4, 5),
+    5: (1, 2, 3, 5, 6), 6: (1, 2, 3, 4, 5, 6), 7: (1, 2, 3, 4, 5, 6, 7),
+}
+# Day focuses, in order of preference when goals don't pick enough
+FOCUS_ORDER = ("lower", "upper", "core", "cardio", "flexibility")
+
+REASONS = {
+    "strength": "Tăng sức mạnh",
+    "cardio": "Cardio và sức bền",
+    "core": "Tăng cường core",
+    "flexibility": "Cải thiện độ linh hoạt",
+    "lower": "Xây dựng cơ chân và mông",
+    "upper": "Phát triển cơ ngực, vai và tay",
+}
+LEVEL_REASON = "Phù hợp với trình độ của bạn"
+FOCUS_NAMES = {
+    "lower": "Chân & Mông",
+    "upper": "Ngực & Tay",
+    "core": "Core",
+    "cardio": "Cardio",
+    "flexibility": "Giãn cơ",
+}
+TIPS = (
+    "Khởi động kỹ trước khi tập",
+    "Uống đủ nước trong và sau khi tập",
+    "Nghỉ ngơi đầy đủ giữa các hiệp",
+)
+
+
+def fold_text(text: Any) -> str:
+    """Lowercase, strip Vietnamese diacritics and collapse punctuation to spaces"""
+    text = unicodedata.normalize("NFD", str(text).lower().replace("đ", "d"))
+    # Combining marks (the diacritics) are the non-ASCII left after NFD
+    text = text.encode("ascii", "ignore").decode("ascii")
+    return " ".join(WORD_PATTERN.findall(text))
+
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _has_phrase(folded: str, phrase: str) -> bool:
+    return f" {phrase} " in f" {folded} "
+
+
+# One whole-word pattern per tag, applied to folded text
+TAG_PATTERNS = {
+    tag: re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + r")\b")
+    for tag, words in TAG_KEYWORDS.items()
+}
+
+
+def parse_seconds(value: Any, default: float = 45.0) -> float:
+    """Seconds from catalog durations like 45, "45 giây", "45s" or "2 phút\""""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.match(r"\s*(\d+(?:[.,]\d+)?)\s*(\w*)", fold_text(value))
+    if not match:
+        return default
+    amount = float(match.group(1).replace(",", "."))
+    unit = match.group(2)
+    if unit.startswith(("phut", "min", "p")):
+        return amount * 60
+    return amount
+
+
+def parse_level(value: Any) -> int:
+    """Level index from a fitness level or difficulty label; unknown means beginner"""
+    return DIFFICULTY_LEVELS.get(fold_text(value), 0)
+
+
+def load_catalog_file(path: str) -> Dict[str, List[dict]]:
+    """Catalog from a JSON file: the seed's exercise list, or the backend's
+    {"categories": [...], "exercises": [...]}"""
+    with open(path, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    if isinstance(catalog, list):
+        return {"categories": [], "exercises": catalog}
+    return {"categories": catalog.get("categories", []), "exercises": catalog["exercises"]}
+
+
+def exercise_id(exercise: dict) -> Any:
+    """Backend catalog id, else the MongoDB `_id` (the seed file fixes these)"""
+    value = exercise.get("id", exercise.get("_id"))
+    if isinstance(value, dict):
+        # mongoexport writes ObjectIds as {"$oid": "..."}
+        value = value.get("$oid")
+    return value
+
+
+def fetch_catalog(base_url: str, page_size: int = 500, timeout: float = 5.0) -> Dict[str, List[dict]]:
+    """Read the catalog from the backend API, following exercise page cursors"""
+    base_url = base_url.rstrip("/")
+
+    def get(path: str) -> Tuple[Any, Optional[str]]:
+        with urllib.request.urlopen(f"{base_url}{path}", timeout=timeout) as response:
+            return json.load(response), response.headers.get("X-Next-Cursor")
+
+    categories, _ = get("/api/categories")
+    exercises: List[dict] = []
+    cursor: Optional[str] = None
+    while True:
+        query = f"?limit={page_size}" + (f"&after={cursor}" if cursor else "")
+        page, cursor = get(f"/api/exercises{query}")
+        exercises.extend(page)
+        if not cursor:
+            return {"categories": categories, "exercises": exercises}
+
+
+class RecommendationEngine:
+    """Vectorized scoring of a compiled exercise catalog, with an LRU result cache."""
+
+    def __init__(self, catalog: Dict[str, List[dict]], cache_size: int = 1024):
+        categories = {category["id"]: category for category in catalog.get("categories", [])}
+        exercises = [exercise for exercise in catalog["exercises"] if exercise.get("name")]
+        if not exercises:
+            raise ValueError("The exercise catalog is empty")
+
+        self.exercises = exercises
+        self.ids = [exercise_id(exercise) for exercise in exercises]
+        self.id_rows = {value: row for row, value in enumerate(self.ids) if value is not None}
+        names = [fold_text(exercise["name"]) for exercise in exercises]
+        self.name_rows = {name: row for row, name in enumerate(names)}
+        levels = np.array([parse_level(exercise.get("difficulty")) for exercise in exercises])
+        self.seconds = np.array([parse_seconds(exercise.get("duration")) for exercise in exercises],
+                                dtype=np.float32)
+        # Catalog reps read "3 x 12" (or "3 x 30s" for holds); 10 when missing
+        self.reps = np.array([_parse_reps(exercise.get("reps")) for exercise in exercises])
+
+        # Feature-major: columns[feature] is a contiguous row over all exercises
+        count = len(exercises)
+        self.columns = np.zeros((len(LEVELS) + len(TAGS), count), dtype=np.float32)
+        self.columns[levels, np.arange(count)] = 1.0
+        category_texts = {
+            category_id: fold_text(f"{category.get('name', '')} {category.get('category', '')}")
+            for category_id, category in categories.items()
+        }
+        for row, exercise in enumerate(exercises):
+            # Backend exercises name their category by id, seed exercises inline
+            category_text = (category_texts.get(exercise.get("category_id"))
+                             or fold_text(exercise.get("category", "")))
+            muscles = fold_text(" ".join(exercise.get("targetMuscles") or ()))
+            text = f"{names[row]} {category_text} {muscles}"
+            tags = [TAG_INDEX[tag] for tag, pattern in TAG_PATTERNS.items() if pattern.search(text)]
+            if tags:
+                # Scaled so exercises with many tags don't outrank focused ones
+                self.columns[tags, row] = 1.0 / np.sqrt(len(tags))
+        # Exercises carrying each tag, the candidates for a plan day's focus
+        self.tag_rows = {tag: np.flatnonzero(self.columns[index]) for tag, index in TAG_INDEX.items()}
+
+        self.cache_size = max(0, cache_size)
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+    # Profiles -----------------------------------------------------------
+
+    def normalize_profile(self, profile: dict) -> Dict[str, Any]:
+        """Accepts both the snake_case and camelCase field names clients send"""
+        level = parse_level(profile.get("fitness_level") or profile.get("fitnessLevel") or "beginner")
+        goals = profile.get("goals") or []
+        if isinstance(goals, str):
+            goals = [goals]
+        goals = sorted({fold_text(goal) for goal in goals if goal})
+        days = profile.get("daysPerWeek") or profile.get("days_per_week") or DAYS_BY_LEVEL[level]
+        minutes = (profile.get("minutesPerDay") or profile.get("minutes_per_day")
+                   or profile.get("availableTime") or MINUTES_BY_LEVEL[level])
+        limit = profile.get("limit") or 6
+        return {
+            "level": level,
+            "goals": goals,
+            "history": sorted(self._history_rows(profile)),
+            "days": min(7, max(1, int(days))),
+            "minutes": min(180, max(10, int(minutes))),
+            "limit": min(50, max(1, int(limit))),
+        }
+
+    def _history_rows(self, profile: dict) -> set:
+        """Catalog rows of recently done exercises, by id or name"""
+        history = profile.get("workout_history") or profile.get("history") or []
+        rows = set()
+        for entry in history if isinstance(history, list) else []:
+            if isinstance(entry, dict):
+                key = entry.get("exercise_id", entry.get("exerciseId", entry.get("exercise", entry.get("name"))))
+            else:
+                key = entry
+            if isinstance(key, str) and key.isdigit():
+                key = int(key)
+            row = self.id_rows.get(key)
+            if row is None and key is not None:
+                row = self.name_rows.get(fold_text(key))
+            if row is not None:
+                rows.add(row)
+        return rows
+
+    def goal_weights(self, goals: Iterable[str]) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        for goal in goals:
+            for phrases, tag_weights in GOAL_WEIGHTS:
+                if any(_has_phrase(goal, phrase) for phrase in phrases):
+                    for tag, weight in tag_weights.items():
+                        weights[tag] = max(weights.get(tag, 0.0), weight)
+        return weights or dict(DEFAULT_GOAL_WEIGHTS)
+
+    def profile_vector(self, level: int, goal_weights: Dict[str, float]) -> np.ndarray:
+        vector = np.zeros(len(self.columns), dtype=np.float32)
+        vector[:len(LEVELS)] = LEVEL_WEIGHTS[level]
+        for tag, weight in goal_weights.items():
+            vector[TAG_INDEX[tag]] = weight
+        return vector
+
+    def scores(self, normalized: Dict[str, Any], vector: np.ndarray) -> np.ndarray:
+        """Score of every catalog exercise for a normalized profile's vector"""
+        scores = vector @ self.columns
+        if normalized["history"]:
+            scores[normalized["history"]] -= HISTORY_PENALTY
+        return scores
+
+    # Results ------------------------------------------------------------
+
+    def _cached(self, kind: str, normalized: Dict[str, Any], build) -> dict:
+        key = hashlib.sha1(
+            json.dumps([kind, normalized], sort_keys=True).encode()
+        ).hexdigest()
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        result = build(normalized)
+        if self.cache_size:
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def recommend(self, profile: dict) -> dict:
+        """Top exercises for a profile, spread across categories"""
+        return self._cached("recommend", self.normalize_profile(profile), self._recommend)
+
+    def weekly_plan(self, profile: dict) -> dict:
+        """7-day plan: training days filled from the scores, the rest rest days"""
+        return self._cached("plan", self.normalize_profile(profile), self._weekly_plan)
+
+    def _recommend(self, normalized: Dict[str, Any]) -> dict:
+        level = normalized["level"]
+        limit = normalized["limit"]
+        goal_weights = self.goal_weights(normalized["goals"])
+        vector = self.profile_vector(level, goal_weights)
+        scores = self.scores(normalized, vector)
+
+        # Prefer one exercise per category before repeating a category
+        candidates = _top_rows(scores, limit * 4)
+        picked, seen = [], set()
+        for row in candidates:
+            exercise = self.exercises[row]
+            category = exercise.get("category_id", exercise.get("category"))
+            if category not in seen:
+                picked.append(row)
+                seen.add(category)
+        for row in candidates:
+            if len(picked) >= limit:
+                break
+            if row not in picked:
+                picked.append(row)
+        picked = sorted(picked[:limit], key=lambda row: -scores[row])
+
+        return {
+            "recommended_exercises": self._entries(picked, level, scores, vector),
+            "workout_plan": {
+                "duration": normalized["minutes"],
+                "difficulty": LEVELS[level],
+                "focus_areas": [FOCUS_NAMES.get(tag, REASONS[tag]) for tag in
+                                sorted(goal_weights, key=goal_weights.get, reverse=True)[:3]],
+            },
+            "tips": list(TIPS),
+        }
+
+    def _weekly_plan(self, normalized: Dict[str, Any]) -> dict:
+        level = normalized["level"]
+        goal_weights = self.goal_weights(normalized["goals"])
+        vector = self.profile_vector(level, goal_weights)
+        scores = self.scores(normalized, vector)
+        focuses = self._focus_cycle(goal_weights)
+
+        # Ranked candidates per focus, computed once for the whole week: the
+        # focus's own exercises, or the overall best if the catalog has none
+        candidates = {}
+        for focus in focuses:
+            rows = self.tag_rows[focus]
+            if len(rows):
+                candidates[focus] = rows[_top_rows(scores[rows], FOCUS_CANDIDATES)]
+            else:
+                candidates[focus] = _top_rows(scores, FOCUS_CANDIDATES)
+
+        sets = SETS_BY_LEVEL[level]
+        rest = REST_SECONDS_BY_LEVEL[level]
+        budget = normalized["minutes"] * 60
+        training_days = TRAINING_DAYS[normalized["days"]]
+        used: set = set()
+        days, exercises = [], []
+        for day in range(1, 8):
+            if day not in training_days:
+                days.append({"day": day, "rest": True, "focus": None, "exercises": []})
+                continue
+            focus = focuses[training_days.index(day) % len(focuses)]
+            # Exercises not yet in this week's plan first, then repeats
+            ranked = sorted(candidates[focus], key=lambda row: row in used)
+            picked, seconds = [], 0.0
+            for row in ranked:
+                cost = sets * (float(self.seconds[row]) + rest)
+                if picked and (seconds + cost > budget or len(picked) >= MAX_EXERCISES_PER_DAY):
+                    break
+                used.add(row)
+                seconds += cost
+                picked.append(row)
+            entries = self._entries(picked, level, scores, vector)
+            for entry in entries:
+                entry.update({"day": day, "restTime": rest})
+            exercises.extend(entries)
+            days.append({
+                "day": day,
+                "rest": False,
+                "focus": FOCUS_NAMES[focus],
+                "minutes": round(seconds / 60),
+                "exercises": entries,
+            })
+
+        return {
+            "plan": {
+                "name": "Kế hoạch tập 7 ngày",
+                "duration": 7,
+                "difficulty": LEVELS[level],
+                "daysPerWeek": len(training_days),
+                "days": days,
+                "exercises": exercises,
+            }
+        }
+
+    def _focus_cycle(self, goal_weights: Dict[str, float]) -> List[str]:
+        """Day focuses: the goals' tags by weight, padded to at least three"""
+        focuses = [tag for tag in sorted(goal_weights, key=goal_weights.get, reverse=True)
+                   if tag in FOCUS_ORDER]
+        for tag in FOCUS_ORDER:
+            if len(focuses) >= 3:
+                break
+            if tag not in focuses:
+                focuses.append(tag)
+        return focuses
+
+    def _entries(self, rows: Sequence[int], level: int, scores: np.ndarray,
+                 vector: np.ndarray) -> List[dict]:
+        """Response entries for catalog rows, with the goal each one serves best"""
+        rows = np.asarray(rows, dtype=np.intp)
+        # Each tag's share of the score decides the reason shown
+        contributions = self.columns[len(LEVELS):, rows] * vector[len(LEVELS):, None]
+        best_tags = contributions.argmax(axis=0)
+        entries = []
+        for i, row in enumerate(rows.tolist()):
+            exercise = self.exercises[row]
+            tag = TAGS[best_tags[i]]
+            entries.append({
+                "id": self.ids[row],
+                "category_id": exercise.get("category_id"),
+                "exercise": exercise["name"],
+                "difficulty": exercise.get("difficulty"),
+                "sets": SETS_BY_LEVEL[level],
+                "reps": int(self.reps[row]),
+                "duration": exercise.get("duration"),
+                "reason": REASONS[tag] if contributions[best_tags[i], i] > 0 else LEVEL_REASON,
+                "score": round(float(scores[row]), 3),
+            })
+        return entries
+
+    def cache_stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / total if total else 0.0,
+        }
+
+
+def _top_rows(scores: np.ndarray, count: int) -> np.ndarray:
+    """Indices of the `count` best scores, best first"""
+    count = min(count, len(scores))
+    rows = np.argpartition(scores, len(scores) - count)[len(scores) - count:]
+    return rows[np.argsort(-scores[rows], kind="stable")]
+
+
+def _parse_reps(value: Any) -> int:
+    match = re.search(r"x\s*(\d+)", str(value or ""))
+    return int(match.group(1)) if match else 10
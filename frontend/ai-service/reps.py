@@ -0,0 +1,87 @@
+"""
+Per-session rep counting.
+
+A small hysteresis state machine runs on the joint-angle stream of one
+session. A rep is a descent below `down_angle` followed by a return above
+`up_angle`; the gap between the two thresholds keeps landmark jitter around a
+single threshold from counting phantom reps. Each update is O(1) and the
+counter keeps only a fixed-size ring buffer of recent angles.
+
+Usage:
+    counter = RepCounter(RepProfile(angle="left_knee", down_angle=100, up_angle=160))
+    counter.update(angles["left_knee"], time.monotonic())
+    counter.count, counter.last_rep_duration, counter.time_under_tension
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RepProfile:
+    """Which angle drives the rep and where its phase thresholds are."""
+    angle: str
+    down_angle: float
+    up_angle: float
+
+
+PHASE_UP = "up"
+PHASE_DOWN = "down"
+
+
+class RepCounter:
+    """Hysteresis-based phase detector with rep tempo and time under tension."""
+
+    def __init__(self, profile: RepProfile, history_size: int = 64):
+        self.profile = profile
+        self.phase = PHASE_UP
+        self.count = 0
+        # Seconds from leaving the top to returning to it, for the last rep
+        self.last_rep_duration: Optional[float] = None
+        # Total seconds spent away from the top position
+        self.time_under_tension = 0.0
+
+        self._rep_started: Optional[float] = None
+        self._last_time: Optional[float] = None
+        self._angles = np.zeros(history_size, dtype=np.float32)
+        self._times = np.zeros(history_size, dtype=np.float64)
+        self._next = 0
+        self._filled = 0
+
+    def update(self, angle: float, timestamp: float) -> int:
+        """Feed one frame's driving angle; returns the running rep count."""
+        profile = self.profile
+        at_top = angle >= profile.up_angle
+
+        if self._last_time is not None and not at_top and self._rep_started is not None:
+            self.time_under_tension += timestamp - self._last_time
+
+        if self.phase == PHASE_UP:
+            if at_top:
+                # Still at the top: the next rep starts when we leave it
+                self._rep_started = None
+            elif self._rep_started is None:
+                self._rep_started = timestamp
+            if angle <= profile.down_angle:
+                self.phase = PHASE_DOWN
+        elif at_top:
+            self.phase = PHASE_UP
+            self.count += 1
+            if self._rep_started is not None:
+                self.last_rep_duration = timestamp - self._rep_started
+            self._rep_started = None
+
+        self._last_time = timestamp
+        self._angles[self._next] = angle
+        self._times[self._next] = timestamp
+        self._next = (self._next + 1) % len(self._angles)
+        self._filled = min(self._filled + 1, len(self._angles))
+        return self.count
+
+    def recent(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, angles) from the ring buffer, oldest first (copies)."""
+        if self._filled < len(self._angles):
+            return self._times[:self._filled].copy(), self._angles[:self._filled].copy()
+        return np.roll(self._times, -self._next), np.roll(self._angles, -self._next)
@@ -0,0 +1,145 @@
+"""
+Per-session MediaPipe pose tracker pool.
+
+MediaPipe's `Pose` keeps temporal tracking state between calls, so every
+client stream needs its own instance: sharing one object lets concurrent users
+corrupt each other's tracking and serializes all inference behind one lock.
+
+Sessions are kept in LRU order and bounded both by count and by idle time so
+memory stays flat with hundreds of concurrent streams.
+
+Usage:
+    pool = PoseSessionPool(create_pose, max_sessions=256, idle_timeout=300)
+    with pool.acquire(session_id) as session:
+        results = session.pose.process(image)
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoseSession:
+    """Tracking state owned by a single client stream."""
+    session_id: str
+    pose: Any
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+    closed: bool = False
+    # Crop (x0, y0, x1, y1) around the last detected pose, for the frame size it was computed on
+    roi: Optional[Tuple[int, int, int, int]] = None
+    roi_frame_size: Optional[Tuple[int, int]] = None
+    # Rep counter for the exercise currently being performed
+    reps: Optional[Any] = None
+    # Per-stream filters, built by the pool's `state_factory`
+    landmark_filter: Optional[Any] = None
+    score_hysteresis: Optional[Any] = None
+    frame_cache: Optional[Any] = None
+
+    def close(self):
+        """Release the MediaPipe graph once any in-flight frame has finished."""
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.pose.close()
+
+
+class PoseSessionPool:
+    """Session-keyed pool of `Pose` instances with LRU and idle-timeout eviction."""
+
+    def __init__(self, factory: Callable[[], Any], max_sessions: int = 256,
+                 idle_timeout: float = 300.0,
+                 state_factory: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.factory = factory
+        self.state_factory = state_factory
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self._sessions: "OrderedDict[str, PoseSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> PoseSession:
+        """Return the session for `session_id`, creating it if needed."""
+        now = time.monotonic()
+        evicted: List[PoseSession] = []
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+            evicted.extend(self._pop_expired(now))
+
+        if session is None:
+            # Building a graph is slow; do it outside the pool lock
+            state = self.state_factory() if self.state_factory else {}
+            created = PoseSession(session_id, self.factory(), **state)
+            with self._lock:
+                session = self._sessions.setdefault(session_id, created)
+                if session is created:
+                    while len(self._sessions) > self.max_sessions:
+                        evicted.append(self._sessions.popitem(last=False)[1])
+            if session is not created:
+                # Another thread created the same session first
+                created.close()
+
+        if evicted:
+            logger.debug(f"Evicting {len(evicted)} pose sessions")
+        for stale in evicted:
+            stale.close()
+        return session
+
+    @contextmanager
+    def acquire(self, session_id: str) -> Iterator[PoseSession]:
+        """Hold the session exclusively while processing one frame."""
+        while True:
+            session = self.get(session_id)
+            with session.lock:
+                # The session may have been evicted between lookup and locking
+                if session.closed:
+                    continue
+                session.last_used = time.monotonic()
+                yield session
+                return
+
+    def remove(self, session_id: str):
+        """Drop a session explicitly, e.g. when its stream disconnects."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def evict_idle(self) -> int:
+        """Close every session idle for longer than `idle_timeout`."""
+        with self._lock:
+            expired = self._pop_expired(time.monotonic())
+        for session in expired:
+            session.close()
+        return len(expired)
+
+    def close(self):
+        """Close all sessions."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def _pop_expired(self, now: float) -> List[PoseSession]:
+        # Sessions are in LRU order, so only the head can be idle
+        expired = []
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used <= self.idle_timeout:
+                break
+            expired.append(self._sessions.popitem(last=False)[1])
+        return expired
@@ -0,0 +1,113 @@
+"""
+Landmark smoothing and score hysteresis for session streams.
+
+MediaPipe landmarks jitter from frame to frame, which makes angle-based
+scores jump between threshold bands and the UI flicker. `LandmarkFilter` runs
+a One-Euro filter (Casiez et al., 2012) over the (33, 4) landmark array: it
+smooths heavily while a joint is still and follows quickly when it moves.
+Each joint's update is weighted by its visibility, and joints below
+`min_visibility` are held at their last estimate instead of following noise.
+
+All working arrays are allocated once per session; a frame update only runs
+in-place NumPy ufuncs.
+
+`ScoreHysteresis` keeps the previous score band until the driving angle has
+moved clearly past the threshold, so a joint hovering at 90 degrees doesn't
+alternate between two feedback messages.
+"""
+
+import math
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from angles import NUM_LANDMARKS
+
+
+class LandmarkFilter:
+    """Visibility-weighted One-Euro filter over a (33, 4) landmark array."""
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 10.0,
+                 d_cutoff: float = 1.0, min_visibility: float = 0.5):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.min_visibility = min_visibility
+
+        shape = (NUM_LANDMARKS, 3)
+        self._x = np.zeros(shape, dtype=np.float32)
+        self._dx = np.zeros(shape, dtype=np.float32)
+        self._alpha = np.zeros(shape, dtype=np.float32)
+        self._scratch = np.zeros(shape, dtype=np.float32)
+        self._weight = np.zeros((NUM_LANDMARKS, 1), dtype=np.float32)
+        self._visible = np.zeros((NUM_LANDMARKS, 1), dtype=bool)
+        self._last_time: Optional[float] = None
+
+    def reset(self):
+        """Forget the current estimate, e.g. after the pose was lost."""
+        self._last_time = None
+
+    def __call__(self, points: np.ndarray, timestamp: float) -> np.ndarray:
+        """Filter `points` in place and return it"""
+        xyz = points[:, :3]
+        if self._last_time is None:
+            np.copyto(self._x, xyz)
+            self._dx.fill(0.0)
+            self._last_time = timestamp
+            return points
+
+        dt = max(timestamp - self._last_time, 1e-3)
+        self._last_time = timestamp
+
+        # Joints too uncertain to trust keep their previous estimate
+        np.greater_equal(points[:, 3:], self.min_visibility, out=self._visible)
+        np.multiply(points[:, 3:], self._visible, out=self._weight)
+
+        # Smoothed derivative: dx += alpha_d * (raw_dx - dx)
+        scratch = self._scratch
+        np.subtract(xyz, self._x, out=scratch)
+        scratch /= dt
+        scratch -= self._dx
+        scratch *= self._smoothing_factor(self.d_cutoff, dt)
+        scratch *= self._visible
+        self._dx += scratch
+
+        # Cutoff grows with speed; alpha = r / (r + 1) with r = 2*pi*cutoff*dt
+        np.abs(self._dx, out=self._alpha)
+        self._alpha *= self.beta
+        self._alpha += self.min_cutoff
+        self._alpha *= 2.0 * math.pi * dt
+        np.add(self._alpha, 1.0, out=scratch)
+        self._alpha /= scratch
+        self._alpha *= self._weight
+
+        # Estimate: x += alpha * (raw - x)
+        np.subtract(xyz, self._x, out=scratch)
+        scratch *= self._alpha
+        self._x += scratch
+
+        np.copyto(xyz, self._x)
+        return points
+
+    @staticmethod
+    def _smoothing_factor(cutoff: float, dt: float) -> float:
+        r = 2.0 * math.pi * cutoff * dt
+        return r / (r + 1.0)
+
+
+class ScoreHysteresis:
+    """Keep the previous score band while the angle is near a band threshold."""
+
+    def __init__(self, margin: float = 5.0):
+        self.margin = margin
+        self._last: Optional[Tuple[str, int]] = None
+
+    def apply(self, key: str, band_of: Callable[[float], int], angle: float) -> int:
+        """Band for `angle`; stick with the previous band within `margin` degrees"""
+        band = band_of(angle)
+        last = self._last
+        if self.margin > 0 and last is not None and last[0] == key and band != last[1]:
+            if band_of(angle - self.margin) == last[1] or band_of(angle + self.margin) == last[1]:
+                band = last[1]
+        self._last = (key, band)
+        return band
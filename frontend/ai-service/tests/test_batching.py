@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+import pytest
+
+from batching import MicroBatcher
+from inference import InferenceOverloaded, InferencePool
+
+
+def gather(batcher, items):
+    async def run():
+        return await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+    return asyncio.run(run())
+
+
+def test_queue_bound_counts_frames_not_chunks():
+    release = threading.Event()
+    seen = []
+
+    def handler(items):
+        release.wait(5)
+        seen.extend(items)
+        return items
+
+    pool = InferencePool(max_workers=1, max_queue=2)
+    batcher = MicroBatcher(handler, pool, window_ms=50, max_batch=64)
+
+    async def run():
+        tasks = [asyncio.ensure_future(batcher.submit(i)) for i in range(40)]
+        await asyncio.sleep(0.2)
+        assert pool.in_flight <= pool.max_workers + pool.max_queue
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+    admitted = [r for r in results if not isinstance(r, Exception)]
+    rejected = [r for r in results if isinstance(r, InferenceOverloaded)]
+    assert len(admitted) == 3
+    assert len(rejected) == 37
+    assert sorted(seen) == sorted(admitted)
+    assert pool.in_flight == 0 and pool.queue_depth == 0
+
+
+def test_pool_rejects_weight_beyond_capacity():
+    pool = InferencePool(max_workers=1, max_queue=2)
+    try:
+        with pytest.raises(InferenceOverloaded):
+            asyncio.run(pool.run(len, [1, 2, 3, 4], weight=4))
+        assert asyncio.run(pool.run(len, [1, 2, 3], weight=3)) == 3
+        assert pool.in_flight == 0
+    finally:
+        pool.shutdown()
+
+
+def test_items_with_same_key_stay_in_order():
+    chunks = []
+
+    def handler(items):
+        chunks.append(list(items))
+        return [item[1] for item in items]
+
+    pool = InferencePool(max_workers=2, max_queue=32)
+    batcher = MicroBatcher(handler, pool, window_ms=0, max_batch=8, key=lambda item: item[0])
+    items = [("a", 0), ("b", 0), ("a", 1), ("b", 1), ("a", 2)]
+    try:
+        assert gather(batcher, items) == [0, 0, 1, 1, 2]
+    finally:
+        pool.shutdown()
+
+    for session in ("a", "b"):
+        order = [item[1] for chunk in chunks for item in chunk if item[0] == session]
+        assert order == sorted(order)
+
+
+def test_exception_result_fails_only_its_item():
+    def handler(items):
+        return [ValueError(item) if item == 2 else item * 10 for item in items]
+
+    pool = InferencePool(max_workers=1, max_queue=8)
+    batcher = MicroBatcher(handler, pool, window_ms=20, max_batch=8)
+    try:
+        results = gather(batcher, [1, 2, 3])
+    finally:
+        pool.shutdown()
+
+    assert results[0] == 10 and results[2] == 30
+    assert isinstance(results[1], ValueError)
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from chat import IntentMatcher, KeywordAutomaton, compile_intent, load_intents
+
+INTENTS_FILE = os.path.join(os.path.dirname(__file__), "..", "intents.json")
+
+
+def matcher(*specs, cache_size=8):
+    return IntentMatcher([compile_intent(spec) for spec in specs], "fallback", cache_size)
+
+
+def intent(intent_id, keywords, **extra):
+    return {"id": intent_id, "keywords": keywords, "response": f"{intent_id} answer", **extra}
+
+
+def test_automaton_reports_overlapping_keywords():
+    automaton = KeywordAutomaton(["he", "she", "hers"])
+    found = sorted(automaton.find("ushers"))
+    assert found == [(3, 0), (3, 1), (5, 2)]
+
+
+def test_diacritics_and_case_are_folded():
+    chat = matcher(intent("weight_loss", ["Giảm cân", "đốt mỡ"]))
+    for message in ("GIẢM CÂN thế nào?", "giam can", "Muốn dot mo"):
+        assert chat.respond(message)["intents"][0]["id"] == "weight_loss"
+
+
+def test_keywords_match_whole_words_only():
+    chat = matcher(intent("greeting", ["hi"]), intent("cardio", ["hiit"]))
+    assert [m["id"] for m in chat.respond("hi, bạn")["intents"]] == ["greeting"]
+    assert [m["id"] for m in chat.respond("tập hiit")["intents"]] == ["cardio"]
+    assert chat.respond("chill")["response"] == "fallback"
+
+
+def test_longer_phrases_and_priority_rank_first():
+    chat = matcher(
+        intent("back", ["lưng"]),
+        intent("back_pain", ["đau lưng dưới"]),
+        intent("greeting", ["hello"], priority=0.5),
+    )
+    ranked = [m["id"] for m in chat.respond("hello, tôi bị đau lưng dưới")["intents"]]
+    assert ranked == ["back_pain", "back", "greeting"]
+
+
+def test_repeated_keyword_counts_once():
+    chat = matcher(intent("plank", ["plank"]), intent("squat", ["squat"]))
+    scores = {m["id"]: m["score"] for m in chat.respond("plank plank plank squat")["intents"]}
+    assert scores == {"plank": 1.0, "squat": 1.0}
+
+
+def test_folded_messages_share_a_cache_entry():
+    chat = matcher(intent("weight_loss", ["giảm cân"]), cache_size=1)
+    first = chat.respond("Giảm cân?")
+    assert chat.respond("giam can") is first
+    chat.respond("khác")
+    assert chat.cache_stats()["entries"] == 1
+    assert chat.cache_stats()["hits"] == 1
+
+
+def test_invalid_intents_are_rejected():
+    with pytest.raises(ValueError):
+        compile_intent(intent("empty", ["!!!"]))
+    with pytest.raises(ValueError):
+        matcher(intent("dup", ["a"]), intent("dup", ["b"]))
+
+
+def test_shipped_intents_load():
+    chat = load_intents(INTENTS_FILE)
+    assert chat.respond("Tôi muốn giảm cân")["intents"][0]["id"] == "weight_loss"
@@ -0,0 +1,84 @@
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from framering import FrameRing, RingFull, RingPosePool, RingReader
+from inference import InferenceOverloaded
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(slots=2, max_side=32, overflow="reject")
+    yield ring
+    ring.close()
+
+
+def frame(value, height=16, width=24):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def test_write_round_trips_pixels(ring):
+    ref = ring.write(frame(7))
+    assert (ref.height, ref.width) == (16, 24)
+    assert (ring.view(ref) == 7).all()
+    assert ring.in_use == 1
+
+
+def test_large_frames_are_downscaled_to_fit(ring):
+    ref = ring.write(frame(1, height=64, width=128))
+    assert max(ref.height, ref.width) == ring.max_side
+
+
+def test_full_ring_rejects_until_a_slot_is_released(ring):
+    first = ring.write(frame(1))
+    ring.write(frame(2))
+    with pytest.raises(RingFull):
+        ring.write(frame(3))
+    assert ring.overflows == 1
+
+    ring.release(first)
+    reused = ring.write(frame(3))
+    assert reused.slot == first.slot
+    assert reused.generation == first.generation + 1
+    assert (ring.view(reused) == 3).all()
+
+
+def test_block_policy_raises_after_timeout():
+    ring = FrameRing(slots=1, max_side=32, overflow="block", timeout=0.01)
+    try:
+        ring.write(frame(1))
+        with pytest.raises(RingFull):
+            ring.write(frame(2))
+    finally:
+        ring.close()
+
+
+def test_release_twice_raises(ring):
+    ref = ring.write(frame(1))
+    ring.release(ref)
+    with pytest.raises(ValueError):
+        ring.release(ref)
+
+
+def test_reader_detects_a_reused_slot(ring):
+    reader = RingReader(**ring.spec())
+    try:
+        stale = ring.write(frame(1))
+        assert (reader.view(stale) == 1).all()
+        ring.release(stale)
+        ring.write(frame(2))
+        ring.write(frame(3))
+        with pytest.raises(ValueError):
+            reader.view(stale)
+    finally:
+        reader.close()
+
+
+def test_worker_timeout_is_an_overload(ring):
+    # No worker processes: submit hands out a future nobody resolves
+    workers = RingPosePool.__new__(RingPosePool)
+    workers.timeout = 0.01
+    workers.submit = lambda ref, model_complexity: Future()
+    with pytest.raises(InferenceOverloaded):
+        workers.run(ring.write(frame(1)))
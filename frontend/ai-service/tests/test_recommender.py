@@ -0,0 +1,79 @@
+import os
+
+from recommender import RecommendationEngine, load_catalog_file
+
+SEED_CATALOG = os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "data", "exercises.json")
+
+BACKEND_CATALOG = {
+    "categories": [
+        {"id": 1, "name": "Chân & Mông", "category": "strength", "difficulty": "Easy", "description": ""},
+        {"id": 2, "name": "Cardio", "category": "cardio", "difficulty": "Medium", "description": ""},
+    ],
+    "exercises": [
+        {"id": 10, "category_id": 1, "name": "Squat", "duration": "45 giây", "reps": "3 x 12",
+         "difficulty": "Easy", "thumbnail": "", "videoUrl": ""},
+        {"id": 11, "category_id": 1, "name": "Lunge", "duration": "45 giây", "reps": "3 x 10",
+         "difficulty": "Easy", "thumbnail": "", "videoUrl": ""},
+        {"id": 20, "category_id": 2, "name": "Burpee", "duration": "30 giây", "reps": "3 x 15",
+         "difficulty": "Easy", "thumbnail": "", "videoUrl": ""},
+    ],
+}
+
+
+def names(result):
+    return [entry["exercise"] for entry in result["recommended_exercises"]]
+
+
+def test_seed_catalog_returns_the_seeded_ids():
+    seed = load_catalog_file(SEED_CATALOG)["exercises"]
+    engine = RecommendationEngine({"exercises": seed})
+    result = engine.recommend({"fitness_level": "beginner", "goals": ["giảm cân"]})
+    assert len(result["recommended_exercises"]) == len(engine)
+    ids = {entry["id"] for entry in result["recommended_exercises"]}
+    assert ids == {exercise["_id"] for exercise in seed}
+    assert all(len(value) == 24 for value in ids)
+    assert "Mountain Climbers" in names(result)
+
+
+def test_history_matches_seed_exercises_by_name():
+    engine = RecommendationEngine(load_catalog_file(SEED_CATALOG))
+    profile = {"fitness_level": "beginner", "goals": ["core"], "limit": 1}
+    best = names(engine.recommend(profile))[0]
+    after = names(engine.recommend({**profile, "workout_history": [{"exercise": best.upper()}]}))[0]
+    assert after != best
+
+
+def test_backend_ids_are_returned_and_matched():
+    engine = RecommendationEngine(BACKEND_CATALOG)
+    profile = {"fitness_level": "beginner", "goals": ["chân"], "limit": 1}
+    first = engine.recommend(profile)["recommended_exercises"][0]
+    assert first["id"] in (10, 11)
+    again = engine.recommend({**profile, "workout_history": [str(first["id"])]})
+    assert again["recommended_exercises"][0]["id"] != first["id"]
+
+
+def test_mongoexport_object_ids():
+    catalog = {"exercises": [dict(exercise, _id={"$oid": f"{i:024x}"}, id=None)
+                             for i, exercise in enumerate(BACKEND_CATALOG["exercises"])]}
+    for exercise in catalog["exercises"]:
+        del exercise["id"]
+    engine = RecommendationEngine(catalog)
+    assert engine.ids == [f"{i:024x}" for i in range(3)]
+
+
+def test_results_are_cached_per_normalized_profile_with_lru_eviction():
+    engine = RecommendationEngine(BACKEND_CATALOG, cache_size=2)
+    first = engine.recommend({"fitness_level": "beginner", "goals": ["Giảm cân"]})
+    assert engine.recommend({"fitnessLevel": "beginner", "goals": ["giam can"]}) is first
+    engine.recommend({"fitness_level": "advanced"})
+    engine.recommend({"fitness_level": "intermediate"})
+    assert engine.cache_stats()["entries"] == 2
+    assert engine.recommend({"fitness_level": "beginner", "goals": ["giảm cân"]}) is not first
+
+
+def test_weekly_plan_has_rest_days_and_respects_days_per_week():
+    engine = RecommendationEngine(load_catalog_file(SEED_CATALOG))
+    plan = engine.weekly_plan({"fitnessLevel": "intermediate", "daysPerWeek": 3})["plan"]
+    training = [day for day in plan["days"] if not day["rest"]]
+    assert len(plan["days"]) == 7 and len(training) == 3
+    assert all(day["exercises"] for day in training)
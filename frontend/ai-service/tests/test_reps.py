@@ -0,0 +1,56 @@
+import pytest
+
+from reps import PHASE_DOWN, PHASE_UP, RepCounter, RepProfile
+
+PROFILE = RepProfile(angle="left_knee", down_angle=100, up_angle=160)
+
+
+def feed(counter, angles, step=0.1):
+    for index, angle in enumerate(angles):
+        counter.update(angle, index * step)
+    return counter
+
+
+def test_full_descent_and_return_counts_one_rep():
+    counter = feed(RepCounter(PROFILE), [170, 130, 90, 130, 170])
+    assert counter.count == 1
+    assert counter.phase == PHASE_UP
+
+
+def test_jitter_between_thresholds_counts_nothing():
+    counter = feed(RepCounter(PROFILE), [170, 155, 165, 150, 165, 105, 165])
+    assert counter.count == 0
+
+
+def test_jitter_around_bottom_counts_one_rep():
+    counter = feed(RepCounter(PROFILE), [170, 95, 105, 95, 110, 90, 170])
+    assert counter.count == 1
+
+
+def test_phase_stays_down_until_the_top_is_reached():
+    counter = feed(RepCounter(PROFILE), [170, 90, 150])
+    assert counter.phase == PHASE_DOWN
+    assert counter.count == 0
+
+
+def test_rep_duration_and_time_under_tension():
+    counter = feed(RepCounter(PROFILE), [170, 170, 130, 90, 130, 170, 170], step=0.5)
+    assert counter.count == 1
+    # Left the top at t=1.0, back at t=2.5
+    assert counter.last_rep_duration == pytest.approx(1.5)
+    assert counter.time_under_tension == pytest.approx(1.0)
+
+
+def test_recent_returns_samples_oldest_first():
+    counter = feed(RepCounter(PROFILE, history_size=4), [170, 160, 150])
+    times, angles = counter.recent()
+    assert times.tolist() == pytest.approx([0.0, 0.1, 0.2])
+    assert angles.tolist() == [170, 160, 150]
+
+
+def test_recent_wraps_at_capacity():
+    counter = feed(RepCounter(PROFILE, history_size=4), [170, 160, 150, 140, 130, 120])
+    times, angles = counter.recent()
+    assert len(angles) == 4
+    assert angles.tolist() == [150, 140, 130, 120]
+    assert times.tolist() == pytest.approx([0.2, 0.3, 0.4, 0.5])
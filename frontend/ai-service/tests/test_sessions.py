@@ -0,0 +1,46 @@
+import time
+import types
+
+import pytest
+
+import sessions
+from sessions import PoseSessionPool
+
+
+class FakePose:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [time.monotonic()]
+    monkeypatch.setattr(sessions, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_evict_idle_closes_only_idle_sessions(clock):
+    pool = PoseSessionPool(FakePose, idle_timeout=10)
+    with pool.acquire("old") as old:
+        pass
+    clock[0] += 8
+    with pool.acquire("recent") as recent:
+        pass
+    clock[0] += 5
+
+    assert pool.evict_idle() == 1
+    assert old.closed and old.pose.closed
+    assert not recent.closed
+    assert len(pool) == 1
+
+
+def test_evict_idle_without_idle_sessions(clock):
+    pool = PoseSessionPool(FakePose, idle_timeout=10)
+    with pool.acquire("a") as session:
+        pass
+    clock[0] += 5
+    assert pool.evict_idle() == 0
+    assert not session.closed
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main.pose_ready, "is_set", lambda: True)
+    return TestClient(main.app)
+
+
+def test_failed_frame_keeps_the_stream_open(client, monkeypatch):
+    calls = []
+
+    async def run_frame_job(job):
+        calls.append(job)
+        if len(calls) == 1:
+            raise RuntimeError("No pose model tier is available")
+        raise ValueError("bad frame")
+
+    monkeypatch.setattr(main, "run_frame_job", run_frame_job)
+    with client.websocket_connect("/ws/analyze-pose") as websocket:
+        websocket.send_bytes(b"frame-1")
+        first = json.loads(websocket.receive_text())
+        websocket.send_bytes(b"frame-2")
+        second = json.loads(websocket.receive_text())
+
+    assert first["success"] is False and first["status"] == "error"
+    assert second["success"] is False and "bad frame" in second["feedback"]
+    assert len(calls) == 2
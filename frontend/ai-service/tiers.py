@@ -0,0 +1,184 @@
+"""
+MediaPipe model-complexity tiers with adaptive degradation.
+
+Pose offers three model complexities: 0 (lite, fastest), 1 (full) and
+2 (heavy, most accurate). Clients may ask for a tier per request or per
+session; `TierController` caps what they get while the inference queue is
+slow, stepping the cap down one tier when queue wait crosses
+`degrade_ms` and back up once it falls below `recover_ms`. A cooldown between
+steps keeps the cap from flapping, since every switch restarts tracking for
+the affected sessions.
+
+Building a `Pose` graph and running its first frame takes hundreds of
+milliseconds (and may download the model file), so instances come from
+`PosePool`s that are warmed at startup and reused: static-image instances are
+borrowed per frame, tracking instances for the lifetime of a session's tier.
+
+Usage:
+    pools = {tier: PosePool(lambda: create_pose(model_complexity=tier)) for tier in MODEL_TIERS}
+    controller = TierController(enabled=pools, default_tier=1)
+    tier = controller.resolve(requested_tier)
+    pose = pools[tier].acquire()
+    try:
+        results = pose.process(image)
+    finally:
+        pools[tier].release(pose)
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_TIERS = (0, 1, 2)
+
+
+def parse_model_tier(value: Optional[Union[str, int]]) -> Optional[int]:
+    """Validate a requested tier; None means the default. Raises ValueError"""
+    if value is None or value == "":
+        return None
+    try:
+        tier = int(value)
+    except (TypeError, ValueError):
+        tier = None
+    if tier not in MODEL_TIERS:
+        raise ValueError(
+            f"Unknown model tier '{value}', expected one of {', '.join(map(str, MODEL_TIERS))}"
+        )
+    return tier
+
+
+class PosePool:
+    """Reusable `Pose` instances of one configuration."""
+
+    def __init__(self, factory: Callable[[], Any], max_idle: int = 4, reset: bool = False):
+        self.factory = factory
+        self.max_idle = max(0, max_idle)
+        # Tracking graphs carry the previous user's state and must be reset
+        self.reset = reset
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def warm(self, count: int, frame: Optional[np.ndarray] = None):
+        """Create `count` idle instances and run one frame through each
+
+        The first `process` call initializes the graph, so warmed instances
+        answer their first real frame at steady-state speed.
+        """
+        if frame is None:
+            frame = np.zeros((256, 256, 3), dtype=np.uint8)
+        poses = [self.factory() for _ in range(count)]
+        for pose in poses:
+            pose.process(frame)
+            self.release(pose)
+
+    def acquire(self) -> Any:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.factory()
+
+    def release(self, pose: Any):
+        if self.reset:
+            pose.reset()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(pose)
+                return
+        pose.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pose in idle:
+            pose.close()
+
+
+class TieredPose:
+    """A session's tracking `Pose` that can change tier between frames.
+
+    Stands in for a plain `Pose` on `PoseSession.pose`. The instance is
+    borrowed from the tier's pool on the first frame and returned on `close`.
+    """
+
+    def __init__(self, pools: Dict[int, PosePool]):
+        self.pools = pools
+        # Tier the client asked for, kept so later frames can omit it
+        self.requested: Optional[int] = None
+        self.tier: Optional[int] = None
+        self._pose: Optional[Any] = None
+
+    def use(self, tier: int) -> bool:
+        """Process the next frames at `tier`; True if tracking restarts"""
+        if tier == self.tier:
+            return False
+        self.close()
+        self.tier = tier
+        return True
+
+    def process(self, image: np.ndarray):
+        if self._pose is None:
+            self._pose = self.pools[self.tier].acquire()
+        return self._pose.process(image)
+
+    def close(self):
+        if self._pose is not None:
+            pose, self._pose = self._pose, None
+            self.pools[self.tier].release(pose)
+
+
+class TierController:
+    """Caps the model tier while inference queue latency is high."""
+
+    def __init__(self, enabled: Iterable[int] = MODEL_TIERS, default_tier: int = 1,
+                 degrade_ms: float = 150.0, recover_ms: float = 30.0,
+                 cooldown: float = 10.0, smoothing: float = 0.2):
+        self.enabled = sorted(set(enabled))
+        self.default_tier = default_tier
+        self.degrade = degrade_ms / 1000.0
+        self.recover = recover_ms / 1000.0
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.ceiling = max(MODEL_TIERS)
+        # Exponentially weighted queue wait in seconds
+        self.queue_wait = 0.0
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+
+    def disable(self, tier: int):
+        """Stop serving `tier`, e.g. when its model could not be loaded"""
+        with self._lock:
+            self.enabled = [enabled for enabled in self.enabled if enabled != tier]
+
+    def observe(self, queue_wait: float):
+        """Feed one frame's queue wait (seconds) and adjust the ceiling"""
+        with self._lock:
+            self.queue_wait += self.smoothing * (queue_wait - self.queue_wait)
+            now = time.monotonic()
+            if now - self._last_change < self.cooldown:
+                return
+            if self.queue_wait > self.degrade and self.ceiling > min(MODEL_TIERS):
+                self.ceiling -= 1
+            elif self.queue_wait < self.recover and self.ceiling < max(MODEL_TIERS):
+                self.ceiling += 1
+            else:
+                return
+            self._last_change = now
+        logger.info(f"Model tier ceiling now {self.ceiling} "
+                    f"(queue wait {self.queue_wait * 1000:.0f} ms)")
+
+    def resolve(self, requested: Optional[int] = None) -> int:
+        """Tier to run: the request (or default) capped by load, among enabled tiers"""
+        enabled = self.enabled
+        if not enabled:
+            raise RuntimeError("No pose model tier is available")
+        tier = min(self.default_tier if requested is None else requested, self.ceiling)
+        lower = [candidate for candidate in enabled if candidate <= tier]
+        return lower[-1] if lower else enabled[0]
@@ -0,0 +1,75 @@
+"""
+Streaming building blocks for offline video analysis.
+
+A recorded set is decoded lazily with OpenCV, one frame at a time, and only a
+bounded window of frames is in flight on the inference workers, so memory
+stays flat no matter how long the video is. Results come back in frame order
+so stateful analysis (smoothing, rep counting) can run on them sequentially.
+
+Usage:
+    frames = iter_video_frames(path, sample_every=2, max_side=640)
+    for (index, timestamp, image), results in map_ordered(executor, detect, frames, window=8):
+        ...
+"""
+
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterable, Iterator, Tuple
+
+import numpy as np
+
+from lazy import lazy_import
+from preprocess import fit_to_max_side
+
+cv2 = lazy_import("cv2")
+
+# Used when the container does not report a frame rate
+DEFAULT_FPS = 30.0
+
+
+def iter_video_frames(path: str, sample_every: int = 1,
+                      max_side: int = 0) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """Yield (frame index, timestamp in seconds, RGB frame) for every Nth frame
+
+    Skipped frames are only grabbed, not decoded into images.
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError("Could not open video")
+
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+        sample_every = max(1, sample_every)
+        index = 0
+        while capture.grab():
+            if index % sample_every == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                frame = fit_to_max_side(frame, max_side)
+                yield index, index / fps, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+            index += 1
+    finally:
+        capture.release()
+
+
+def map_ordered(executor: Executor, fn: Callable[[Any], Any], items: Iterable[Any],
+                window: int) -> Iterator[Tuple[Any, Any]]:
+    """Like `executor.map`, but with at most `window` items in flight
+
+    Yields (item, fn(item)) in input order. Items are pulled from `items` only
+    as earlier results are consumed.
+    """
+    pending: deque = deque()
+    try:
+        for item in items:
+            pending.append((item, executor.submit(fn, item)))
+            if len(pending) >= max(1, window):
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()